@@ -0,0 +1,248 @@
+"""
+Shared Airtable client for the playtest tools and gitSync.
+
+One pooled keep-alive session per process, request timeouts, a client-side
+rate limit matching Airtable's 5 requests/second per base, automatic backoff
+on 429 and 5xx responses, a pagination generator and batch helpers for the
+10-records-per-request write endpoints.
+
+Installed into both projects from their requirements.txt (`../airtableClient`);
+after changing it, reinstall with `pip install ../airtableClient`.
+"""
+import os
+import time
+import random
+import threading
+from typing import Any, Dict, Iterator, List
+
+import requests
+from requests.adapters import HTTPAdapter
+
+AIRTABLE_API_BASE = 'https://api.airtable.com/v0'
+
+# Airtable allows 5 requests per second per base and at most 10 records per
+# create/update/delete request.
+REQUESTS_PER_SECOND = float(os.getenv('AIRTABLE_REQUESTS_PER_SECOND', 5))
+BATCH_SIZE = 10
+PAGE_SIZE = 100
+
+# (connect, read) timeouts in seconds
+REQUEST_TIMEOUT = (5, float(os.getenv('AIRTABLE_TIMEOUT_SECONDS', 30)))
+
+MAX_RETRIES = int(os.getenv('AIRTABLE_MAX_RETRIES', 5))
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+# Airtable asks clients to wait 30 seconds after a 429 before retrying
+RATE_LIMIT_BACKOFF = 30.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Keep-alive connections kept per host; enough for a handful of worker threads
+POOL_SIZE = 10
+
+
+class AirtableError(Exception):
+    def __init__(self, status_code, body):
+        super().__init__(f"Airtable error {status_code}: {body}")
+        self.status_code = status_code
+        self.body = body
+
+
+def chunks(items, size=BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class AirtableClient:
+    """Thread-safe Airtable REST client bound to one base."""
+
+    def __init__(self, api_key: str = None, base_id: str = None, timeout=REQUEST_TIMEOUT,
+                 max_retries: int = MAX_RETRIES, requests_per_second: float = REQUESTS_PER_SECOND):
+        self.api_key = api_key or os.getenv('AIRTABLE_API_KEY')
+        self.base_id = base_id or os.getenv('AIRTABLE_BASE_ID')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.min_interval = 1.0 / requests_per_second if requests_per_second else 0.0
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json'
+        })
+
+        self._throttle_lock = threading.Lock()
+        self._next_slot = 0.0
+
+        self.requests_made = 0
+        self.retries = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def url(self, table: str, record_id: str = None) -> str:
+        url = f"{AIRTABLE_API_BASE}/{self.base_id}/{requests.utils.quote(table, safe='')}"
+        if record_id:
+            url += f"/{requests.utils.quote(record_id, safe='')}"
+        return url
+
+    def _throttle(self):
+        """Space requests out so the whole process stays under the per-base rate limit."""
+        if not self.min_interval:
+            return
+        with self._throttle_lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.min_interval
+        if wait > 0:
+            time.sleep(wait)
+
+    def _backoff(self, attempt: int, response=None) -> float:
+        if response is not None and response.status_code == 429:
+            retry_after = response.headers.get('Retry-After')
+            try:
+                return float(retry_after) if retry_after else RATE_LIMIT_BACKOFF
+            except ValueError:
+                return RATE_LIMIT_BACKOFF
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    def request(self, method: str, table: str, record_id: str = None, params=None, json=None,
+                retry_writes: bool = None) -> Dict[str, Any]:
+        """Send one request, retrying rate limits, server errors and dropped connections.
+
+        With retry_writes=False a write is only resent when Airtable cannot have
+        applied it (429, or no connection was made); anything else is raised so
+        the caller can check what was written before trying again. It defaults
+        to False for POST, which would create the records twice, and True for
+        PATCH and DELETE, which can safely be sent again.
+        """
+        url = self.url(table, record_id)
+        if retry_writes is None:
+            retry_writes = method != 'POST'
+        safe = retry_writes or method == 'GET'
+        attempt = 0
+        while True:
+            self._throttle()
+            self.requests_made += 1
+            try:
+                response = self.session.request(method, url, params=params, json=json, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                if not safe and not isinstance(e, requests.ConnectTimeout):
+                    raise
+                delay = self._backoff(attempt)
+                print(f"⏳ Airtable {method} {table} failed ({e}), retrying in {delay:.1f}s")
+            else:
+                if response.ok:
+                    return response.json()
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    raise AirtableError(response.status_code, response.text)
+                if not safe and response.status_code != 429:
+                    raise AirtableError(response.status_code, response.text)
+                delay = self._backoff(attempt, response)
+                print(f"⏳ Airtable {method} {table} returned {response.status_code}, retrying in {delay:.1f}s")
+
+            self.retries += 1
+            attempt += 1
+            time.sleep(delay)
+
+    def pages(self, table: str, fields: List[str] = None, filter_by_formula: str = None,
+              page_size: int = PAGE_SIZE, **params) -> Iterator[List[Dict[str, Any]]]:
+        """Yield a table's records one page at a time, following Airtable's offsets.
+
+        Extra keyword arguments (view, maxRecords, sort[0][field], ...) are sent
+        as query parameters.
+        """
+        params = dict(params, pageSize=page_size)
+        if fields:
+            params['fields[]'] = fields
+        if filter_by_formula:
+            params['filterByFormula'] = filter_by_formula
+
+        while True:
+            page = self.request('GET', table, params=params)
+            yield page.get('records', [])
+            offset = page.get('offset')
+            if not offset:
+                break
+            params['offset'] = offset
+
+    def iterate(self, table: str, **kwargs) -> Iterator[Dict[str, Any]]:
+        """Yield every record of a table (see pages() for the arguments)."""
+        for page in self.pages(table, **kwargs):
+            yield from page
+
+    def get_all(self, table: str, **kwargs) -> List[Dict[str, Any]]:
+        return list(self.iterate(table, **kwargs))
+
+    def get(self, table: str, record_id: str) -> Dict[str, Any]:
+        return self.request('GET', table, record_id)
+
+    def create(self, table: str, fields: Dict[str, Any], typecast: bool = False,
+               retry_writes: bool = False) -> Dict[str, Any]:
+        return self.create_records(table, [fields], typecast=typecast, retry_writes=retry_writes)[0]
+
+    def update(self, table: str, record_id: str, fields: Dict[str, Any], typecast: bool = False) -> Dict[str, Any]:
+        payload = {'fields': fields}
+        if typecast:
+            payload['typecast'] = True
+        return self.request('PATCH', table, record_id, json=payload)
+
+    def create_records(self, table: str, records: List[Dict[str, Any]], typecast: bool = False,
+                       retry_writes: bool = False) -> List[Dict[str, Any]]:
+        """Create records (given as field dicts) 10 per request; returns the created records in order.
+
+        A failed request is only resent when Airtable can't have created its records (see request()).
+        """
+        created = []
+        for batch in chunks(records):
+            payload = {'records': [{'fields': fields} for fields in batch]}
+            if typecast:
+                payload['typecast'] = True
+            created.extend(self.request('POST', table, json=payload, retry_writes=retry_writes).get('records', []))
+        return created
+
+    def update_records(self, table: str, updates: List[Dict[str, Any]], typecast: bool = False) -> List[Dict[str, Any]]:
+        """Patch records given as {'id': ..., 'fields': {...}} 10 per request."""
+        updated = []
+        for batch in chunks(updates):
+            payload = {'records': [{'id': u['id'], 'fields': u['fields']} for u in batch]}
+            if typecast:
+                payload['typecast'] = True
+            updated.extend(self.request('PATCH', table, json=payload).get('records', []))
+        return updated
+
+    def upsert_records(self, table: str, records: List[Dict[str, Any]], merge_on: List[str],
+                       typecast: bool = False) -> List[Dict[str, Any]]:
+        """Create or update records (given as field dicts) matched on the merge_on fields, 10 per request.
+
+        Returns the records in order. Unlike create_records(), a failed request can be resent: a record
+        Airtable already created is matched and updated instead of created twice.
+        """
+        upserted = []
+        for batch in chunks(records):
+            payload = {'performUpsert': {'fieldsToMergeOn': merge_on},
+                       'records': [{'fields': fields} for fields in batch]}
+            if typecast:
+                payload['typecast'] = True
+            upserted.extend(self.request('PATCH', table, json=payload).get('records', []))
+        return upserted
+
+    def delete_records(self, table: str, record_ids: List[str]) -> List[str]:
+        """Delete records 10 per request; returns the ids Airtable reports as deleted."""
+        deleted = []
+        for batch in chunks(record_ids):
+            response = self.request('DELETE', table, params={'records[]': batch})
+            deleted.extend(r['id'] for r in response.get('records', []) if r.get('deleted'))
+        return deleted
+
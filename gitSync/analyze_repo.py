@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Analyze a single repository in isolation, without touching Airtable.
+
+Useful for reproducing a slow repository locally:
+
+    python analyze_repo.py https://github.com/owner/repo --profile
+    python analyze_repo.py ./some/checkout --posts posts.json --profile
+
+The post timeline comes either from a JSON file or is generated synthetically.
+"""
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any
+
+from main import analyze_repo_for_posts
+from profiling import start_profiling, stop_profiling, format_span_tree
+from limits import track_usage
+
+
+def synthetic_posts(count: int, interval_days: float) -> List[Dict[str, Any]]:
+    """Build a timeline of `count` posts spaced `interval_days` apart, ending now."""
+    now = datetime.now(timezone.utc)
+    posts = []
+    for i in range(count):
+        created_at = now - timedelta(days=interval_days * (count - 1 - i))
+        posts.append({
+            'record_id': None,
+            'post_id': f'synthetic-{i + 1}',
+            'created_at': created_at.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+            'username': None,
+            'git_changes': None
+        })
+    return posts
+
+
+def load_posts(path: str) -> List[Dict[str, Any]]:
+    """Load a post timeline from JSON.
+
+    Accepts a list of posts with `created_at` (and optionally `post_id`), raw
+    Airtable records with a `fields` object, or a `posts_data.json` group.
+    """
+    with open(path) as f:
+        data = json.load(f)
+
+    if isinstance(data, dict):
+        data = data.get('posts', data.get('records', []))
+    elif data and isinstance(data[0], dict) and 'posts' in data[0]:
+        data = data[0]['posts']
+
+    posts = []
+    for i, item in enumerate(data):
+        fields = item.get('fields', item)
+        created_at = fields.get('created_at') or fields.get('Created At')
+        if not created_at:
+            continue
+        posts.append({
+            'record_id': item.get('record_id') or item.get('id'),
+            'post_id': fields.get('post_id') or fields.get('PostID') or f'post-{i + 1}',
+            'created_at': created_at,
+            'username': fields.get('username'),
+            'git_changes': None
+        })
+
+    posts.sort(key=lambda x: x.get('created_at', ''))
+    return posts
+
+
+def profile_name(target: str) -> str:
+    """Turn a URL or path into a filesystem-safe profile file name."""
+    name = re.sub(r'^https?://', '', target.rstrip('/'))
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', name).strip('_') or 'repo'
+
+
+def analyze(target: str, posts: List[Dict[str, Any]], profile: bool = False,
+            profile_dir: str = 'profiles') -> Dict[str, Any]:
+    """Run the regular per-repo analysis for one target and report timings."""
+    repo_dir = os.path.abspath(target) if os.path.isdir(target) else None
+    github_url = target
+
+    profiler = None
+    if profile:
+        start_profiling(github_url)
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    started = time.perf_counter()
+    try:
+        with track_usage(github_url) as usage:
+            posts = analyze_repo_for_posts(github_url, posts, repo_dir=repo_dir)
+    finally:
+        elapsed = time.perf_counter() - started
+        root = None
+        if profile:
+            profiler.disable()
+            root = stop_profiling()
+
+    result = {
+        'github_url': github_url,
+        'posts': posts,
+        'elapsed_seconds': round(elapsed, 3),
+        'git_usage': usage.to_dict()
+    }
+
+    print(f"\ngit: {usage.processes} processes, {usage.cpu_seconds:.2f}s CPU, "
+          f"{usage.max_rss_kb // 1024} MB peak RSS, {usage.output_bytes} bytes of output")
+
+    if profile:
+        os.makedirs(profile_dir, exist_ok=True)
+        profile_path = os.path.join(profile_dir, f"{profile_name(target)}.prof")
+        profiler.dump_stats(profile_path)
+
+        result['spans'] = root.to_dict()
+        result['profile_path'] = profile_path
+
+        print(f"\n{'='*80}")
+        print("Stage timings")
+        print(f"{'='*80}")
+        print(format_span_tree(root))
+
+        stats_output = io.StringIO()
+        pstats.Stats(profiler, stream=stats_output).sort_stats('cumulative').print_stats(15)
+        print(f"\n{'='*80}")
+        print("Top functions by cumulative time")
+        print(f"{'='*80}")
+        print(stats_output.getvalue())
+        print(f"cProfile data saved to {profile_path} (open with `python -m pstats {profile_path}`)")
+
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Analyze git changes for a single repository.')
+    parser.add_argument('target', help='GitHub URL to clone, or path to a local checkout')
+    parser.add_argument('--posts', help='JSON file with the post timeline to analyze')
+    parser.add_argument('--synthetic-posts', type=int, default=5,
+                        help='Number of synthetic posts when --posts is not given (default: 5)')
+    parser.add_argument('--interval-days', type=float, default=2,
+                        help='Days between synthetic posts (default: 2)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Print a per-stage span tree and save a cProfile dump')
+    parser.add_argument('--profile-dir', default='profiles',
+                        help='Directory for cProfile dumps (default: profiles)')
+    parser.add_argument('--output', help='Write the analyzed posts (and spans) to this JSON file')
+    args = parser.parse_args(argv)
+
+    if args.posts:
+        posts = load_posts(args.posts)
+    else:
+        posts = synthetic_posts(args.synthetic_posts, args.interval_days)
+
+    if not posts:
+        print("No posts with a creation time to analyze")
+        return 1
+
+    print(f"Analyzing {args.target}")
+    print(f"  Posts: {len(posts)} ({'from ' + args.posts if args.posts else 'synthetic'})")
+
+    result = analyze(args.target, posts, profile=args.profile, profile_dir=args.profile_dir)
+
+    print(f"\nAnalyzed {len(result['posts'])} posts in {result['elapsed_seconds']}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import json
+import time
+import queue
+import threading
+from collections import deque
+from typing import Dict, Any, Iterator, List, Optional
+
+# Events kept for clients that connect (or reconnect) mid-cycle
+HISTORY_SIZE = 500
+
+# Per-subscriber buffer; a client that falls this far behind is dropped and its
+# stream ends, so it reconnects and resumes from its Last-Event-ID
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+# Comment line sent to idle clients so proxies don't close the connection
+KEEPALIVE_SECONDS = 15
+
+
+class Subscriber(queue.Queue):
+    """A client's pending events; `dropped` is set once the bus stops feeding it."""
+
+    def __init__(self):
+        super().__init__(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.dropped = False
+
+
+class EventBus:
+    """Fan-out of structured sync progress events to Server-Sent Events clients.
+
+    server.py re-execs itself after every cycle, so ids start at the boot time
+    in milliseconds: a client's Last-Event-ID from the previous process is then
+    below this process's first id, and it gets this process's whole history
+    instead of nothing.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: List[Subscriber] = []
+        self._history = deque(maxlen=HISTORY_SIZE)
+        self._first_id = int(time.time() * 1000)
+        self._next_id = self._first_id
+
+    def publish(self, event_type: str, **data) -> Dict[str, Any]:
+        with self._lock:
+            event = {
+                'id': self._next_id,
+                'type': event_type,
+                'timestamp': time.time(),
+                'data': data
+            }
+            self._next_id += 1
+            self._history.append(event)
+
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber.put_nowait(event)
+                except queue.Full:
+                    subscriber.dropped = True
+                    self._subscribers.remove(subscriber)
+        return event
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Subscriber:
+        """Register a client; events after last_event_id are replayed from history.
+
+        An id this process never issued (from an earlier boot) replays everything.
+        """
+        subscriber = Subscriber()
+        with self._lock:
+            if last_event_id is not None:
+                if not self._first_id <= last_event_id < self._next_id:
+                    last_event_id = self._first_id - 1
+                for event in self._history:
+                    if event['id'] > last_event_id:
+                        subscriber.put_nowait(event)
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def stream(self, last_event_id: Optional[int] = None) -> Iterator[str]:
+        """Yield events formatted for a text/event-stream response.
+
+        A dropped subscriber gets the events buffered before the drop, then the
+        stream ends; the client's EventSource reconnects with the last id it saw.
+        """
+        subscriber = self.subscribe(last_event_id)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                if subscriber.dropped and subscriber.empty():
+                    return
+                try:
+                    event = subscriber.get(timeout=KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            self.unsubscribe(subscriber)
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    payload = dict(event['data'], timestamp=event['timestamp'])
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(payload)}\n\n"
+
+
+events = EventBus()
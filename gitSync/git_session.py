@@ -0,0 +1,186 @@
+import tempfile
+import subprocess
+import threading
+from typing import List, Dict, Any, Optional
+
+from profiling import span
+from limits import LimitedPopen, GIT_MAX_OUTPUT_BYTES, current_usage
+from scheduler import parse_time
+
+# Field separator for the commit index; can't appear in names or subjects
+FIELD_SEP = '\x1f'
+LOG_FORMAT = FIELD_SEP.join(['%H', '%an', '%ae', '%ai', '%ct', '%s'])
+
+# Echoed back verbatim by `git diff-tree --stdin` because it isn't an object id,
+# which marks the end of the output for one commit.
+END_MARKER = '--gitsync-end--'
+
+LOG_TIMEOUT = 120        # Same budget as the old per-post `git log`
+DIFF_TREE_TIMEOUT = 60   # Same budget as the old per-commit `git show`
+
+
+class GitSessionError(Exception):
+    pass
+
+
+class GitSession:
+    """Answers commit and diff questions for one repository with a handful of git processes.
+
+    Instead of one `git log` per post and one `git show` per commit, the
+    session reads the whole commit index with a single `git log` and keeps one
+    `git diff-tree --stdin` process open, feeding it commit ids over stdin.
+    """
+
+    def __init__(self, repo_dir: str):
+        self.repo_dir = repo_dir
+        self._commits: Optional[List[Dict[str, Any]]] = None
+        self._diff_tree = None
+        self.processes_started = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _spawn(self, cmd: List[str], **kwargs):
+        self.processes_started += 1
+        return LimitedPopen(cmd, cwd=self.repo_dir, text=True, **kwargs)
+
+    def _record_output(self, nbytes: int):
+        usage = current_usage()
+        if usage is not None:
+            usage.record_output(nbytes)
+
+    def commit_index(self) -> List[Dict[str, Any]]:
+        """All commits reachable from any ref, newest first (loaded once)."""
+        if self._commits is not None:
+            return self._commits
+
+        # Written to a file rather than a pipe so the RLIMIT_FSIZE output limit applies
+        with span('log'), tempfile.TemporaryFile() as output:
+            proc = self._spawn(
+                ['git', 'log', '--all', f'--pretty=format:{LOG_FORMAT}'],
+                stdout=output,
+                stderr=subprocess.PIPE
+            )
+            try:
+                _, stderr = proc.communicate(timeout=LOG_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()  # Reap the process even after killing
+                raise GitSessionError(f"Timeout reading commit index from {self.repo_dir}")
+
+            if proc.returncode != 0:
+                raise GitSessionError(f"git log failed ({proc.returncode}): {stderr.strip()}")
+
+            output.seek(0)
+            raw = output.read()
+            self._record_output(len(raw))
+            stdout = raw.decode('utf-8', errors='replace')
+
+        commits = []
+        for line in stdout.split('\n'):
+            parts = line.split(FIELD_SEP, 5)
+            if len(parts) != 6:
+                continue
+            commits.append({
+                'hash': parts[0],
+                'author': parts[1],
+                'email': parts[2],
+                'date': parts[3],
+                'commit_time': int(parts[4]),
+                'message': parts[5]
+            })
+
+        self._commits = commits
+        return commits
+
+    def commits_in_timerange(self, start_time: str = None, end_time: str = None) -> List[Dict[str, Any]]:
+        """Commits with a commit date in [start_time, end_time], like `git log --since --until`."""
+        start = parse_time(start_time) if start_time else None
+        end = parse_time(end_time) if end_time else None
+
+        commits = []
+        for commit in self.commit_index():
+            if start is not None and commit['commit_time'] < start:
+                continue
+            if end is not None and commit['commit_time'] > end:
+                continue
+            commits.append(commit)
+        return commits
+
+    def _ensure_diff_tree(self):
+        if self._diff_tree is not None and self._diff_tree.poll() is None:
+            return self._diff_tree
+
+        # -M and --cc match what `git show --numstat` reports for renames and merges
+        self._diff_tree = self._spawn(
+            ['git', 'diff-tree', '--stdin', '-r', '-M', '--cc', '--root', '--numstat'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=1
+        )
+        return self._diff_tree
+
+    def numstat(self, commit_hash: str) -> str:
+        """`--numstat` output for one commit, read from the long-lived diff-tree process."""
+        with span('diff-tree'):
+            proc = self._ensure_diff_tree()
+
+            # Kill the process if git stalls (e.g. a lazy blob fetch hangs); the
+            # next query starts a fresh one.
+            watchdog = threading.Timer(DIFF_TREE_TIMEOUT, proc.kill)
+            watchdog.start()
+            output_bytes = 0
+            try:
+                proc.stdin.write(f"{commit_hash}\n{END_MARKER}\n")
+                proc.stdin.flush()
+
+                lines = []
+                while True:
+                    line = proc.stdout.readline()
+                    if not line:
+                        raise GitSessionError(f"git diff-tree exited while reading {commit_hash}")
+                    output_bytes += len(line)
+                    if GIT_MAX_OUTPUT_BYTES and output_bytes > GIT_MAX_OUTPUT_BYTES:
+                        raise GitSessionError(f"git diff-tree output for {commit_hash} exceeds GITSYNC_GIT_MAX_OUTPUT_MB")
+                    line = line.rstrip('\n')
+                    if line == END_MARKER:
+                        break
+                    lines.append(line)
+            except (OSError, ValueError, GitSessionError) as e:
+                # Don't reuse a process whose output may be out of step with our queries
+                self._discard_diff_tree()
+                if isinstance(e, GitSessionError):
+                    raise
+                raise GitSessionError(f"git diff-tree failed for {commit_hash}: {e}")
+            finally:
+                watchdog.cancel()
+                self._record_output(output_bytes)
+
+        # The first line is the commit id header
+        if lines and lines[0] == commit_hash:
+            lines = lines[1:]
+        return '\n'.join(lines)
+
+    def _discard_diff_tree(self):
+        proc = self._diff_tree
+        self._diff_tree = None
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+        if proc is not None:
+            proc.wait()  # Reap the process even after killing
+
+    def close(self):
+        proc = self._diff_tree
+        self._diff_tree = None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+            proc.wait()  # Reap the process even after killing
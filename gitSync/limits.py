@@ -0,0 +1,254 @@
+import os
+import time
+import signal
+import resource
+import threading
+import subprocess
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+from reaper import ReapablePopen, release_pid
+
+# Per-process limits for git children. 0 disables a limit.
+GIT_MAX_MEMORY_MB = int(os.environ.get('GITSYNC_GIT_MAX_MEMORY_MB', 4096))
+GIT_MAX_CPU_SECONDS = int(os.environ.get('GITSYNC_GIT_MAX_CPU_SECONDS', 600))
+GIT_MAX_OPEN_FILES = int(os.environ.get('GITSYNC_GIT_MAX_OPEN_FILES', 1024))
+GIT_MAX_OUTPUT_MB = int(os.environ.get('GITSYNC_GIT_MAX_OUTPUT_MB', 1024))
+
+# Largest single file a git child may write (pack files during clone, or the
+# commit index) and the most output we read back from one git query.
+GIT_MAX_OUTPUT_BYTES = GIT_MAX_OUTPUT_MB * 1024 * 1024
+
+# Grace between the soft CPU limit (SIGXCPU) and the hard one (SIGKILL)
+CPU_HARD_LIMIT_GRACE = 5
+
+# ru_inblock/ru_oublock count 512-byte blocks on Linux
+BLOCK_SIZE = 512
+
+# Return code for a child that was collected by someone else, so its exit
+# status is unknown: treated as a failure rather than a success
+LOST_EXIT_STATUS = 255
+
+# Signals the kernel sends when a child runs into one of its limits
+LIMIT_SIGNALS = {signal.SIGXCPU: 'cpu', signal.SIGXFSZ: 'output'}
+
+
+def _set_limit(pid: int, which: int, soft: int, hard: int = None):
+    hard = soft if hard is None else hard
+    _, current_hard = resource.prlimit(pid, which)
+    if current_hard != resource.RLIM_INFINITY:
+        soft = min(soft, current_hard)
+        hard = min(hard, current_hard)
+    resource.prlimit(pid, which, (soft, hard))
+
+
+def apply_git_limits(pid: int) -> bool:
+    """Apply the GITSYNC_GIT_MAX_* limits to a running child with prlimit(2).
+
+    Nothing runs in the forked child (preexec_fn isn't safe while other threads
+    hold locks), so the limits are set right after spawn. That leaves a short
+    window in which git runs unlimited: memory it maps, CPU it uses and files it
+    opens before prlimit() lands aren't refused, and helpers it forks in that
+    window (remote-http, index-pack) don't inherit the limits. The limits bound
+    long-running git work, not its first milliseconds.
+
+    Returns False when the platform has no prlimit (not Linux) or the child
+    already exited.
+    """
+    if not hasattr(resource, 'prlimit'):
+        return False
+    try:
+        if GIT_MAX_MEMORY_MB:
+            _set_limit(pid, resource.RLIMIT_AS, GIT_MAX_MEMORY_MB * 1024 * 1024)
+        if GIT_MAX_CPU_SECONDS:
+            _set_limit(pid, resource.RLIMIT_CPU, GIT_MAX_CPU_SECONDS, GIT_MAX_CPU_SECONDS + CPU_HARD_LIMIT_GRACE)
+        if GIT_MAX_OPEN_FILES:
+            _set_limit(pid, resource.RLIMIT_NOFILE, GIT_MAX_OPEN_FILES)
+        if GIT_MAX_OUTPUT_MB:
+            _set_limit(pid, resource.RLIMIT_FSIZE, GIT_MAX_OUTPUT_BYTES)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def limits() -> Dict[str, int]:
+    return {
+        'max_memory_mb': GIT_MAX_MEMORY_MB,
+        'max_cpu_seconds': GIT_MAX_CPU_SECONDS,
+        'max_open_files': GIT_MAX_OPEN_FILES,
+        'max_output_mb': GIT_MAX_OUTPUT_MB
+    }
+
+
+class GitUsage:
+    """Resource usage of the git processes run on behalf of one repository."""
+
+    def __init__(self, github_url: str = None):
+        self.github_url = github_url
+        self.processes = 0
+        self.user_cpu = 0.0
+        self.system_cpu = 0.0
+        self.max_rss_kb = 0
+        self.read_bytes = 0
+        self.written_bytes = 0
+        self.output_bytes = 0
+        self.limit_kills: Dict[str, int] = {}
+        self.commands: Dict[str, Dict[str, Any]] = {}
+
+    def record_process(self, args: List[str], returncode: int, rusage):
+        command = args[1] if len(args) > 1 else args[0]
+        self.processes += 1
+
+        per_command = self.commands.setdefault(command, {'processes': 0, 'cpu_seconds': 0.0, 'max_rss_kb': 0})
+        per_command['processes'] += 1
+
+        if rusage is not None:
+            cpu = rusage.ru_utime + rusage.ru_stime
+            self.user_cpu += rusage.ru_utime
+            self.system_cpu += rusage.ru_stime
+            self.max_rss_kb = max(self.max_rss_kb, rusage.ru_maxrss)
+            self.read_bytes += rusage.ru_inblock * BLOCK_SIZE
+            self.written_bytes += rusage.ru_oublock * BLOCK_SIZE
+            per_command['cpu_seconds'] += cpu
+            per_command['max_rss_kb'] = max(per_command['max_rss_kb'], rusage.ru_maxrss)
+
+        if returncode is not None and returncode < 0 and -returncode in LIMIT_SIGNALS:
+            limit = LIMIT_SIGNALS[-returncode]
+            self.limit_kills[limit] = self.limit_kills.get(limit, 0) + 1
+
+    def record_output(self, nbytes: int):
+        self.output_bytes += nbytes
+
+    def merge(self, other: 'GitUsage'):
+        self.processes += other.processes
+        self.user_cpu += other.user_cpu
+        self.system_cpu += other.system_cpu
+        self.max_rss_kb = max(self.max_rss_kb, other.max_rss_kb)
+        self.read_bytes += other.read_bytes
+        self.written_bytes += other.written_bytes
+        self.output_bytes += other.output_bytes
+        for limit, count in other.limit_kills.items():
+            self.limit_kills[limit] = self.limit_kills.get(limit, 0) + count
+        for command, stats in other.commands.items():
+            per_command = self.commands.setdefault(command, {'processes': 0, 'cpu_seconds': 0.0, 'max_rss_kb': 0})
+            per_command['processes'] += stats['processes']
+            per_command['cpu_seconds'] += stats['cpu_seconds']
+            per_command['max_rss_kb'] = max(per_command['max_rss_kb'], stats['max_rss_kb'])
+
+    @property
+    def cpu_seconds(self) -> float:
+        return self.user_cpu + self.system_cpu
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'processes': self.processes,
+            'cpu_seconds': round(self.cpu_seconds, 3),
+            'user_cpu_seconds': round(self.user_cpu, 3),
+            'system_cpu_seconds': round(self.system_cpu, 3),
+            'max_rss_kb': self.max_rss_kb,
+            'read_bytes': self.read_bytes,
+            'written_bytes': self.written_bytes,
+            'output_bytes': self.output_bytes,
+            'limit_kills': dict(self.limit_kills),
+            'commands': {
+                command: dict(stats, cpu_seconds=round(stats['cpu_seconds'], 3))
+                for command, stats in self.commands.items()
+            }
+        }
+        if self.github_url:
+            data['github_url'] = self.github_url
+        return data
+
+
+_local = threading.local()
+
+
+def current_usage() -> Optional[GitUsage]:
+    return getattr(_local, 'usage', None)
+
+
+@contextmanager
+def track_usage(github_url: str = None):
+    """Attribute every LimitedPopen started in this thread to a GitUsage for github_url."""
+    usage = GitUsage(github_url)
+    previous = current_usage()
+    _local.usage = usage
+    try:
+        yield usage
+    finally:
+        _local.usage = previous
+
+
+class LimitedPopen(ReapablePopen):
+    """ReapablePopen for git: runs under the GITSYNC_GIT_MAX_* rlimits and is
+    collected with wait4() so its CPU time, peak RSS and I/O are recorded
+    against the repo being tracked when it was started.
+
+    Collection goes through the public wait()/poll() only (communicate() and
+    the context manager use them too), so no CPython internals are overridden.
+    """
+
+    def __init__(self, args, **kwargs):
+        self.usage = current_usage()
+        self.rusage = None
+        self._collect_lock = threading.Lock()
+        super().__init__(args, **kwargs)
+        # The pid stays ours until we collect it, so it can't be reused under us
+        apply_git_limits(self.pid)
+
+    def _collect(self, options: int) -> bool:
+        """wait4() the child; True once it has been collected."""
+        if not self._collect_lock.acquire(blocking=not options & os.WNOHANG):
+            return False
+        try:
+            if self.returncode is not None:
+                return True
+            try:
+                pid, status, rusage = os.wait4(self.pid, options)
+            except ChildProcessError:
+                # Already collected elsewhere; the status (and usage) is lost
+                print(f"  Warning: git child {self.pid} was collected elsewhere, exit status unknown")
+                self.rusage = None
+                self.returncode = LOST_EXIT_STATUS
+            else:
+                if pid == 0:
+                    return False
+                self.rusage = rusage
+                self.returncode = os.waitstatus_to_exitcode(status)
+        finally:
+            self._collect_lock.release()
+        release_pid(self.pid)
+        if self.usage is not None:
+            self.usage.record_process(list(self.args), self.returncode, self.rusage)
+        return True
+
+    def poll(self):
+        self._collect(os.WNOHANG)
+        return self.returncode
+
+    def wait(self, timeout=None):
+        if timeout is None:
+            self._collect(0)
+            return self.returncode
+        deadline = time.monotonic() + timeout
+        delay = 0.0005
+        while not self._collect(os.WNOHANG):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(self.args, timeout)
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.05)
+        return self.returncode
+
+
+def summarize_usage(usages: List[GitUsage], top: int = 10) -> Dict[str, Any]:
+    """Cycle-wide git usage: configured limits, totals and the most expensive repos by CPU."""
+    totals = GitUsage()
+    for usage in usages:
+        totals.merge(usage)
+    expensive = sorted(usages, key=lambda u: u.cpu_seconds, reverse=True)[:top]
+    return {
+        'limits': limits(),
+        'totals': totals.to_dict(),
+        'most_expensive': [usage.to_dict() for usage in expensive]
+    }
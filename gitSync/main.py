@@ -1,5 +1,4 @@
 import os
-import requests
 import json
 import subprocess
 import shutil
@@ -10,6 +9,13 @@ from typing import List, Dict, Any
 from datetime import datetime
 from dotenv import load_dotenv
 
+from profiling import span
+from reaper import reaper
+from limits import LimitedPopen, track_usage, summarize_usage
+from rollups import ActivityRollups
+from git_session import GitSession, GitSessionError
+from airtable_client import AirtableClient
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -17,11 +23,17 @@ load_dotenv()
 AIRTABLE_API_KEY = os.environ.get('AIRTABLE_API_KEY')
 AIRTABLE_BASE_ID = os.environ.get('AIRTABLE_BASE_ID')
 AIRTABLE_POSTS_TABLE = 'Posts'
-AIRTABLE_API_BASE = 'https://api.airtable.com/v0'
+
+# Shared pooled client (timeouts, rate limiting and 429/5xx retries)
+airtable = AirtableClient(AIRTABLE_API_KEY, AIRTABLE_BASE_ID)
 
 
 def cleanup_git_processes():
     """Clean up any hanging git processes and zombies."""
+    if reaper.enabled:
+        # Exited descendants are already collected by the child reaper
+        return
+    
     try:
         zombies_cleaned = 0
         git_procs_cleaned = 0
@@ -67,6 +79,9 @@ def cleanup_git_processes():
 
 def aggressive_cleanup_git_processes():
     """Aggressively clean up ALL git processes to prevent zombie accumulation."""
+    if reaper.enabled:
+        return
+    
     try:
         zombies_cleaned = 0
         git_procs_cleaned = 0
@@ -110,6 +125,9 @@ def aggressive_cleanup_git_processes():
 
 def nuclear_cleanup_git_processes():
     """NUCLEAR OPTION: Kill ALL git processes and use system commands for total reset."""
+    if reaper.enabled:
+        return
+    
     try:
         print("  🚨 NUCLEAR CLEANUP: Total git process reset...")
         
@@ -183,6 +201,9 @@ def nuclear_cleanup_git_processes():
 
 def docker_nuclear_cleanup():
     """DOCKER-SPECIFIC NUCLEAR CLEANUP: Optimized for containerized environments."""
+    if reaper.enabled:
+        return
+    
     try:
         print("  🐳 DOCKER NUCLEAR CLEANUP: Container-optimized git process reset...")
         
@@ -292,6 +313,9 @@ def docker_nuclear_cleanup():
 
 def ultra_aggressive_cleanup():
     """ULTRA AGGRESSIVE: Force restart the entire process to eliminate all zombies."""
+    if reaper.enabled:
+        return
+    
     try:
         print("  💥 ULTRA AGGRESSIVE CLEANUP: Force process restart to eliminate zombies...")
         
@@ -340,53 +364,21 @@ def ultra_aggressive_cleanup():
         print(f"  💥 ULTRA AGGRESSIVE ERROR: {e}")
 
 
-def airtable_request(path: str, method: str = 'GET', params: Dict = None) -> Dict[str, Any]:
-    """Make a request to the Airtable API."""
-    url = f"{AIRTABLE_API_BASE}/{AIRTABLE_BASE_ID}/{path}"
-    headers = {
-        'Authorization': f'Bearer {AIRTABLE_API_KEY}',
-        'Content-Type': 'application/json',
-    }
-    
-    response = requests.request(method, url, headers=headers, params=params)
-    
-    if not response.ok:
-        raise Exception(f"Airtable error {response.status_code}: {response.text}")
-    
-    return response.json()
-
-
 def fetch_all_posts() -> List[Dict[str, Any]]:
     """Fetch all posts from Airtable with pagination."""
     all_records = []
-    offset = None
     
     # Specific fields to fetch
-    fields_to_fetch = ['PostID', 'GitHubUrl', 'GitHubUsername', 'GitChanges', 'Created At', 'TimeSpentOnAsset']
+    fields_to_fetch = ['PostID', 'GitHubUrl', 'GitHubUsername', 'GitChanges', 'Created At', 'TimeSpentOnAsset', 'Game']
     
     # Filter to only get records where:
     # - GitHubUrl and GitHubUsername are not empty
     # - TimeSpentOnAsset is empty/null (not yet processed)
     filter_formula = "AND({GitHubUrl}!='', {GitHubUsername}!='', OR({TimeSpentOnAsset}='', {TimeSpentOnAsset}=BLANK()))"
     
-    while True:
-        params = {
-            'pageSize': '100',
-            'fields[]': fields_to_fetch,
-            'filterByFormula': filter_formula
-        }
-        if offset:
-            params['offset'] = offset
-        
-        page = airtable_request(AIRTABLE_POSTS_TABLE, params=params)
-        
-        page_records = page.get('records', [])
+    for page_records in airtable.pages(AIRTABLE_POSTS_TABLE, fields=fields_to_fetch,
+                                       filter_by_formula=filter_formula):
         all_records.extend(page_records)
-        
-        offset = page.get('offset')
-        if not offset:
-            break
-        
         print(f"Fetched {len(all_records)} records so far...")
     
     return all_records
@@ -399,17 +391,19 @@ def clone_repo(github_url: str, clone_dir: str) -> bool:
         print(f"  Cloning {github_url} (blobless for speed)...")
         # Use --filter=blob:none for blobless clone - gets commit history and tree structure
         # but not file contents, which are fetched on-demand. Much faster!
-        proc = subprocess.Popen(
-            ['git', 'clone', '--filter=blob:none', '--quiet', github_url, clone_dir],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        stdout, stderr = proc.communicate(timeout=300)  # 5 minute timeout
-        proc.wait()  # Ensure we reap the zombie
+        with span('fetch'):
+            proc = LimitedPopen(
+                ['git', 'clone', '--filter=blob:none', '--quiet', github_url, clone_dir],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+            stdout, stderr = proc.communicate(timeout=300)  # 5 minute timeout
+            proc.wait()  # Ensure we reap the zombie
         
         # Immediate cleanup after git operation
-        cleanup_git_processes()
+        with span('process cleanup'):
+            cleanup_git_processes()
         
         if proc.returncode != 0:
             print(f"  Error cloning repository: {stderr}")
@@ -429,85 +423,15 @@ def clone_repo(github_url: str, clone_dir: str) -> bool:
         return False
 
 
-def get_commits_in_timerange(repo_dir: str, start_time: str = None, end_time: str = None) -> List[Dict[str, Any]]:
-    """Get commits within a time range."""
-    proc = None
-    try:
-        # Build git log command
-        cmd = ['git', 'log', '--all', '--pretty=format:%H|%an|%ae|%ai|%s']
-        
-        if start_time and end_time:
-            cmd.append(f'--since={start_time}')
-            cmd.append(f'--until={end_time}')
-        elif end_time:
-            cmd.append(f'--until={end_time}')
-        
-        proc = subprocess.Popen(
-            cmd,
-            cwd=repo_dir,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        stdout, stderr = proc.communicate(timeout=120)  # 2 minute timeout
-        proc.wait()  # Ensure we reap the zombie
-        
-        # Immediate cleanup after git operation
-        cleanup_git_processes()
-        
-        commits = []
-        for line in stdout.strip().split('\n'):
-            if not line:
-                continue
-            parts = line.split('|', 4)
-            if len(parts) == 5:
-                commits.append({
-                    'hash': parts[0],
-                    'author': parts[1],
-                    'email': parts[2],
-                    'date': parts[3],
-                    'message': parts[4]
-                })
-        
-        return commits
-    except subprocess.TimeoutExpired:
-        if proc:
-            proc.kill()
-            proc.wait()  # Reap the zombie even after killing
-        print(f"  Timeout getting commits from {repo_dir}")
-        return []
-    except Exception as e:
-        if proc and proc.poll() is None:
-            proc.kill()
-            proc.wait()  # Reap the zombie
-        print(f"  Error getting commits: {e}")
-        return []
-
-
-def get_commit_changes(repo_dir: str, commit_hash: str, github_url: str) -> List[Dict[str, Any]]:
-    """Get file changes for a specific commit with stats and GitHub links."""
-    proc = None
-    try:
-        # Get diff stats for the commit
-        proc = subprocess.Popen(
-            ['git', 'show', '--numstat', '--pretty=format:', commit_hash],
-            cwd=repo_dir,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        stdout, stderr = proc.communicate(timeout=60)  # 1 minute timeout
-        proc.wait()  # Ensure we reap the zombie
-        
-        # Immediate cleanup after git operation
-        cleanup_git_processes()
-        
-        # Parse the GitHub URL to get owner/repo
-        # Format: https://github.com/owner/repo or https://github.com/owner/repo.git
-        github_url = github_url.rstrip('.git')
-        
+def parse_numstat(output: str, commit_hash: str, github_url: str) -> List[Dict[str, Any]]:
+    """Turn `--numstat` output for one commit into file changes with GitHub links."""
+    # Parse the GitHub URL to get owner/repo
+    # Format: https://github.com/owner/repo or https://github.com/owner/repo.git
+    github_url = github_url.rstrip('.git')
+    
+    with span('numstat parse'):
         files_changed = []
-        for line in stdout.strip().split('\n'):
+        for line in output.strip().split('\n'):
             if not line:
                 continue
             parts = line.split('\t')
@@ -536,102 +460,113 @@ def get_commit_changes(repo_dir: str, commit_hash: str, github_url: str) -> List
                     'is_binary': is_binary,
                     'github_link': file_link
                 })
-        
-        return files_changed
-    except subprocess.TimeoutExpired:
-        if proc:
-            proc.kill()
-            proc.wait()  # Reap the zombie even after killing
-        print(f"  Timeout getting commit changes for {commit_hash}")
-        return []
-    except Exception as e:
-        if proc and proc.poll() is None:
-            proc.kill()
-            proc.wait()  # Reap the zombie
+    
+    return files_changed
+
+
+def get_session_commit_changes(session: GitSession, commit_hash: str, github_url: str) -> List[Dict[str, Any]]:
+    """Get file changes for a commit through a repo's long-lived GitSession."""
+    try:
+        return parse_numstat(session.numstat(commit_hash), commit_hash, github_url)
+    except GitSessionError as e:
         print(f"  Error getting commit changes: {e}")
         return []
 
 
-def analyze_repo_for_posts(github_url: str, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Analyze repository and generate git changes for each post."""
-    temp_dir = tempfile.mkdtemp()
-    repo_dir = os.path.join(temp_dir, 'repo')
+def analyze_repo_for_posts(github_url: str, posts: List[Dict[str, Any]], repo_dir: str = None) -> List[Dict[str, Any]]:
+    """Analyze repository and generate git changes for each post.
+
+    If repo_dir points at an existing checkout it is analyzed in place instead
+    of cloning github_url into a temporary directory.
+    """
+    temp_dir = None
+    if repo_dir is None:
+        temp_dir = tempfile.mkdtemp()
+        repo_dir = os.path.join(temp_dir, 'repo')
     
     try:
         # Clone the repository
-        if not clone_repo(github_url, repo_dir):
-            # Clean up temp dir if clone fails
-            shutil.rmtree(temp_dir, ignore_errors=True)
+        if temp_dir and not clone_repo(github_url, repo_dir):
             return posts
         
-        # Process each post
-        for i, post in enumerate(posts):
-            print(f"  Processing post {i+1}/{len(posts)}: {post['post_id']}")
-            
-            # Clean up zombies every 5 posts to prevent accumulation
-            if i % 5 == 0 and i > 0:
-                cleanup_git_processes()
-            
-            # Determine time range
-            end_time = post['created_at']
-            start_time = posts[i-1]['created_at'] if i > 0 else None
-            
-            # Get commits in this time range
-            commits = get_commits_in_timerange(repo_dir, start_time, end_time)
-            
-            if not commits:
-                print(f"    No commits found in timerange")
-                post['git_changes'] = json.dumps({
-                    'commits': [],
-                    'summary': 'No commits found in this timerange'
-                })
-                continue
-            
-            print(f"    Found {len(commits)} commits")
-            
-            # Get changes for each commit
-            commit_changes = []
-            for commit in commits:
-                files_changed = get_commit_changes(repo_dir, commit['hash'], github_url)
+        # One commit index and one diff-tree process answer every question for this repo
+        with GitSession(repo_dir) as session:
+            for i, post in enumerate(posts):
+                print(f"  Processing post {i+1}/{len(posts)}: {post['post_id']}")
                 
-                # Generate GitHub commit link
-                commit_link = f"{github_url}/commit/{commit['hash']}"
+                # Clean up zombies every 5 posts to prevent accumulation
+                if i % 5 == 0 and i > 0:
+                    with span('process cleanup'):
+                        cleanup_git_processes()
                 
-                commit_changes.append({
-                    'hash': commit['hash'][:7],  # Short hash
-                    'author': commit['author'],
-                    'date': commit['date'],
-                    'message': commit['message'],
-                    'github_link': commit_link,
-                    'files': files_changed,
-                    'stats': {
-                        'files_changed': len(files_changed),
-                        'total_additions': sum(f['additions'] for f in files_changed),
-                        'total_deletions': sum(f['deletions'] for f in files_changed)
-                    }
-                })
-            
-            # Calculate totals
-            total_files = sum(len(c['files']) for c in commit_changes)
-            total_additions = sum(c['stats']['total_additions'] for c in commit_changes)
-            total_deletions = sum(c['stats']['total_deletions'] for c in commit_changes)
-            
-            # Store as JSON string
-            post['git_changes'] = json.dumps({
-                'commits': commit_changes,
-                'summary': {
-                    'total_commits': len(commits),
-                    'total_files_changed': total_files,
-                    'total_additions': total_additions,
-                    'total_deletions': total_deletions
-                }
-            }, indent=2)
+                # Determine time range
+                end_time = post['created_at']
+                start_time = posts[i-1]['created_at'] if i > 0 else None
+                
+                # Get commits in this time range
+                try:
+                    commits = session.commits_in_timerange(start_time, end_time)
+                except GitSessionError as e:
+                    print(f"  Error getting commits: {e}")
+                    commits = []
+                
+                if not commits:
+                    print(f"    No commits found in timerange")
+                    post['git_changes'] = json.dumps({
+                        'commits': [],
+                        'summary': 'No commits found in this timerange'
+                    })
+                    continue
+                
+                print(f"    Found {len(commits)} commits")
+                
+                # Get changes for each commit
+                commit_changes = []
+                for commit in commits:
+                    files_changed = get_session_commit_changes(session, commit['hash'], github_url)
+                    
+                    with span('summarize'):
+                        # Generate GitHub commit link
+                        commit_link = f"{github_url}/commit/{commit['hash']}"
+                        
+                        commit_changes.append({
+                            'hash': commit['hash'][:7],  # Short hash
+                            'author': commit['author'],
+                            'date': commit['date'],
+                            'message': commit['message'],
+                            'github_link': commit_link,
+                            'files': files_changed,
+                            'stats': {
+                                'files_changed': len(files_changed),
+                                'total_additions': sum(f['additions'] for f in files_changed),
+                                'total_deletions': sum(f['deletions'] for f in files_changed)
+                            }
+                        })
+                
+                with span('summarize'):
+                    # Calculate totals
+                    total_files = sum(len(c['files']) for c in commit_changes)
+                    total_additions = sum(c['stats']['total_additions'] for c in commit_changes)
+                    total_deletions = sum(c['stats']['total_deletions'] for c in commit_changes)
+                
+                # Store as JSON string
+                with span('serialize'):
+                    post['git_changes'] = json.dumps({
+                        'commits': commit_changes,
+                        'summary': {
+                            'total_commits': len(commits),
+                            'total_files_changed': total_files,
+                            'total_additions': total_additions,
+                            'total_deletions': total_deletions
+                        }
+                    }, indent=2)
         
         return posts
-        
+    
     finally:
         # Cleanup
-        shutil.rmtree(temp_dir, ignore_errors=True)
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
 
 
 def group_posts_by_github_url(posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -654,12 +589,18 @@ def group_posts_by_github_url(posts: List[Dict[str, Any]]) -> List[Dict[str, Any
         if isinstance(username, list):
             username = username[0] if username else None
         
+        # Extract linked game record ID (linked records come back as a list)
+        game_id = fields.get('Game')
+        if isinstance(game_id, list):
+            game_id = game_id[0] if game_id else None
+        
         # Create post data
         post_data = {
             'record_id': post.get('id'),  # Store Airtable record ID
             'post_id': fields.get('PostID'),
             'created_at': fields.get('Created At'),
             'username': username,
+            'game_id': game_id,
             'git_changes': fields.get('GitChanges')
         }
         
@@ -683,25 +624,7 @@ def group_posts_by_github_url(posts: List[Dict[str, Any]]) -> List[Dict[str, Any
 def update_post_git_changes(record_id: str, git_changes: str) -> bool:
     """Update a post record in Airtable with git changes."""
     try:
-        url = f"{AIRTABLE_API_BASE}/{AIRTABLE_BASE_ID}/{AIRTABLE_POSTS_TABLE}/{record_id}"
-        
-        response = requests.patch(
-            url,
-            headers={
-                'Authorization': f'Bearer {AIRTABLE_API_KEY}',
-                'Content-Type': 'application/json',
-            },
-            json={
-                'fields': {
-                    'GitChanges': git_changes
-                }
-            }
-        )
-        
-        if not response.ok:
-            print(f"    Error updating Airtable: {response.status_code} - {response.text}")
-            return False
-        
+        airtable.update(AIRTABLE_POSTS_TABLE, record_id, {'GitChanges': git_changes})
         return True
     except Exception as e:
         print(f"    Error updating Airtable: {e}")
@@ -736,13 +659,20 @@ def main():
     print("Analyzing repositories and updating git changes...")
     print("="*80 + "\n")
     
+    rollups = ActivityRollups()
+    git_usage = []
+    
     # Process each repository
     for i, repo in enumerate(grouped_data, 1):
         print(f"\nRepository {i}/{len(grouped_data)}: {repo['github_url']}")
         print(f"  Total posts: {len(repo['posts'])}")
         
         # Analyze repo and get git changes
-        repo['posts'] = analyze_repo_for_posts(repo['github_url'], repo['posts'])
+        with track_usage(repo['github_url']) as usage:
+            git_usage.append(usage)
+            repo['posts'] = analyze_repo_for_posts(repo['github_url'], repo['posts'])
+        print(f"  git: {usage.processes} processes, {usage.cpu_seconds:.2f}s CPU, {usage.max_rss_kb // 1024} MB peak RSS")
+        rollups.record_posts(repo['github_url'], repo['posts'])
         
         # Update Airtable with git changes
         for post in repo['posts']:
@@ -750,6 +680,11 @@ def main():
                 print(f"  Updating Airtable for post {post['post_id']}...")
                 update_post_git_changes(post['record_id'], post['git_changes'])
     
+    mirrored = rollups.mirror_to_airtable(airtable)
+    if mirrored:
+        print(f"\nMirrored {mirrored} activity rollup rows to Airtable")
+    rollups.close()
+    
     # Save to JSON file
     output_file = 'posts_data.json'
     with open(output_file, 'w') as f:
@@ -758,6 +693,7 @@ def main():
     print(f"\n\n{'='*80}")
     print(f"Complete! Data saved to {output_file}")
     print(f"Processed {len(grouped_data)} repositories")
+    print(f"git usage: {json.dumps(summarize_usage(git_usage)['totals'])}")
     print(f"{'='*80}")
 
 
@@ -0,0 +1,101 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+# Per-thread profiling state. Spans are only recorded on threads where
+# start_profiling() has been called, so instrumented code costs nothing
+# during a normal sync.
+_state = threading.local()
+
+
+class Span:
+    """A named stage in the span tree.
+
+    Repeated spans with the same name under the same parent are merged, so a
+    stage that runs once per commit shows up as a single node with a call count
+    and a total duration instead of thousands of siblings.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.children: Dict[str, 'Span'] = {}
+
+    def child(self, name: str) -> 'Span':
+        if name not in self.children:
+            self.children[name] = Span(name)
+        return self.children[name]
+
+    def record(self, duration: float):
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'count': self.count,
+            'total_seconds': round(self.total, 6),
+            'max_seconds': round(self.max, 6),
+            'children': [c.to_dict() for c in self.children.values()]
+        }
+
+
+def start_profiling(root_name: str) -> Span:
+    """Start recording spans on the current thread under a new root span."""
+    root = Span(root_name)
+    _state.root = root
+    _state.stack = [root]
+    _state.started = time.perf_counter()
+    return root
+
+
+def stop_profiling() -> Optional[Span]:
+    """Stop recording spans on the current thread and return the root span."""
+    root = getattr(_state, 'root', None)
+    if root is not None:
+        root.record(time.perf_counter() - _state.started)
+    _state.root = None
+    _state.stack = None
+    return root
+
+
+@contextmanager
+def span(name: str):
+    """Time the enclosed block as a child of the currently open span."""
+    stack = getattr(_state, 'stack', None)
+    if not stack:
+        yield
+        return
+
+    node = stack[-1].child(name)
+    stack.append(node)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        node.record(time.perf_counter() - started)
+        stack.pop()
+
+
+def format_span_tree(root: Span) -> str:
+    """Render a span tree as indented text with counts and share of the root."""
+    lines = []
+    root_total = root.total or 1e-9
+
+    def walk(node: Span, depth: int):
+        share = node.total / root_total * 100
+        lines.append(
+            f"{'  ' * depth}{node.name:<{max(1, 32 - 2 * depth)}} "
+            f"{node.total:9.3f}s {share:5.1f}%  x{node.count}"
+            f"  (max {node.max:.3f}s)"
+        )
+        for child in sorted(node.children.values(), key=lambda c: c.total, reverse=True):
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    return '\n'.join(lines)
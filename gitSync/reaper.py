@@ -0,0 +1,178 @@
+import os
+import sys
+import time
+import glob
+import ctypes
+import signal
+import threading
+import subprocess
+import psutil
+from typing import Dict, Any, List
+
+# prctl(2) option that makes orphaned descendants get reparented to us
+# instead of to the container's init process.
+PR_SET_CHILD_SUBREAPER = 36
+
+# GITSYNC_REAPER=on|off|auto. "auto" enables the reaper when we are PID 1,
+# which is the case when the container runs `python server.py` directly.
+REAPER_MODE = os.environ.get('GITSYNC_REAPER', 'auto').lower()
+
+# Safety net in case a SIGCHLD is coalesced or lost
+REAP_POLL_SECONDS = 5
+
+# Pids spawned through ReapablePopen. The reaper never collects these, so
+# Popen.wait()/communicate() still see the real exit status of our own git
+# commands. The lock is held while spawning so a child that exits immediately
+# can't be reaped before it has been registered.
+_owned_pids = set()
+_spawn_lock = threading.Lock()
+
+
+class ReapablePopen(subprocess.Popen):
+    """subprocess.Popen that keeps its child out of reach of the ChildReaper.
+
+    The pid is handed back once wait() or poll() has collected the child
+    (communicate() and the context manager go through wait()).
+    """
+
+    def __init__(self, *args, **kwargs):
+        with _spawn_lock:
+            super().__init__(*args, **kwargs)
+            _owned_pids.add(self.pid)
+
+    def poll(self):
+        returncode = super().poll()
+        if returncode is not None:
+            release_pid(self.pid)
+        return returncode
+
+    def wait(self, timeout=None):
+        returncode = super().wait(timeout)
+        release_pid(self.pid)
+        return returncode
+
+
+def release_pid(pid: int):
+    """Hand a collected ReapablePopen pid back (for subclasses that collect their own child)."""
+    _owned_pids.discard(pid)
+
+
+def reaper_requested() -> bool:
+    if REAPER_MODE in ('1', 'on', 'true', 'yes'):
+        return True
+    if REAPER_MODE in ('0', 'off', 'false', 'no'):
+        return False
+    return os.getpid() == 1
+
+
+def enable_subreaper() -> bool:
+    """Mark this process as a child subreaper (Linux only). Returns True on success."""
+    if not sys.platform.startswith('linux'):
+        return False
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.prctl(PR_SET_CHILD_SUBREAPER, 1, 0, 0, 0) != 0:
+            print(f"Warning: prctl(PR_SET_CHILD_SUBREAPER) failed: {os.strerror(ctypes.get_errno())}")
+            return False
+        return True
+    except Exception as e:
+        print(f"Warning: Could not enable child subreaper: {e}")
+        return False
+
+
+def _child_pids() -> List[int]:
+    """List direct children of this process, including reparented orphans."""
+    pids = set()
+    for path in glob.glob('/proc/self/task/*/children'):
+        try:
+            with open(path) as f:
+                pids.update(int(pid) for pid in f.read().split())
+        except (OSError, ValueError):
+            pass
+    if pids or os.path.exists('/proc/self/task'):
+        return list(pids)
+    try:
+        return [child.pid for child in psutil.Process().children()]
+    except psutil.Error:
+        return []
+
+
+class ChildReaper:
+    """SIGCHLD-driven collector for every exited descendant we didn't spawn ourselves.
+
+    With the subreaper flag set, grandchildren orphaned by git (remote helpers,
+    pack-objects, ...) are reparented to this process and reaped here as soon
+    as they exit, so the periodic process-table scans aren't needed.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.subreaper = False
+        self.sigchld_received = 0
+        self.reaped_orphans = 0
+        self.recent: List[Dict[str, Any]] = []
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self) -> bool:
+        """Install the SIGCHLD handler and start the reaper thread (main thread only)."""
+        if self.enabled:
+            return True
+        self.subreaper = enable_subreaper()
+        signal.signal(signal.SIGCHLD, self._on_sigchld)
+        self._thread = threading.Thread(target=self._run, name='child-reaper', daemon=True)
+        self._thread.start()
+        self.enabled = True
+        # Collect anything that exited before we were listening
+        self._wakeup.set()
+        return True
+
+    def _on_sigchld(self, signum, frame):
+        self.sigchld_received += 1
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(REAP_POLL_SECONDS)
+            self._wakeup.clear()
+            try:
+                self.reap()
+            except Exception as e:
+                print(f"  Warning: child reaper error: {e}")
+
+    def reap(self) -> int:
+        """Collect every exited child that isn't owned by a ReapablePopen."""
+        reaped = 0
+        with _spawn_lock:
+            for pid in _child_pids():
+                if pid in _owned_pids:
+                    continue
+                try:
+                    reaped_pid, status = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    continue
+                if reaped_pid == 0:
+                    continue
+                reaped += 1
+                self.reaped_orphans += 1
+                self.recent.append({
+                    'pid': reaped_pid,
+                    'exit_code': os.waitstatus_to_exitcode(status),
+                    'time': time.time()
+                })
+        if len(self.recent) > 20:
+            del self.recent[:-20]
+        return reaped
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'subreaper': self.subreaper,
+            'sigchld_received': self.sigchld_received,
+            'reaped_orphans': self.reaped_orphans,
+            'owned_children': len(_owned_pids),
+            'recent': list(self.recent)
+        }
+
+
+reaper = ChildReaper()
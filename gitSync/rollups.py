@@ -0,0 +1,263 @@
+import os
+import sys
+import json
+import sqlite3
+from typing import List, Dict, Any, Optional, Set, Tuple
+from datetime import datetime, timezone
+
+from scheduler import parse_time
+from airtable_client import AirtableClient, chunks
+
+ROLLUPS_DB = os.environ.get('GITSYNC_ROLLUPS_DB', 'rollups.db')
+
+# Optional Airtable table the daily rollups are mirrored into
+AIRTABLE_ROLLUPS_TABLE = os.environ.get('AIRTABLE_ROLLUPS_TABLE')
+
+# Fields identifying a rollup row in Airtable, so a resent batch updates rows instead of duplicating them
+AIRTABLE_MERGE_FIELDS = ['Dimension', 'Key', 'Day']
+
+DIMENSIONS = ('user', 'repo', 'game')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commit_facts (
+    repo TEXT NOT NULL,
+    commit_hash TEXT NOT NULL,
+    post_record_id TEXT,
+    user TEXT,
+    game TEXT,
+    day TEXT NOT NULL,
+    additions INTEGER NOT NULL,
+    deletions INTEGER NOT NULL,
+    files_changed INTEGER NOT NULL,
+    PRIMARY KEY (repo, commit_hash)
+);
+CREATE TABLE IF NOT EXISTS commit_files (
+    repo TEXT NOT NULL,
+    commit_hash TEXT NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (repo, commit_hash, path)
+);
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    dimension TEXT NOT NULL,
+    key TEXT NOT NULL,
+    day TEXT NOT NULL,
+    commits INTEGER NOT NULL DEFAULT 0,
+    additions INTEGER NOT NULL DEFAULT 0,
+    deletions INTEGER NOT NULL DEFAULT 0,
+    files_changed INTEGER NOT NULL DEFAULT 0,
+    airtable_id TEXT,
+    dirty INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (dimension, key, day)
+);
+CREATE INDEX IF NOT EXISTS daily_rollups_dirty ON daily_rollups (dirty);
+"""
+
+
+def commit_day(date: str) -> Optional[str]:
+    """UTC calendar day (YYYY-MM-DD) of a commit date."""
+    timestamp = parse_time(date)
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d')
+
+
+class ActivityRollups:
+    """Daily commit/line/file totals per user, repo and game.
+
+    Built as a by-product of analysis: every analyzed commit is stored once per
+    (repo, commit) and its delta is applied to the daily rollups, so
+    re-analyzing the same posts every cycle doesn't double count. Files aren't
+    additive (ten commits to one file touch one file), so files_changed is
+    recounted as the distinct (repo, path) pairs of the day's commits whenever
+    one of them changes.
+    """
+
+    def __init__(self, path: str = ROLLUPS_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _apply(self, fact: Dict[str, Any], sign: int):
+        keys = {'user': fact['user'], 'repo': fact['repo'], 'game': fact['game']}
+        for dimension in DIMENSIONS:
+            if not keys[dimension]:
+                continue
+            self.conn.execute(
+                """INSERT INTO daily_rollups (dimension, key, day, commits, additions, deletions, dirty)
+                   VALUES (?, ?, ?, ?, ?, ?, 1)
+                   ON CONFLICT (dimension, key, day) DO UPDATE SET
+                       commits = commits + excluded.commits,
+                       additions = additions + excluded.additions,
+                       deletions = deletions + excluded.deletions,
+                       dirty = 1""",
+                (dimension, keys[dimension], fact['day'], sign, sign * fact['additions'], sign * fact['deletions'])
+            )
+
+    def _groups(self, fact: Dict[str, Any]) -> List[Tuple[str, str, str]]:
+        return [(dimension, fact[dimension], fact['day']) for dimension in DIMENSIONS if fact[dimension]]
+
+    def _commit_paths(self, repo: str, commit_hash: str) -> Set[str]:
+        return {row['path'] for row in self.conn.execute(
+            "SELECT path FROM commit_files WHERE repo = ? AND commit_hash = ?", (repo, commit_hash)
+        )}
+
+    def _count_files(self, dimension: str, key: str, day: str):
+        """Recount the distinct files touched by a rollup row's commits."""
+        # dimension is one of DIMENSIONS, which are also commit_facts columns
+        self.conn.execute(
+            f"""UPDATE daily_rollups SET dirty = 1, files_changed = (
+                    SELECT COUNT(*) FROM (
+                        SELECT DISTINCT f.repo, f.path FROM commit_facts c
+                        JOIN commit_files f ON f.repo = c.repo AND f.commit_hash = c.commit_hash
+                        WHERE c.{dimension} = ? AND c.day = ?
+                    )
+                )
+                WHERE dimension = ? AND key = ? AND day = ?""",
+            (key, day, dimension, key, day)
+        )
+
+    def record_posts(self, github_url: str, posts: List[Dict[str, Any]]) -> int:
+        """Fold the analyzed commits of a repo's posts into the rollups.
+
+        Returns the number of commits that were new or changed.
+        """
+        changed = 0
+        touched = set()
+        with self.conn:
+            for post in posts:
+                git_changes = post.get('git_changes')
+                if not git_changes:
+                    continue
+                try:
+                    commits = json.loads(git_changes).get('commits', [])
+                except (ValueError, AttributeError):
+                    continue
+
+                for commit in commits:
+                    day = commit_day(commit.get('date'))
+                    if not day:
+                        continue
+                    stats = commit.get('stats', {})
+                    fact = {
+                        'repo': github_url,
+                        'commit_hash': commit.get('hash'),
+                        'post_record_id': post.get('record_id'),
+                        'user': post.get('username'),
+                        'game': post.get('game_id'),
+                        'day': day,
+                        'additions': stats.get('total_additions', 0),
+                        'deletions': stats.get('total_deletions', 0),
+                        'files_changed': stats.get('files_changed', 0)
+                    }
+                    paths = {f['filepath'] for f in commit.get('files', []) if f.get('filepath')}
+
+                    existing = self.conn.execute(
+                        "SELECT * FROM commit_facts WHERE repo = ? AND commit_hash = ?",
+                        (github_url, fact['commit_hash'])
+                    ).fetchone()
+                    if existing is not None:
+                        if (all(existing[k] == fact[k] for k in fact)
+                                and self._commit_paths(github_url, fact['commit_hash']) == paths):
+                            continue
+                        self._apply(dict(existing), -1)
+                        touched.update(self._groups(dict(existing)))
+
+                    self.conn.execute(
+                        """INSERT OR REPLACE INTO commit_facts
+                           (repo, commit_hash, post_record_id, user, game, day, additions, deletions, files_changed)
+                           VALUES (:repo, :commit_hash, :post_record_id, :user, :game, :day,
+                                   :additions, :deletions, :files_changed)""",
+                        fact
+                    )
+                    self.conn.execute("DELETE FROM commit_files WHERE repo = ? AND commit_hash = ?",
+                                      (github_url, fact['commit_hash']))
+                    self.conn.executemany(
+                        "INSERT INTO commit_files (repo, commit_hash, path) VALUES (?, ?, ?)",
+                        [(github_url, fact['commit_hash'], path) for path in sorted(paths)]
+                    )
+                    self._apply(fact, 1)
+                    touched.update(self._groups(fact))
+                    changed += 1
+
+            for group in touched:
+                self._count_files(*group)
+        return changed
+
+    def daily(self, dimension: str, key: str = None, since: str = None) -> List[Dict[str, Any]]:
+        """Daily rollup rows for a dimension, optionally for one key and from a day onwards."""
+        query = "SELECT dimension, key, day, commits, additions, deletions, files_changed FROM daily_rollups WHERE dimension = ?"
+        args = [dimension]
+        if key is not None:
+            query += " AND key = ?"
+            args.append(key)
+        if since is not None:
+            query += " AND day >= ?"
+            args.append(since)
+        query += " ORDER BY key, day"
+        return [dict(row) for row in self.conn.execute(query, args)]
+
+    def mirror_to_airtable(self, client: AirtableClient, table: str = AIRTABLE_ROLLUPS_TABLE) -> int:
+        """Upsert changed rollup rows into an Airtable table in batches of 10."""
+        if not table:
+            return 0
+
+        rows = [dict(row) for row in self.conn.execute("SELECT * FROM daily_rollups WHERE dirty = 1")]
+        if not rows:
+            return 0
+
+        def to_fields(row):
+            return {
+                'Dimension': row['dimension'],
+                'Key': row['key'],
+                'Day': row['day'],
+                'Commits': row['commits'],
+                'Additions': row['additions'],
+                'Deletions': row['deletions'],
+                'FilesChanged': row['files_changed']
+            }
+
+        # Upserted on (Dimension, Key, Day) rather than created: a batch that reached Airtable but whose
+        # airtable_id wasn't saved (crash, timeout) updates its rows when it's sent again
+        pushed = 0
+        for batch in chunks(rows):
+            try:
+                records = client.upsert_records(table, [to_fields(row) for row in batch], AIRTABLE_MERGE_FIELDS)
+            except Exception as e:
+                print(f"  Error mirroring rollups to Airtable: {e}")
+                return pushed
+
+            with self.conn:
+                for row, record in zip(batch, records):
+                    self.conn.execute(
+                        """UPDATE daily_rollups SET airtable_id = ?, dirty = 0
+                           WHERE dimension = ? AND key = ? AND day = ?""",
+                        (record.get('id'), row['dimension'], row['key'], row['day'])
+                    )
+            pushed += len(batch)
+
+        return pushed
+
+
+def main():
+    """Print daily rollups: python rollups.py <user|repo|game> [key] [since YYYY-MM-DD]"""
+    if len(sys.argv) < 2 or sys.argv[1] not in DIMENSIONS:
+        print(f"Usage: python rollups.py <{'|'.join(DIMENSIONS)}> [key] [since YYYY-MM-DD]")
+        return 1
+
+    rollups = ActivityRollups()
+    rows = rollups.daily(
+        sys.argv[1],
+        key=sys.argv[2] if len(sys.argv) > 2 else None,
+        since=sys.argv[3] if len(sys.argv) > 3 else None
+    )
+    print(json.dumps(rows, indent=2))
+    rollups.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+import os
+import json
+import time
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timezone
+
+# Bounds on how often a single repository is re-analyzed
+MIN_CHECK_INTERVAL = int(os.environ.get('GITSYNC_MIN_INTERVAL_MINUTES', 5)) * 60
+MAX_CHECK_INTERVAL = int(os.environ.get('GITSYNC_MAX_INTERVAL_HOURS', 24)) * 3600
+
+# A repo is revisited after this fraction of the time since its last activity,
+# e.g. a repo last touched 2 hours ago is checked again in 30 minutes.
+ACTIVITY_FACTOR = 0.25
+
+# Weight of the newest analysis duration in a repo's running average
+DURATION_SMOOTHING = 0.3
+
+# Assumed analysis time for repos that have never been analyzed
+DEFAULT_REPO_DURATION = 30.0
+
+SCHEDULE_FILE = os.environ.get('GITSYNC_SCHEDULE_FILE', 'repo_schedule.json')
+
+
+def parse_time(value: str) -> Optional[float]:
+    """Parse an Airtable or `git log --pretty=%ai` timestamp into epoch seconds."""
+    if not value:
+        return None
+    try:
+        text = value.strip().replace('Z', '+00:00')
+        # git's %ai format separates the offset with a space: "2025-09-01 10:30:00 -0400"
+        if len(text) > 6 and text[-6] == ' ' and text[-5] in '+-':
+            text = text[:-6] + text[-5:]
+        parsed = datetime.fromisoformat(text)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    except ValueError:
+        return None
+
+
+def latest_activity(posts: List[Dict[str, Any]]) -> Dict[str, Optional[float]]:
+    """Find the most recent post and commit times in an analyzed group of posts."""
+    latest_post = None
+    latest_commit = None
+
+    for post in posts:
+        post_time = parse_time(post.get('created_at'))
+        if post_time and (latest_post is None or post_time > latest_post):
+            latest_post = post_time
+
+        git_changes = post.get('git_changes')
+        if not git_changes:
+            continue
+        try:
+            commits = json.loads(git_changes).get('commits', [])
+        except (ValueError, AttributeError):
+            continue
+        for commit in commits:
+            commit_time = parse_time(commit.get('date'))
+            if commit_time and (latest_commit is None or commit_time > latest_commit):
+                latest_commit = commit_time
+
+    return {'post': latest_post, 'commit': latest_commit}
+
+
+class RepoScheduler:
+    """Per-repository next-check times based on recent commit and post activity.
+
+    State is kept in a small JSON file so it survives the restart the server
+    does after every sync cycle.
+    """
+
+    def __init__(self, path: str = SCHEDULE_FILE):
+        self.path = path
+        self.repos: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def load(cls, path: str = SCHEDULE_FILE) -> 'RepoScheduler':
+        scheduler = cls(path)
+        try:
+            with open(path, 'r') as f:
+                scheduler.repos = json.load(f).get('repos', {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Warning: Could not load repo schedule, starting fresh: {e}")
+        return scheduler
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({'repos': self.repos}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Warning: Could not save repo schedule: {e}")
+
+    def compute_interval(self, last_activity: Optional[float], now: float) -> float:
+        """Check interval for a repo whose most recent activity was at last_activity."""
+        if last_activity is None:
+            return MAX_CHECK_INTERVAL
+        age = max(0.0, now - last_activity)
+        return min(MAX_CHECK_INTERVAL, max(MIN_CHECK_INTERVAL, age * ACTIVITY_FACTOR))
+
+    def has_new_posts(self, repo: Dict[str, Any]) -> bool:
+        state = self.repos.get(repo['github_url'])
+        if state is None:
+            return True
+        seen = set(state.get('post_ids', []))
+        return any(post.get('record_id') not in seen for post in repo['posts'])
+
+    def select_due(self, grouped_data: List[Dict[str, Any]], now: float = None) -> List[Dict[str, Any]]:
+        """Return the repos that should be analyzed this cycle, most urgent first.
+
+        Repos with posts that have not been analyzed yet jump the queue (newest
+        post first); the rest are ordered by how overdue they are.
+        """
+        now = now if now is not None else time.time()
+        fresh = []
+        overdue = []
+
+        for repo in grouped_data:
+            if self.has_new_posts(repo):
+                newest = max((parse_time(p.get('created_at')) or 0 for p in repo['posts']), default=0)
+                fresh.append((newest, repo))
+                continue
+
+            next_check = self.repos[repo['github_url']].get('next_check', 0)
+            if next_check <= now:
+                overdue.append((now - next_check, repo))
+
+        fresh.sort(key=lambda x: x[0], reverse=True)
+        overdue.sort(key=lambda x: x[0], reverse=True)
+        return [repo for _, repo in fresh] + [repo for _, repo in overdue]
+
+    def expected_duration(self, github_url: str) -> float:
+        """Historical average analysis time for a repo, or the average over all repos."""
+        state = self.repos.get(github_url)
+        if state and state.get('avg_duration') is not None:
+            return state['avg_duration']
+        known = [r['avg_duration'] for r in self.repos.values() if r.get('avg_duration') is not None]
+        return sum(known) / len(known) if known else DEFAULT_REPO_DURATION
+
+    def estimate_seconds(self, repos: List[Dict[str, Any]]) -> float:
+        """Expected time to analyze all of the given repos."""
+        return sum(self.expected_duration(repo['github_url']) for repo in repos)
+
+    def record_check(self, github_url: str, posts: List[Dict[str, Any]], now: float = None,
+                     duration: float = None):
+        """Record an analysis of github_url (taking `duration` seconds) and schedule its next check."""
+        now = now if now is not None else time.time()
+        previous = self.repos.get(github_url, {})
+
+        avg_duration = previous.get('avg_duration')
+        if duration is not None:
+            avg_duration = duration if avg_duration is None else (
+                DURATION_SMOOTHING * duration + (1 - DURATION_SMOOTHING) * avg_duration
+            )
+
+        activity = latest_activity(posts)
+
+        last_commit = max(filter(None, [activity['commit'], previous.get('last_commit')]), default=None)
+        last_post = max(filter(None, [activity['post'], previous.get('last_post')]), default=None)
+        last_activity = max(filter(None, [last_commit, last_post]), default=None)
+
+        interval = self.compute_interval(last_activity, now)
+        self.repos[github_url] = {
+            'last_checked': now,
+            'next_check': now + interval,
+            'interval': interval,
+            'last_commit': last_commit,
+            'last_post': last_post,
+            'avg_duration': avg_duration,
+            'post_ids': [post.get('record_id') for post in posts if post.get('record_id')]
+        }
+
+    def prune(self, active_urls: List[str]):
+        """Forget repos that no longer have any unprocessed posts."""
+        active = set(active_urls)
+        for url in list(self.repos):
+            if url not in active:
+                del self.repos[url]
@@ -7,7 +7,7 @@ import atexit
 import psutil
 import json
 from datetime import datetime
-from flask import Flask, jsonify
+from flask import Flask, jsonify, Response, request, stream_with_context
 from dotenv import load_dotenv
 
 # Import the sync logic from main
@@ -21,9 +21,15 @@ from main import (
     nuclear_cleanup_git_processes,
     docker_nuclear_cleanup,
     ultra_aggressive_cleanup,
+    airtable,
     AIRTABLE_API_KEY,
     AIRTABLE_BASE_ID
 )
+from scheduler import RepoScheduler
+from reaper import reaper, reaper_requested
+from limits import track_usage, summarize_usage
+from rollups import ActivityRollups
+from events import events
 
 load_dotenv()
 
@@ -83,6 +89,10 @@ def cleanup_pid():
 
 def cleanup_all_zombies():
     """Aggressively clean up all zombie processes."""
+    if reaper.enabled:
+        # The child reaper collects exited descendants as soon as they exit
+        return
+    
     print("\n  Cleaning up zombie processes...")
     try:
         # Clean up git processes
@@ -116,6 +126,9 @@ def signal_handler(signum, frame):
 
 def periodic_cleanup():
     """Periodically clean up zombie processes during operation."""
+    if reaper.enabled:
+        return
+    
     while True:
         time.sleep(30)  # Check every 30 seconds
         try:
@@ -141,11 +154,15 @@ def perform_full_sync():
     print(f"Starting sync #{sync_count + 1} at {datetime.now().isoformat()}")
     print(f"{'='*80}\n")
     
+    cycle_started = time.time()
+    
     # Fetch posts
     posts = fetch_all_posts()
     print(f"Total posts fetched: {len(posts)}")
     
     if len(posts) == 0:
+        events.publish('cycle_finished', cycle=sync_count + 1, repos_processed=0, posts_updated=0,
+                       errors=0, duration=round(time.time() - cycle_started, 3))
         return {
             'success': True,
             'message': 'No posts to process',
@@ -156,31 +173,76 @@ def perform_full_sync():
     
     # Group by GitHub URL
     grouped_data = group_posts_by_github_url(posts)
-    print(f"Grouped into {len(grouped_data)} unique repositories\n")
+    print(f"Grouped into {len(grouped_data)} unique repositories")
+    
+    # Only analyze repos that are due, based on their recent activity
+    scheduler = RepoScheduler.load()
+    scheduler.prune([repo['github_url'] for repo in grouped_data])
+    due_repos = scheduler.select_due(grouped_data)
+    print(f"{len(due_repos)} repositories due for analysis, {len(grouped_data) - len(due_repos)} not due yet\n")
+    
+    remaining_eta = scheduler.estimate_seconds(due_repos)
+    events.publish('cycle_started', cycle=sync_count + 1, total_posts=len(posts),
+                   total_repos=len(grouped_data), due_repos=len(due_repos),
+                   eta_seconds=round(remaining_eta, 1))
+    for position, repo in enumerate(due_repos, 1):
+        events.publish('repo_queued', github_url=repo['github_url'], position=position,
+                       posts=len(repo['posts']),
+                       expected_seconds=round(scheduler.expected_duration(repo['github_url']), 1))
+    
+    rollups = ActivityRollups()
     
     repos_processed = 0
     posts_updated = 0
+    commits_rolled_up = 0
+    errors = 0
+    git_usage = []
     
     # Process each repository
-    for i, repo in enumerate(grouped_data, 1):
-        print(f"Repository {i}/{len(grouped_data)}: {repo['github_url']}")
+    for i, repo in enumerate(due_repos, 1):
+        print(f"Repository {i}/{len(due_repos)}: {repo['github_url']}")
         print(f"  Posts: {len(repo['posts'])}")
         
+        repo_started = time.time()
+        events.publish('repo_started', github_url=repo['github_url'], position=i,
+                       eta_seconds=round(remaining_eta, 1))
+        remaining_eta -= scheduler.expected_duration(repo['github_url'])
+        
         # Clean up zombies before processing each repository
         cleanup_git_processes()
         
         try:
-            # Analyze repo and get git changes
-            repo['posts'] = analyze_repo_for_posts(repo['github_url'], repo['posts'])
+            # Analyze repo and get git changes; every git child it starts is
+            # resource-limited and its usage attributed to this repo
+            with track_usage(repo['github_url']) as usage:
+                git_usage.append(usage)
+                repo['posts'] = analyze_repo_for_posts(repo['github_url'], repo['posts'])
+            analyzed_at = time.time()
             
             # Update Airtable with git changes
+            repo_posts_updated = 0
             for post in repo['posts']:
                 if post.get('git_changes'):
                     print(f"  Updating Airtable for post {post['post_id']}...")
                     if update_post_git_changes(post['record_id'], post['git_changes']):
                         posts_updated += 1
+                        repo_posts_updated += 1
+                        events.publish('post_updated', github_url=repo['github_url'],
+                                       record_id=post['record_id'], post_id=post['post_id'])
+            
+            commits_rolled_up += rollups.record_posts(repo['github_url'], repo['posts'])
             
             repos_processed += 1
+            scheduler.record_check(repo['github_url'], repo['posts'], duration=analyzed_at - repo_started)
+            scheduler.save()
+            
+            events.publish('repo_finished', github_url=repo['github_url'], position=i,
+                           posts_updated=repo_posts_updated,
+                           analyze_seconds=round(analyzed_at - repo_started, 3),
+                           git_cpu_seconds=round(usage.cpu_seconds, 3),
+                           git_max_rss_kb=usage.max_rss_kb,
+                           duration=round(time.time() - repo_started, 3),
+                           eta_seconds=round(max(0.0, remaining_eta), 1))
             
             # Ultra aggressive cleanup after each repository to prevent accumulation
             print(f"  Ultra aggressive cleanup after repo {i}...")
@@ -188,18 +250,36 @@ def perform_full_sync():
             
         except Exception as e:
             print(f"  Error processing repo: {e}")
+            errors += 1
+            events.publish('error', github_url=repo['github_url'], position=i, message=str(e),
+                           duration=round(time.time() - repo_started, 3))
+            # Back off like any other check so a failing repo doesn't retry every cycle
+            scheduler.record_check(repo['github_url'], repo['posts'])
+            scheduler.save()
             # Still clean up zombies even on error
             ultra_aggressive_cleanup()
             continue
     
+    # Mirror changed daily rollups to Airtable (only if AIRTABLE_ROLLUPS_TABLE is set)
+    rollups_mirrored = rollups.mirror_to_airtable(airtable)
+    rollups.close()
+    
     result = {
         'success': True,
         'total_posts': len(posts),
         'repos_processed': repos_processed,
+        'repos_skipped': len(grouped_data) - len(due_repos),
         'posts_updated': posts_updated,
+        'commits_rolled_up': commits_rolled_up,
+        'rollups_mirrored': rollups_mirrored,
+        'git_usage': summarize_usage(git_usage),
         'timestamp': datetime.now().isoformat()
     }
     
+    events.publish('cycle_finished', cycle=sync_count + 1, repos_processed=repos_processed,
+                   posts_updated=posts_updated, errors=errors,
+                   duration=round(time.time() - cycle_started, 3))
+    
     print(f"\n{'='*80}")
     print(f"Sync complete: {repos_processed} repos, {posts_updated} posts updated")
     print(f"{'='*80}\n")
@@ -283,10 +363,27 @@ def sync_status():
         'last_sync_result': last_sync_result,
         'last_error': sync_error,
         'sync_count': sync_count,
+        'reaper': reaper.stats(),
         'timestamp': datetime.now().isoformat()
     })
 
 
+@app.route('/api/events', methods=['GET'])
+def sync_events():
+    """Stream sync progress as Server-Sent Events."""
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        last_event_id = int(last_event_id) if last_event_id is not None else None
+    except ValueError:
+        last_event_id = None
+    
+    return Response(
+        stream_with_context(events.stream(last_event_id)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/api/sync', methods=['POST'])
 def trigger_sync():
     """Manually trigger a sync."""
@@ -318,6 +415,7 @@ def root():
         'endpoints': {
             'health': '/health',
             'sync_status': '/api/sync-status',
+            'events': '/api/events (SSE)',
             'trigger_sync': '/api/sync (POST)'
         }
     })
@@ -336,6 +434,11 @@ if __name__ == '__main__':
         # SIGHUP not available on Windows
         pass
     
+    # Collect orphaned git helpers ourselves when running as PID 1 (or when asked to)
+    if reaper_requested():
+        reaper.start()
+        print(f"Child reaper enabled (subreaper: {reaper.subreaper}), process table scans disabled")
+    
     # Register cleanup on exit
     atexit.register(cleanup_all_zombies)
     atexit.register(cleanup_pid)
@@ -12,7 +12,8 @@ import shutil
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from main import clone_repo, get_commits_in_timerange, get_commit_changes
+from main import clone_repo, get_session_commit_changes
+from git_session import GitSession
 
 def count_zombies():
     """Count current zombie processes."""
@@ -91,21 +92,9 @@ def stress_test_git_operations(iterations=10):
             
             print(f"  After clone: {zombies} zombies, {git_procs} git procs")
             
-            # Get commits
-            commits = get_commits_in_timerange(repo_dir)
-            zombies, zombie_list = count_zombies()
-            git_procs = count_git_processes()
-            
-            if zombies > max_zombies:
-                max_zombies = zombies
-            if git_procs > max_git:
-                max_git = git_procs
-            
-            print(f"  After log:   {zombies} zombies, {git_procs} git procs ({len(commits)} commits)")
-            
-            # Get changes for first commit
-            if commits:
-                changes = get_commit_changes(repo_dir, commits[0]['hash'], test_url)
+            with GitSession(repo_dir) as session:
+                # Get commits
+                commits = session.commits_in_timerange()
                 zombies, zombie_list = count_zombies()
                 git_procs = count_git_processes()
                 
@@ -114,7 +103,23 @@ def stress_test_git_operations(iterations=10):
                 if git_procs > max_git:
                     max_git = git_procs
                 
-                print(f"  After show:  {zombies} zombies, {git_procs} git procs ({len(changes)} changes)")
+                print(f"  After log:   {zombies} zombies, {git_procs} git procs ({len(commits)} commits)")
+                
+                # Get changes for first commit
+                if commits:
+                    changes = get_session_commit_changes(session, commits[0]['hash'], test_url)
+                    zombies, zombie_list = count_zombies()
+                    git_procs = count_git_processes()
+                    
+                    if zombies > max_zombies:
+                        max_zombies = zombies
+                    if git_procs > max_git:
+                        max_git = git_procs
+                    
+                    print(f"  After diff:  {zombies} zombies, {git_procs} git procs ({len(changes)} changes)")
+            
+            # The session's diff-tree process is gone once it's closed
+            zombies, zombie_list = count_zombies()
             
             zombie_accumulation.append(zombies - initial_zombies)
             
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test script for the sync progress event stream (events.py).
+
+Publishes more events than a slow client's buffer holds, and checks that the
+client's stream delivers what it buffered and then ends instead of idling on
+keepalives, that reconnecting with the last id it received replays the events
+it missed, and that other clients keep receiving everything.
+
+    python test_events.py
+"""
+import re
+import events
+from events import EventBus
+
+events.SUBSCRIBER_QUEUE_SIZE = 3
+
+
+def event_ids(chunks):
+    return [int(match) for chunk in chunks for match in re.findall(r"^id: (\d+)$", chunk, re.MULTILINE)]
+
+
+def test_dropped_subscriber_stream_ends():
+    bus = EventBus()
+    slow = bus.stream()
+    assert next(slow).startswith("retry:")
+    fast = bus.subscribe()
+
+    published = []
+    for n in range(5):
+        published.append(bus.publish('repo_synced', repo=f'repo{n}')['id'])
+        fast.get_nowait()
+
+    # The buffered events, then the end of the stream (no keepalive wait)
+    received = event_ids(list(slow))
+    assert received == published[:events.SUBSCRIBER_QUEUE_SIZE], received
+    assert fast in bus._subscribers and len(bus._subscribers) == 1
+
+    # Reconnecting with the last id replays the events published after the drop
+    resumed = bus.stream(received[-1])
+    assert next(resumed).startswith("retry:")
+    replayed = event_ids([next(resumed) for _ in published[len(received):]])
+    assert replayed == published[len(received):], replayed
+    resumed.close()
+    assert bus._subscribers == [fast]
+
+
+def test_subscriber_within_buffer_is_kept():
+    bus = EventBus()
+    subscriber = bus.subscribe()
+    for n in range(events.SUBSCRIBER_QUEUE_SIZE):
+        bus.publish('repo_synced', repo=f'repo{n}')
+    assert not subscriber.dropped and subscriber in bus._subscribers
+
+
+if __name__ == '__main__':
+    for test in (test_dropped_subscriber_stream_ends, test_subscriber_within_buffer_is_kept):
+        test()
+        print(f"✓ {test.__name__}")
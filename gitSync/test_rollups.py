@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test script for the daily activity rollups (rollups.py).
+
+Folds analyzed posts into a scratch rollups database and checks that files
+touched by several commits on one day are counted once, that re-analyzing
+changes nothing while a corrected commit is recounted, that the same path in
+another repository counts as another file, and that mirroring upserts on the
+(Dimension, Key, Day) key, so a batch sent again after a crash updates the
+rows it already created instead of duplicating them.
+
+    python test_rollups.py
+"""
+import os
+import json
+import tempfile
+from rollups import ActivityRollups, AIRTABLE_MERGE_FIELDS
+
+REPO = 'https://github.com/someone/game'
+
+
+def commit(commit_hash, date, paths):
+    files = [{'filepath': path, 'additions': 2, 'deletions': 1} for path in paths]
+    return {'hash': commit_hash, 'date': date, 'files': files, 'stats': {
+        'files_changed': len(files), 'total_additions': 2 * len(files), 'total_deletions': len(files)
+    }}
+
+
+def post(record_id, *commits):
+    return {'record_id': record_id, 'username': 'someone', 'game_id': 'recGame1',
+            'git_changes': json.dumps({'commits': list(commits)})}
+
+
+def new_rollups():
+    return ActivityRollups(os.path.join(tempfile.mkdtemp(prefix='rollups_test_'), 'rollups.db'))
+
+
+def day_row(rollups, dimension, key):
+    rows = rollups.daily(dimension, key)
+    assert len(rows) == 1, rows
+    return rows[0]
+
+
+class FakeAirtable:
+    """Rollups table in memory, matching upserts on the merge fields"""
+
+    def __init__(self, crash_after_write=False):
+        self.records = {}
+        self.crash_after_write = crash_after_write
+
+    def upsert_records(self, table, records, merge_on):
+        assert merge_on == AIRTABLE_MERGE_FIELDS
+        result = []
+        for fields in records:
+            key = tuple(fields[name] for name in merge_on)
+            record_id = self.records.get(key, {}).get('id', f'rec{len(self.records) + 1}')
+            self.records[key] = {'id': record_id, 'fields': fields}
+            result.append(self.records[key])
+        if self.crash_after_write:
+            self.crash_after_write = False
+            raise TimeoutError("response lost")
+        return result
+
+
+def test_files_touched_are_distinct_per_day():
+    rollups = new_rollups()
+    posts = [post('recPost1',
+                  commit('aaa', '2025-10-01T10:00:00Z', ['main.py', 'player.py']),
+                  commit('bbb', '2025-10-01T12:00:00Z', ['player.py']),
+                  commit('ccc', '2025-10-02T09:00:00Z', ['player.py']))]
+    assert rollups.record_posts(REPO, posts) == 3
+    rows = rollups.daily('repo', REPO)
+    assert [(row['day'], row['commits'], row['files_changed']) for row in rows] == [
+        ('2025-10-01', 2, 2), ('2025-10-02', 1, 1)
+    ], rows
+    assert rollups.daily('user', 'someone')[0]['files_changed'] == 2
+
+    # Re-analysis changes nothing; a corrected commit is recounted
+    assert rollups.record_posts(REPO, posts) == 0
+    posts = [post('recPost1',
+                  commit('aaa', '2025-10-01T10:00:00Z', ['main.py', 'player.py']),
+                  commit('bbb', '2025-10-01T12:00:00Z', ['enemy.py', 'level.py']),
+                  commit('ccc', '2025-10-02T09:00:00Z', ['player.py']))]
+    assert rollups.record_posts(REPO, posts) == 1
+    first_day = rollups.daily('repo', REPO)[0]
+    assert (first_day['commits'], first_day['files_changed']) == (2, 4), first_day
+
+    # The same path in another repo is another file for the user
+    rollups.record_posts('https://github.com/someone/other',
+                         [post('recPost2', commit('ddd', '2025-10-02T10:00:00Z', ['player.py']))])
+    assert rollups.daily('user', 'someone', since='2025-10-02')[0]['files_changed'] == 2
+    rollups.close()
+
+
+def test_mirror_upserts_after_lost_response():
+    rollups = new_rollups()
+    rollups.record_posts(REPO, [post('recPost1', commit('aaa', '2025-10-01T10:00:00Z', ['main.py']))])
+    airtable = FakeAirtable(crash_after_write=True)
+
+    # The rows reached Airtable but their ids weren't saved: sending them again must not duplicate them
+    assert rollups.mirror_to_airtable(airtable, table='Rollups') == 0
+    assert rollups.mirror_to_airtable(airtable, table='Rollups') == 3
+    assert len(airtable.records) == 3
+    assert rollups.mirror_to_airtable(airtable, table='Rollups') == 0
+
+    rollups.record_posts(REPO, [post('recPost1', commit('aaa', '2025-10-01T10:00:00Z', ['main.py']),
+                                     commit('bbb', '2025-10-01T11:00:00Z', ['player.py']))])
+    assert rollups.mirror_to_airtable(airtable, table='Rollups') == 3
+    assert len(airtable.records) == 3
+    assert airtable.records[('repo', REPO, '2025-10-01')]['fields']['FilesChanged'] == 2
+    rollups.close()
+
+
+if __name__ == '__main__':
+    for test in (test_files_touched_are_distinct_per_day, test_mirror_upserts_after_lost_response):
+        test()
+        print(f"✓ {test.__name__}")
@@ -123,7 +123,8 @@ import os
 import sys
 sys.path.insert(0, "{base_dir}")
 
-from main import clone_repo, get_commits_in_timerange, get_commit_changes
+from main import clone_repo, get_session_commit_changes
+from git_session import GitSession
 import tempfile
 import shutil
 
@@ -144,14 +145,15 @@ try:
         print("   ✗ Clone failed")
         sys.exit(1)
     
-    print("\\n2. Testing get_commits_in_timerange...")
-    commits = get_commits_in_timerange(repo_dir)
-    print(f"   ✓ Found {{len(commits)}} commits")
-    
-    if commits:
-        print("\\n3. Testing get_commit_changes...")
-        changes = get_commit_changes(repo_dir, commits[0]['hash'], test_url)
-        print(f"   ✓ Found {{len(changes)}} file changes")
+    with GitSession(repo_dir) as session:
+        print("\\n2. Testing GitSession.commits_in_timerange...")
+        commits = session.commits_in_timerange()
+        print(f"   ✓ Found {{len(commits)}} commits")
+        
+        if commits:
+            print("\\n3. Testing get_session_commit_changes...")
+            changes = get_session_commit_changes(session, commits[0]['hash'], test_url)
+            print(f"   ✓ Found {{len(changes)}} file changes")
     
     print("\\n✓ All git operations completed")
     
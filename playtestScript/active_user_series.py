@@ -0,0 +1,247 @@
+"""
+Active users for every day of the program, for several thresholds at once.
+
+check_active_users.py answers one question per run ("who logged H+ hours and
+enough posts in the last N days?") by listing posts and aggregating them
+again. This script lists the posts since the program start once, resolves
+their games in bulk, buckets each owner's posts into per-day hours and post
+counts, and turns those into rolling N-day sums in one pass per user. Every
+(window, hours threshold) combination is then answered for every day of the
+program in one pass, with the same rules as check_active_users.py (HoursSpent
++ TimeSpentOnAsset, and (N - 3) / 2 posts for one post every 48h with a 3-day
+grace period). Like check_active_users.py, which lists posts since midnight
+N days ago, an N-day window ending on day D counts the posts from D - N
+through D.
+
+The result is a compact per-user daily series, which can be saved as JSON and
+explored interactively:
+
+    python active_user_series.py --start 2025-09-01 --windows 7 14 --thresholds 10 20 30
+    📊 Query (days hours [date]): 14 25 2025-10-16
+"""
+import json
+import argparse
+from datetime import datetime, timedelta
+from airtable_mirror import parse_timestamp
+from check_active_users import (
+    fetch_all_posts, fetch_games_by_id, first_link, owner_from_game, post_hours, min_posts_required
+)
+
+DEFAULT_WINDOWS = [7, 14]
+DEFAULT_THRESHOLDS = [10, 20, 30]
+
+def combination_key(days, hours_threshold):
+    return f"{days}d/{hours_threshold:g}h"
+
+class ActivitySeries:
+    """Per-user daily hours and post counts over a date range
+
+    Attributes:
+        start: First day (date)
+        days: Every day from start to end (dates)
+        users: Owner details per email
+        hours: Hours logged per email and day index
+        posts: Posts per email and day index
+    """
+
+    def __init__(self, start, end):
+        self.start = start
+        self.days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        self.users = {}
+        self.hours = {}
+        self.posts = {}
+
+    def add_post(self, owner, day, hours):
+        index = (day - self.start).days
+        if index < 0 or index >= len(self.days):
+            return False
+        email = owner['email']
+        if email not in self.users:
+            self.users[email] = owner
+            self.hours[email] = [0.0] * len(self.days)
+            self.posts[email] = [0] * len(self.days)
+        self.hours[email][index] += hours
+        self.posts[email][index] += 1
+        return True
+
+    @classmethod
+    def build(cls, posts, games, start, end):
+        """Bucket posts into per-owner days
+
+        Args:
+            posts: Posts records (Game, HoursSpent, TimeSpentOnAsset, Created At)
+            games: Games Table (see check_active_users.fetch_games_by_id)
+            start: First day (date)
+            end: Last day (date)
+        """
+        series = cls(start, end)
+        for post in posts:
+            fields = post.get('fields', {})
+            game_record = games.first_linked(post, 'Game')
+            if not game_record:
+                continue
+            owner = owner_from_game(game_record)
+            created = parse_timestamp(fields.get('Created At') or post.get('createdTime'))
+            if not owner or created is None:
+                continue
+            series.add_post(owner, created.date(), post_hours(fields))
+        return series
+
+    def day_index(self, day):
+        return min(max((day - self.start).days, 0), len(self.days) - 1)
+
+    def rolling(self, values, window):
+        """Sum of values over the N-day window ending on each day (running sum, one pass)"""
+        span = window + 1
+        totals = []
+        running = 0
+        for i, value in enumerate(values):
+            running += value
+            if i >= span:
+                running -= values[i - span]
+            totals.append(running)
+        return totals
+
+    def evaluate(self, windows, thresholds):
+        """Who is active on which day, for every window and hours threshold
+
+        Returns:
+            dict: 'rolling' (per email and window: hours and posts series), 'active' (per email and
+                  combination: one '0'/'1' character per day) and 'counts' (per combination: number of
+                  active users per day)
+        """
+        rolling = {}
+        active = {}
+        counts = {combination_key(w, h): [0] * len(self.days) for w in windows for h in thresholds}
+        for email in self.users:
+            rolling[email] = {}
+            active[email] = {}
+            for window in windows:
+                hours = self.rolling(self.hours[email], window)
+                posts = self.rolling(self.posts[email], window)
+                rolling[email][str(window)] = {'hours': [round(h, 2) for h in hours], 'posts': posts}
+                min_posts = min_posts_required(window)
+                for threshold in thresholds:
+                    key = combination_key(window, threshold)
+                    flags = [h >= threshold and p >= min_posts for h, p in zip(hours, posts)]
+                    for i, flag in enumerate(flags):
+                        if flag:
+                            counts[key][i] += 1
+                    if any(flags):
+                        active[email][key] = ''.join('1' if flag else '0' for flag in flags)
+        return {'rolling': rolling, 'active': active, 'counts': counts}
+
+    def query(self, window, hours_threshold, day):
+        """Active users for one window, threshold and day, most hours first"""
+        index = self.day_index(day)
+        min_posts = min_posts_required(window)
+        results = []
+        for email, owner in self.users.items():
+            first_index = max(0, index - window)
+            hours = sum(self.hours[email][first_index:index + 1])
+            posts = sum(self.posts[email][first_index:index + 1])
+            if hours >= hours_threshold and posts >= min_posts:
+                results.append(dict(owner, hours=hours, post_count=posts))
+        results.sort(key=lambda u: u['hours'], reverse=True)
+        return results
+
+    def to_json(self, windows, thresholds):
+        evaluation = self.evaluate(windows, thresholds)
+        return {
+            'metadata': {
+                'generated_at': datetime.now().isoformat(),
+                'start_date': self.days[0].isoformat(),
+                'end_date': self.days[-1].isoformat(),
+                'windows': windows,
+                'hours_thresholds': thresholds,
+                'posting_requirement': 'One post every 48 hours with 3-day grace period',
+                'data_source': 'Posts table (HoursSpent + TimeSpentOnAsset)'
+            },
+            'days': [day.isoformat() for day in self.days],
+            'active_counts': evaluation['counts'],
+            'users': {
+                email: {
+                    **owner,
+                    'daily_hours': [round(h, 2) for h in self.hours[email]],
+                    'daily_posts': self.posts[email],
+                    'rolling': evaluation['rolling'][email],
+                    'active': evaluation['active'][email]
+                }
+                for email, owner in self.users.items()
+            }
+        }
+
+def load_series(start, end):
+    """List posts once and build the series for start..end"""
+    posts = fetch_all_posts(start.isoformat())
+    games = fetch_games_by_id(first_link(post.get('fields', {}).get('Game')) for post in posts
+                              if post.get('fields', {}).get('Game'))
+    series = ActivitySeries.build(posts, games, start, end)
+    print(f"📈 {len(series.users)} users over {len(series.days)} days")
+    return series
+
+def print_summary(series, windows, thresholds):
+    evaluation = series.evaluate(windows, thresholds)
+    last = series.days[-1].isoformat()
+    print(f"\n📊 Active users on {last} (and peak over the program):")
+    print("-" * 60)
+    for key, counts in evaluation['counts'].items():
+        peak = max(counts) if counts else 0
+        peak_day = series.days[counts.index(peak)].isoformat() if counts else last
+        print(f"   {key:>10}: {counts[-1]:4d} now, peak {peak:4d} on {peak_day}")
+
+def explore(series):
+    """Answer (days, hours, date) queries from the series until a blank line"""
+    print("\n🔎 Enter a window, hours threshold and optional date, e.g. '14 20 2025-10-16' (blank to quit)")
+    while True:
+        line = input("📊 Query (days hours [date]): ").strip()
+        if not line:
+            return
+        parts = line.split()
+        try:
+            window = int(parts[0])
+            hours_threshold = float(parts[1])
+            day = datetime.strptime(parts[2], '%Y-%m-%d').date() if len(parts) > 2 else series.days[-1]
+        except (IndexError, ValueError):
+            print("   ❌ Expected: days hours [YYYY-MM-DD]")
+            continue
+        users = series.query(window, hours_threshold, day)
+        print(f"   {len(users)} users with {hours_threshold:g}+ hours and {min_posts_required(window):.1f}+ posts "
+              f"in the {window} days up to {series.days[series.day_index(day)].isoformat()}")
+        for user in users:
+            name = f"{user['first_name']} {user['last_name']}".strip() or user['email']
+            print(f"   ✅ {name[:30]:<30} - {user['hours']:6.1f}h ({user['post_count']} posts) - {user['email']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Active users for every day of the program and several thresholds")
+    parser.add_argument('--start', default=(datetime.now() - timedelta(days=60)).strftime('%Y-%m-%d'),
+                        help="First day of the program (YYYY-MM-DD, default: 60 days ago)")
+    parser.add_argument('--end', default=datetime.now().strftime('%Y-%m-%d'), help="Last day (default: today)")
+    parser.add_argument('--windows', type=int, nargs='+', default=DEFAULT_WINDOWS, help="Window lengths in days")
+    parser.add_argument('--thresholds', type=float, nargs='+', default=DEFAULT_THRESHOLDS, help="Hours thresholds")
+    parser.add_argument('--output', help="Save the series to this JSON file")
+    parser.add_argument('--no-explore', action='store_true', help="Don't prompt for queries")
+    parser.add_argument('--from-mirror', action='store_true', help="Read from the local mirror (airtable_mirror.py)")
+    args = parser.parse_args()
+
+    print("🚀 Shiba Active Users Time Series")
+    print("=" * 60)
+    start = datetime.strptime(args.start, '%Y-%m-%d').date()
+    end = datetime.strptime(args.end, '%Y-%m-%d').date()
+    series = load_series(start, end)
+    print_summary(series, args.windows, args.thresholds)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(series.to_json(args.windows, args.thresholds), f)
+        print(f"\n💾 Series saved to: {args.output}")
+
+    if not args.no_explore:
+        try:
+            explore(series)
+        except (KeyboardInterrupt, EOFError):
+            print()
+    print(f"\n✅ Done!")
+
+if __name__ == "__main__":
+    main()
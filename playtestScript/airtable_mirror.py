@@ -0,0 +1,392 @@
+"""
+Incremental local SQLite mirror of the Airtable base.
+
+    python airtable_mirror.py                 # sync every mirrored table
+    python airtable_mirror.py --tables Posts  # sync some of them
+    python airtable_mirror.py --full          # force a full reconciliation
+
+Each sync only lists the records created or modified since the table's last
+sync (with some overlap for clock skew) and upserts them. Deletions can't be
+seen that way, so every MIRROR_RECONCILE_HOURS a table is listed in full
+instead and rows Airtable no longer has are dropped (tombstone
+reconciliation).
+
+Records keep their fields as JSON in `records`; linked-record fields (lists
+of record ids) are also normalized into the `links` join table, so joins run
+as SQL or indexed lookups.
+
+Scripts started with --from-mirror read through MirrorClient, which answers
+pages()/iterate()/get_all()/get() from the database (including simple
+filterByFormula expressions) and forwards writes to Airtable, applying their
+results to the mirror too.
+"""
+import os
+import re
+import sys
+import json
+import sqlite3
+import argparse
+import threading
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from airtable_client import AirtableClient
+from challenge_counts import utc_now, format_time, parse_time, modified_since_formula
+
+MIRROR_DB = os.getenv("MIRROR_DB", "airtable_mirror.sqlite3")
+MIRROR_RECONCILE_HOURS = float(os.getenv("MIRROR_RECONCILE_HOURS", 24))
+
+MIRRORED_TABLES = ['Users', 'Posts', 'Games', 'PlaytestTickets', 'Challenges']
+
+# Re-list a little before the last sync so clock skew between us and Airtable can't drop a change
+SYNC_OVERLAP_SECONDS = 300
+
+RECORD_ID = re.compile(r'^rec[A-Za-z0-9]{14}$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    tbl TEXT NOT NULL,
+    id TEXT NOT NULL,
+    created_time TEXT,
+    fields TEXT NOT NULL,
+    PRIMARY KEY (tbl, id)
+);
+CREATE TABLE IF NOT EXISTS links (
+    tbl TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    field TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    linked_id TEXT NOT NULL,
+    PRIMARY KEY (tbl, record_id, field, position)
+);
+CREATE INDEX IF NOT EXISTS links_by_linked ON links (linked_id, field);
+CREATE TABLE IF NOT EXISTS sync_state (
+    tbl TEXT PRIMARY KEY,
+    synced_at TEXT,
+    reconciled_at TEXT
+);
+"""
+
+def is_link_field(value):
+    return isinstance(value, list) and value and all(isinstance(v, str) and RECORD_ID.match(v) for v in value)
+
+class Mirror:
+    """SQLite database holding mirrored tables"""
+
+    def __init__(self, path=MIRROR_DB):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def upsert(self, table, records):
+        """Store records (Airtable {'id', 'createdTime', 'fields'} dicts) and their links"""
+        with self.lock, self.db:
+            for record in records:
+                fields = record.get('fields', {})
+                self.db.execute(
+                    "INSERT OR REPLACE INTO records (tbl, id, created_time, fields) VALUES (?, ?, ?, ?)",
+                    (table, record['id'], record.get('createdTime'), json.dumps(fields))
+                )
+                self.db.execute("DELETE FROM links WHERE tbl = ? AND record_id = ?", (table, record['id']))
+                self.db.executemany(
+                    "INSERT INTO links (tbl, record_id, field, position, linked_id) VALUES (?, ?, ?, ?, ?)",
+                    [(table, record['id'], name, position, linked_id)
+                     for name, value in fields.items() if is_link_field(value)
+                     for position, linked_id in enumerate(value)]
+                )
+
+    def delete(self, table, record_ids):
+        with self.lock, self.db:
+            for record_id in record_ids:
+                self.db.execute("DELETE FROM records WHERE tbl = ? AND id = ?", (table, record_id))
+                self.db.execute("DELETE FROM links WHERE tbl = ? AND record_id = ?", (table, record_id))
+
+    def keep_only(self, table, record_ids):
+        """Drop every row of table whose id isn't in record_ids; returns how many were dropped"""
+        with self.lock:
+            existing = {row[0] for row in self.db.execute("SELECT id FROM records WHERE tbl = ?", (table,))}
+        stale = existing - set(record_ids)
+        self.delete(table, stale)
+        return len(stale)
+
+    def state(self, table):
+        with self.lock:
+            row = self.db.execute("SELECT synced_at, reconciled_at FROM sync_state WHERE tbl = ?", (table,)).fetchone()
+        if not row:
+            return None, None
+        return (parse_time(row[0]) if row[0] else None, parse_time(row[1]) if row[1] else None)
+
+    def set_state(self, table, synced_at, reconciled_at):
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO sync_state (tbl, synced_at, reconciled_at) VALUES (?, ?, ?)",
+                (table, format_time(synced_at), format_time(reconciled_at) if reconciled_at else None)
+            )
+
+    def records(self, table):
+        """Every mirrored record of a table, as Airtable-style dicts"""
+        with self.lock:
+            rows = self.db.execute("SELECT id, created_time, fields FROM records WHERE tbl = ? ORDER BY rowid",
+                                   (table,)).fetchall()
+        return [{'id': record_id, 'createdTime': created_time, 'fields': json.loads(fields)}
+                for record_id, created_time, fields in rows]
+
+    def record(self, table, record_id):
+        with self.lock:
+            row = self.db.execute("SELECT created_time, fields FROM records WHERE tbl = ? AND id = ?",
+                                  (table, record_id)).fetchone()
+        if row is None:
+            return None
+        return {'id': record_id, 'createdTime': row[0], 'fields': json.loads(row[1])}
+
+    def linked_from(self, field, linked_id):
+        """(table, record id) of every record whose field links to linked_id"""
+        with self.lock:
+            return self.db.execute("SELECT tbl, record_id FROM links WHERE linked_id = ? AND field = ?",
+                                   (linked_id, field)).fetchall()
+
+    def count(self, table):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM records WHERE tbl = ?", (table,)).fetchone()[0]
+
+    def sync(self, airtable, table, full=False, reconcile_hours=MIRROR_RECONCILE_HOURS):
+        """Sync one table; a full listing (with tombstone cleanup) when forced, first, or due
+
+        Returns:
+            dict: mode, records listed and rows dropped
+        """
+        started = utc_now()
+        synced_at, reconciled_at = self.state(table)
+        if full or synced_at is None or reconciled_at is None or \
+                started - reconciled_at >= timedelta(hours=reconcile_hours):
+            records = airtable.get_all(table)
+            self.upsert(table, records)
+            dropped = self.keep_only(table, [record['id'] for record in records])
+            self.set_state(table, started, started)
+            return {'mode': 'full', 'listed': len(records), 'dropped': dropped}
+
+        since = synced_at - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+        records = airtable.get_all(table, filter_by_formula=modified_since_formula(since))
+        self.upsert(table, records)
+        self.set_state(table, started, reconciled_at)
+        return {'mode': 'incremental', 'listed': len(records), 'dropped': 0}
+
+def split_arguments(text):
+    """Top-level comma-separated arguments of a formula call"""
+    arguments, depth, quote, escaped, current = [], 0, None, False, ''
+    for char in text:
+        if escaped:
+            escaped = False
+        elif quote and char == '\\':
+            escaped = True
+        elif quote:
+            quote = None if char == quote else quote
+        elif char in "'\"":
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            arguments.append(current.strip())
+            current = ''
+            continue
+        current += char
+    arguments.append(current.strip())
+    return arguments
+
+def parse_timestamp(value):
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    # Compare naive and aware timestamps as UTC
+    return moment.replace(tzinfo=None) if moment.tzinfo is None else moment.replace(tzinfo=None) - moment.utcoffset()
+
+def unquote(value):
+    """Undo the escaping of a single-quoted formula string"""
+    return re.sub(r"\\(.)", r"\1", value)
+
+def formula_predicate(formula):
+    """Python predicate over a record for the filterByFormula subset the scripts use
+
+    Supports AND(...), OR(...), NOT(...), {Field}='value', {Field}!='value',
+    checkbox comparisons ({Field}=TRUE()), numeric comparisons ({Field}>0),
+    IS_AFTER/IS_BEFORE({Field}, 'timestamp'),
+    RECORD_ID()='rec...' and a bare {Field} (non-empty) - everything
+    airtable_query.py produces.
+    """
+    formula = formula.strip()
+    call = re.match(r'^(AND|OR|NOT|IS_AFTER|IS_BEFORE)\((.*)\)$', formula, re.S)
+    if call:
+        name, arguments = call.group(1), split_arguments(call.group(2))
+        if name in ('AND', 'OR', 'NOT'):
+            predicates = [formula_predicate(argument) for argument in arguments]
+            if name == 'AND':
+                return lambda record: all(p(record) for p in predicates)
+            if name == 'OR':
+                return lambda record: any(p(record) for p in predicates)
+            return lambda record: not predicates[0](record)
+        field = re.match(r"^\{(.+)\}$", arguments[0])
+        value = re.match(r"^'(.*)'$", arguments[1]) if len(arguments) == 2 else None
+        if not field or not value:
+            raise ValueError(f"Unsupported formula for the mirror: {formula}")
+        moment = parse_timestamp(unquote(value.group(1)))
+        after = name == 'IS_AFTER'
+        def compare(record):
+            field_moment = parse_timestamp(record['fields'].get(field.group(1)))
+            if field_moment is None:
+                return False
+            return field_moment > moment if after else field_moment < moment
+        return compare
+
+    record_id = re.match(r"^RECORD_ID\(\)\s*=\s*'(.*)'$", formula)
+    if record_id:
+        return lambda record: record['id'] == unquote(record_id.group(1))
+
+    comparison = re.match(r"^\{(.+?)\}\s*(!=|=)\s*'(.*)'$", formula, re.S)
+    if comparison:
+        name, operator, value = comparison.groups()
+        value = unquote(value)
+        def equals(record):
+            field_value = record['fields'].get(name, '')
+            if isinstance(field_value, list):
+                matched = value in [str(v) for v in field_value]
+            else:
+                matched = str(field_value if field_value is not None else '') == value
+            return matched if operator == '=' else not matched
+        return equals
+
+    boolean = re.match(r"^\{(.+?)\}\s*(!=|=)\s*(TRUE|FALSE)\(\)$", formula)
+    if boolean:
+        name, operator, value = boolean.groups()
+        expected = value == 'TRUE'
+        return lambda record: (bool(record['fields'].get(name)) == expected) == (operator == '=')
+
+    numeric = re.match(r"^\{(.+?)\}\s*(>=|<=|>|<|=|!=)\s*(-?[0-9.]+)$", formula)
+    if numeric:
+        name, operator, value = numeric.groups()
+        value = float(value)
+        def compare_number(record):
+            field_value = record['fields'].get(name)
+            if isinstance(field_value, list):
+                field_value = field_value[0] if field_value else None
+            try:
+                field_value = float(field_value or 0)
+            except (TypeError, ValueError):
+                return False
+            return {'>': field_value > value, '<': field_value < value, '>=': field_value >= value,
+                    '<=': field_value <= value, '=': field_value == value, '!=': field_value != value}[operator]
+        return compare_number
+
+    field = re.match(r"^\{(.+)\}$", formula)
+    if field:
+        return lambda record: bool(record['fields'].get(field.group(1)))
+    raise ValueError(f"Unsupported formula for the mirror: {formula}")
+
+class MirrorClient:
+    """AirtableClient stand-in that reads from the mirror and writes through to Airtable"""
+
+    def __init__(self, mirror, live=None):
+        self.mirror = mirror
+        self.live = live
+
+    def pages(self, table, fields=None, filter_by_formula=None, page_size=100, **params):
+        records = self.mirror.records(table)
+        if filter_by_formula:
+            predicate = formula_predicate(filter_by_formula)
+            records = [record for record in records if predicate(record)]
+        if params.get('maxRecords'):
+            records = records[:int(params['maxRecords'])]
+        if fields:
+            records = [dict(record, fields={name: record['fields'][name] for name in fields if name in record['fields']})
+                       for record in records]
+        for start in range(0, len(records), page_size):
+            yield records[start:start + page_size]
+        if not records:
+            yield []
+
+    def iterate(self, table, **kwargs):
+        for page in self.pages(table, **kwargs):
+            yield from page
+
+    def get_all(self, table, **kwargs):
+        return list(self.iterate(table, **kwargs))
+
+    def get(self, table, record_id):
+        record = self.mirror.record(table, record_id)
+        if record is None:
+            raise KeyError(f"{record_id} is not in the mirror of {table}")
+        return record
+
+    def _live(self):
+        if self.live is None:
+            raise RuntimeError("This mirror client is read-only")
+        return self.live
+
+    def create(self, table, fields, typecast=False, retry_writes=False):
+        return self.create_records(table, [fields], typecast=typecast, retry_writes=retry_writes)[0]
+
+    def create_records(self, table, records, typecast=False, retry_writes=False):
+        created = self._live().create_records(table, records, typecast=typecast, retry_writes=retry_writes)
+        self.mirror.upsert(table, created)
+        return created
+
+    def update(self, table, record_id, fields, typecast=False):
+        updated = self._live().update(table, record_id, fields, typecast=typecast)
+        self.mirror.upsert(table, [updated])
+        return updated
+
+    def update_records(self, table, updates, typecast=False):
+        updated = self._live().update_records(table, updates, typecast=typecast)
+        self.mirror.upsert(table, updated)
+        return updated
+
+    def delete_records(self, table, record_ids):
+        deleted = self._live().delete_records(table, record_ids)
+        self.mirror.delete(table, deleted)
+        return deleted
+
+def using_mirror(argv=None):
+    return '--from-mirror' in (sys.argv if argv is None else argv)
+
+def mirror_or_live(live, argv=None):
+    """A MirrorClient over MIRROR_DB when the script was started with --from-mirror, else the live client"""
+    if not using_mirror(argv):
+        return live
+    if not os.path.exists(MIRROR_DB):
+        print(f"⚠️  No mirror at {MIRROR_DB}; run 'python airtable_mirror.py' first")
+    print(f"🪞 Reading from the local mirror ({MIRROR_DB})")
+    return MirrorClient(Mirror(MIRROR_DB), live)
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync Airtable tables into a local SQLite mirror")
+    parser.add_argument('--tables', default=','.join(MIRRORED_TABLES), help="Comma-separated tables to sync")
+    parser.add_argument('--full', action='store_true', help="List every table in full and drop deleted records")
+    parser.add_argument('--db', default=MIRROR_DB, help="SQLite database file")
+    args = parser.parse_args()
+
+    load_dotenv()
+    airtable = AirtableClient(os.getenv("AIRTABLE_API_KEY"), os.getenv("AIRTABLE_BASE_ID"))
+    mirror = Mirror(args.db)
+
+    print(f"🪞 Syncing Airtable mirror at {args.db}")
+    print("=" * 60)
+    for table in [t.strip() for t in args.tables.split(',') if t.strip()]:
+        try:
+            result = mirror.sync(airtable, table, full=args.full)
+        except Exception as e:
+            print(f"❌ {table}: {e}")
+            continue
+        dropped = f", {result['dropped']} deleted records dropped" if result['dropped'] else ""
+        print(f"✅ {table}: {result['mode']} sync, {result['listed']} records listed{dropped} "
+              f"({mirror.count(table)} mirrored)")
+    mirror.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Declarative Airtable queries: which rows (filterByFormula) and which columns (fields[]).
+
+Scripts state what they need and only matching rows with the requested
+fields go over the wire, instead of every record with every field being
+filtered in Python:
+
+    COMPLETE_PLAYTESTS = Query('PlaytestTickets',
+                               fields=['GameToTest', 'Feedback', 'SSSAwarded'],
+                               where=equals('status', 'Complete'))
+    records = COMPLETE_PLAYTESTS.get_all(airtable)
+
+Predicates are plain formula strings, so they compose with all_of(),
+any_of() and negate(). fetch_by_ids() resolves many linked record ids at
+once, with chunked OR(RECORD_ID()=...) queries or one projected scan. They stay within the subset MirrorClient evaluates
+locally, so the same queries work with --from-mirror. Fields a table
+doesn't have (e.g. alternative spellings of a column) are dropped from the
+projection after Airtable reports them, rather than failing the listing.
+"""
+import re
+import json
+from datetime import datetime
+from airtable_client import AirtableError, PAGE_SIZE
+
+# Record ids per OR(RECORD_ID()=...) query; keeps the request URL well under Airtable's 16k limit
+RECORD_ID_CHUNK_SIZE = 50
+
+def field(name):
+    return "{" + name + "}"
+
+def literal(value):
+    """Formula literal for a Python value"""
+    if isinstance(value, bool):
+        return 'TRUE()' if value else 'FALSE()'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+def equals(name, value):
+    return f"{field(name)}={literal(value)}"
+
+def not_equals(name, value):
+    return f"{field(name)}!={literal(value)}"
+
+def greater_than(name, value):
+    return f"{field(name)}>{literal(value)}"
+
+def less_than(name, value):
+    return f"{field(name)}<{literal(value)}"
+
+def is_after(name, moment):
+    return f"IS_AFTER({field(name)}, {literal(moment)})"
+
+def is_before(name, moment):
+    return f"IS_BEFORE({field(name)}, {literal(moment)})"
+
+def not_empty(name):
+    return field(name)
+
+def all_of(*predicates):
+    predicates = [p for p in predicates if p]
+    if len(predicates) == 1:
+        return predicates[0]
+    return f"AND({', '.join(predicates)})" if predicates else None
+
+def any_of(*predicates):
+    predicates = [p for p in predicates if p]
+    if len(predicates) == 1:
+        return predicates[0]
+    return f"OR({', '.join(predicates)})" if predicates else None
+
+def negate(predicate):
+    return f"NOT({predicate})"
+
+def record_id_is(record_id):
+    return f"RECORD_ID()={literal(record_id)}"
+
+def unknown_field(error):
+    """The field name an UNKNOWN_FIELD_NAME error is about, or None"""
+    if not isinstance(error, AirtableError) or error.status_code != 422:
+        return None
+    try:
+        message = json.loads(error.body).get('error', {}).get('message', '')
+    except (ValueError, AttributeError):
+        message = str(error.body)
+    match = re.search(r'Unknown field name: "(.+)"', message)
+    return match.group(1) if match else None
+
+class Query:
+    """A table listing with a row filter and a column projection
+
+    Args:
+        table: Table name
+        fields: Columns to fetch (None for all)
+        where: filterByFormula predicate (None for every row)
+    """
+
+    def __init__(self, table, fields=None, where=None):
+        self.table = table
+        self.fields = list(fields) if fields else None
+        self.where = where
+
+    def params(self):
+        """Keyword arguments for AirtableClient.pages()/iterate()/get_all()"""
+        params = {}
+        if self.fields:
+            params['fields'] = self.fields
+        if self.where:
+            params['filter_by_formula'] = self.where
+        return params
+
+    def pages(self, airtable, **params):
+        """Yield pages of matching records; extra keyword arguments are passed to AirtableClient.pages()"""
+        while True:
+            started = False
+            try:
+                for page in airtable.pages(self.table, **self.params(), **params):
+                    started = True
+                    yield page
+                return
+            except AirtableError as e:
+                name = unknown_field(e)
+                # Only the first page can fail on the projection; retry without the missing column
+                if started or name is None or not self.fields or name not in self.fields:
+                    raise
+                print(f"   ℹ️  {self.table} has no field '{name}', not requesting it")
+                self.fields = [f for f in self.fields if f != name] or None
+
+    def iterate(self, airtable, **params):
+        for page in self.pages(airtable, **params):
+            yield from page
+
+    def get_all(self, airtable, **params):
+        return list(self.iterate(airtable, **params))
+
+    def __repr__(self):
+        return f"Query({self.table!r}, fields={self.fields!r}, where={self.where!r})"
+
+def fetch_by_ids(airtable, table, record_ids, fields=None, table_size=None):
+    """Fetch many records by id in as few requests as possible
+
+    Ids are looked up RECORD_ID_CHUNK_SIZE at a time with OR(RECORD_ID()=...)
+    queries. When table_size (an estimate of the table's record count) says
+    listing the whole table is fewer requests, one projected scan is used
+    instead and the ids are picked out locally.
+
+    Args:
+        airtable: AirtableClient (or MirrorClient)
+        table: Table name
+        record_ids: Record ids to resolve (duplicates and empty ids are ignored)
+        fields: Columns to fetch (None for all)
+        table_size: Approximate number of records in the table, if known
+
+    Returns:
+        dict: Record per id; ids that don't exist are missing
+    """
+    wanted = {record_id for record_id in record_ids if record_id}
+    if not wanted:
+        return {}
+    ids = sorted(wanted)
+    chunk_requests = -(-len(ids) // RECORD_ID_CHUNK_SIZE)
+    scan_requests = -(-table_size // PAGE_SIZE) if table_size else None
+
+    found = {}
+    if scan_requests is not None and scan_requests < chunk_requests:
+        for record in Query(table, fields=fields).iterate(airtable):
+            if record['id'] in wanted:
+                found[record['id']] = record
+        return found
+
+    for start in range(0, len(ids), RECORD_ID_CHUNK_SIZE):
+        chunk = ids[start:start + RECORD_ID_CHUNK_SIZE]
+        query = Query(table, fields=fields, where=any_of(*[record_id_is(record_id) for record_id in chunk]))
+        for record in query.iterate(airtable):
+            found[record['id']] = record
+    return found
@@ -0,0 +1,365 @@
+"""
+Playtest assignment engine.
+
+Treats assignment as a bipartite b-matching solved with max flow:
+
+    source -> player (capacity = tickets the player must play)
+    player -> game   (capacity 1: no duplicate pairs, never the player's own game)
+    game   -> sink   (capacity = playtests the game needs)
+
+The complete player x game graph is far too large at cohort scale, so each
+player starts with a handful of candidate games sampled in proportion to
+their remaining demand. If that sparse graph leaves slots unfilled, it is
+densified around the unmatched players and games and the flow is resumed;
+instances whose complete graph is small enough (DENSE_PAIR_LIMIT pairs) are
+finished on the complete graph, so their result is a maximum flow.
+A final pass moves assignments from fully served games to under-served ones
+(cancelling short negative cycles of the "unfilled share" cost), so any
+shortfall is spread evenly instead of landing on a few games.
+"""
+import heapq
+import random
+from collections import defaultdict, deque
+
+# Candidate games sampled per ticket a player has to play
+CANDIDATES_PER_TICKET = 3
+EXTRA_CANDIDATES = 4
+
+# Rounds of densifying the graph around unmatched players/games, and the
+# largest number of player x game pairs that is connected in full
+DENSIFY_ROUNDS = 3
+DENSE_PAIR_LIMIT = 200000
+
+
+def first(value, default=None):
+    """First element of an Airtable linked/lookup field, or the value itself."""
+    if isinstance(value, list):
+        return value[0] if value else default
+    return value if value is not None else default
+
+
+def eligible_from_records(records):
+    """Turn Active YSWS Record rows into the assignment input (TicketsNeeded > 0 only)."""
+    eligible = []
+    for record in records:
+        fields = record.get('fields', {})
+        tickets_needed = fields.get('TicketsNeeded', 0)
+        if tickets_needed > 0:
+            eligible.append({
+                'record_id': record.get('id'),
+                'user_id': first(fields.get('User')),
+                'game_id': first(fields.get('Game')),
+                'game_name': first(fields.get('Game Name'), 'Unknown'),
+                'email': fields.get('Email', 'Unknown'),
+                'tickets_needed': tickets_needed
+            })
+    return eligible
+
+
+class ExistingTickets:
+    """Hash index of the (player, game) pairs already in PlaytestTickets.
+
+    Lets a run plan only the tickets that are still missing: each player's
+    and game's TicketsNeeded is reduced by the tickets they already have, and
+    existing pairs are never proposed again.
+    """
+
+    def __init__(self):
+        self.pairs = set()
+        self.played = defaultdict(int)
+        self.tested = defaultdict(int)
+
+    @classmethod
+    def from_records(cls, records):
+        existing = cls()
+        for record in records:
+            fields = record.get('fields', {})
+            existing.add(first(fields.get('Player')), first(fields.get('GameToTest')))
+        return existing
+
+    def add(self, player_id, game_id):
+        if not player_id or not game_id or (player_id, game_id) in self.pairs:
+            return
+        self.pairs.add((player_id, game_id))
+        self.played[player_id] += 1
+        self.tested[game_id] += 1
+
+    def __contains__(self, pair):
+        return pair in self.pairs
+
+    def __len__(self):
+        return len(self.pairs)
+
+
+def remaining_slots(eligible, existing=None):
+    """Tickets each player still has to play and each game still needs, after existing tickets."""
+    supply = defaultdict(int)
+    demand = defaultdict(int)
+    for record in eligible:
+        if record['user_id'] is not None:
+            supply[record['user_id']] += record['tickets_needed']
+        if record['game_id'] is not None:
+            demand[record['game_id']] += record['tickets_needed']
+
+    if existing is not None:
+        for player in supply:
+            supply[player] = max(0, supply[player] - existing.played.get(player, 0))
+        for game in demand:
+            demand[game] = max(0, demand[game] - existing.tested.get(game, 0))
+
+    return ({player: n for player, n in supply.items() if n > 0},
+            {game: n for game, n in demand.items() if n > 0})
+
+
+class FlowNetwork:
+    """Adjacency-list flow network with Dinic's max flow (edges stored in flat lists)."""
+
+    def __init__(self, node_count):
+        self.graph = [[] for _ in range(node_count)]
+        self.to = []
+        self.cap = []
+
+    def add_edge(self, u, v, capacity):
+        edge = len(self.to)
+        self.to.extend((v, u))
+        self.cap.extend((capacity, 0))
+        self.graph[u].append(edge)
+        self.graph[v].append(edge + 1)
+        return edge
+
+    def _levels(self, source, sink):
+        level = [-1] * len(self.graph)
+        level[source] = 0
+        queue = deque([source])
+        while queue:
+            u = queue.popleft()
+            for edge in self.graph[u]:
+                v = self.to[edge]
+                if self.cap[edge] > 0 and level[v] < 0:
+                    level[v] = level[u] + 1
+                    queue.append(v)
+        return level if level[sink] >= 0 else None
+
+    def max_flow(self, source, sink):
+        """Push as much flow as possible on top of whatever flow is already in the network."""
+        graph, to, cap = self.graph, self.to, self.cap
+        total = 0
+        while True:
+            level = self._levels(source, sink)
+            if level is None:
+                return total
+            pointer = [0] * len(graph)
+
+            while True:
+                # Iterative DFS for one augmenting path in the level graph
+                path = []
+                u = source
+                while u != sink:
+                    edges = graph[u]
+                    advanced = False
+                    while pointer[u] < len(edges):
+                        edge = edges[pointer[u]]
+                        v = to[edge]
+                        if cap[edge] > 0 and level[v] == level[u] + 1:
+                            path.append(edge)
+                            u = v
+                            advanced = True
+                            break
+                        pointer[u] += 1
+                    if not advanced:
+                        if u == source:
+                            break
+                        # Dead end: retreat and skip the edge that led here
+                        level[u] = -1
+                        edge = path.pop()
+                        u = to[edge ^ 1]
+                        pointer[u] += 1
+                if u != sink:
+                    break
+
+                pushed = min(cap[edge] for edge in path)
+                for edge in path:
+                    cap[edge] -= pushed
+                    cap[edge ^ 1] += pushed
+                total += pushed
+
+
+def _sample_games(rng, game_slots, count):
+    """Sample up to `count` distinct game indices, weighted by their number of slots."""
+    picked = set()
+    if not game_slots:
+        return picked
+    for _ in range(count * 2):
+        picked.add(game_slots[rng.randrange(len(game_slots))])
+        if len(picked) >= count:
+            break
+    return picked
+
+
+def assign_flow(eligible, seed=None, existing=None):
+    """Assign players to games with max flow.
+
+    Args:
+        eligible: Records from eligible_from_records()
+        seed: Seed for candidate sampling (assignments are reproducible per seed)
+        existing: Optional ExistingTickets; only the still-missing tickets are planned
+
+    Returns:
+        list: Assignments with game_id, game_name, owner_email, player_email and player_user_id
+    """
+    rng = random.Random(seed)
+    existing_pairs = existing.pairs if existing is not None else set()
+
+    supply, demand = remaining_slots(eligible, existing)
+    player_email = {}
+    game_info = {}
+    owners = defaultdict(set)
+    for record in eligible:
+        game_id = record['game_id']
+        if game_id is not None:
+            owners[game_id].add(record['user_id'])
+            game_info.setdefault(game_id, {'game_name': record['game_name'], 'owner_email': record['email']})
+        if record['user_id'] is not None:
+            player_email.setdefault(record['user_id'], record['email'])
+
+    players = list(supply)
+    games = list(demand)
+    rng.shuffle(players)
+    rng.shuffle(games)
+    if not players or not games:
+        return []
+
+    player_count = len(players)
+    source = player_count + len(games)
+    sink = source + 1
+    network = FlowNetwork(sink + 1)
+    for p, player in enumerate(players):
+        network.add_edge(source, p, supply[player])
+    sink_edges = [network.add_edge(player_count + g, sink, demand[game]) for g, game in enumerate(games)]
+    source_edges = list(range(0, 2 * player_count, 2))
+
+    pair_edges = {}
+
+    def allowed(p, g):
+        player = players[p]
+        game = games[g]
+        return (p, g) not in pair_edges and player not in owners[game] and (player, game) not in existing_pairs
+
+    def connect(p, g):
+        pair_edges[(p, g)] = network.add_edge(p, player_count + g, 1)
+
+    # Sparse start: a few candidates per ticket, weighted towards games needing more playtests
+    game_slots = [g for g, game in enumerate(games) for _ in range(demand[game])]
+    for p, player in enumerate(players):
+        wanted = supply[player] * CANDIDATES_PER_TICKET + EXTRA_CANDIDATES
+        for g in _sample_games(rng, game_slots, wanted):
+            if allowed(p, g):
+                connect(p, g)
+
+    target = min(sum(supply.values()), sum(demand.values()))
+    flow = network.max_flow(source, sink)
+
+    # Densify around whatever is still unmatched and resume the flow
+    extra = EXTRA_CANDIDATES
+    for _ in range(DENSIFY_ROUNDS):
+        if flow >= target:
+            break
+        open_players = [p for p in range(player_count) if network.cap[source_edges[p]] > 0]
+        open_games = [g for g in range(len(games)) if network.cap[sink_edges[g]] > 0]
+        if not open_players or not open_games:
+            break
+
+        extra *= 4
+        # Open players to every game and every player to open games: augmenting paths may
+        # have to move a saturated player over to an open game
+        connect_all = (len(open_players) * len(games) + player_count * len(open_games)) <= DENSE_PAIR_LIMIT
+        for p in open_players:
+            if connect_all:
+                for g in range(len(games)):
+                    if allowed(p, g):
+                        connect(p, g)
+            for g in _sample_games(rng, game_slots, extra):
+                if allowed(p, g):
+                    connect(p, g)
+        for g in open_games:
+            if connect_all:
+                for p in range(player_count):
+                    if allowed(p, g):
+                        connect(p, g)
+            for p in rng.sample(range(player_count), min(player_count, extra)):
+                if allowed(p, g):
+                    connect(p, g)
+
+        added = network.max_flow(source, sink)
+        if not added:
+            break
+        flow += added
+
+    # Longer reroutes can pass through edges between two saturated nodes; when the complete
+    # graph is small enough, finish on it so the result is a maximum flow
+    if flow < target and player_count * len(games) <= DENSE_PAIR_LIMIT:
+        for p in range(player_count):
+            for g in range(len(games)):
+                if allowed(p, g):
+                    connect(p, g)
+        flow += network.max_flow(source, sink)
+
+    assigned = defaultdict(set)
+    for (p, g), edge in pair_edges.items():
+        if network.cap[edge] == 0:
+            assigned[g].add(p)
+
+    _rebalance(assigned, players, games, demand, owners, existing_pairs)
+
+    assignments = []
+    for g, assigned_players in assigned.items():
+        game = games[g]
+        for p in assigned_players:
+            assignments.append({
+                'game_id': game,
+                'game_name': game_info[game]['game_name'],
+                'owner_email': game_info[game]['owner_email'],
+                'player_email': player_email[players[p]],
+                'player_user_id': players[p]
+            })
+    rng.shuffle(assignments)
+    return assignments
+
+
+def _rebalance(assigned, players, games, demand, owners, existing_pairs):
+    """Move playtests from fully served games to under-served ones.
+
+    Each move keeps the assignment count and every player's load the same
+    but evens out how much of each game's demand is met.
+    """
+    under = [g for g in range(len(games)) if len(assigned[g]) < demand[games[g]]]
+    if not under:
+        return
+
+    def fill(g):
+        return len(assigned[g]) / demand[games[g]]
+
+    donors = [(-fill(g), g) for g in list(assigned) if assigned[g]]
+    heapq.heapify(donors)
+
+    for low in sorted(under, key=fill):
+        low_game = games[low]
+        skipped = []
+        while donors:
+            _, high = heapq.heappop(donors)
+            # Stop once moving one more playtest would no longer even things out
+            if (len(assigned[high]) - 1) / demand[games[high]] < (len(assigned[low]) + 1) / demand[low_game]:
+                skipped.append(high)
+                break
+            mover = next((p for p in assigned[high]
+                          if p not in assigned[low] and players[p] not in owners[low_game]
+                          and (players[p], low_game) not in existing_pairs), None)
+            if mover is None:
+                skipped.append(high)
+                continue
+            assigned[high].discard(mover)
+            assigned[low].add(mover)
+            if assigned[high]:
+                heapq.heappush(donors, (-fill(high), high))
+        for g in skipped:
+            heapq.heappush(donors, (-fill(g), g))
@@ -0,0 +1,188 @@
+"""
+Benchmark for the playtest assignment algorithms.
+
+Generates synthetic Active YSWS Record populations (skewed TicketsNeeded,
+participants without a linked user) and runs each algorithm quietly over
+several seeds in parallel worker processes. Reports solve time, unassigned
+slots, per-player load variance and the share of duplicate or self
+assignments. No Airtable access is needed.
+
+    python benchmark_assignment.py --sizes 1000,10000,100000 --seeds 5
+"""
+import time
+import json
+import random
+import argparse
+import statistics
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from assignment import eligible_from_records, assign_flow, remaining_slots, ExistingTickets
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_SEEDS = 5
+DEFAULT_ALGORITHMS = ['flow', 'greedy']
+
+# The greedy walk checks duplicates against every assignment made so far, so
+# it is quadratic; larger populations are skipped unless asked for.
+GREEDY_MAX_SIZE = 5000
+
+# TicketsNeeded ~ Pareto: most people need a few playtests, a few need many
+TICKETS_PARETO_ALPHA = 1.5
+MAX_TICKETS = 20
+MISSING_USER_RATE = 0.02
+NO_TICKETS_RATE = 0.1
+
+def generate_records(size, seed, missing_user_rate=MISSING_USER_RATE):
+    """Synthetic Active YSWS Record rows shaped like the Airtable API response"""
+    rng = random.Random(seed)
+    records = []
+    for i in range(size):
+        if rng.random() < NO_TICKETS_RATE:
+            tickets_needed = 0
+        else:
+            tickets_needed = min(MAX_TICKETS, int(rng.paretovariate(TICKETS_PARETO_ALPHA)))
+        fields = {
+            'TicketsNeeded': tickets_needed,
+            'Game': [f'recGame{i}'],
+            'Game Name': [f'Game {i}'],
+            'Email': f'player{i}@example.com'
+        }
+        if rng.random() >= missing_user_rate:
+            fields['User'] = [f'recUser{i}']
+        records.append({'id': f'recYsws{i}', 'fields': fields})
+    return records
+
+def run_algorithm(algorithm, records, existing, seed):
+    if algorithm == 'flow':
+        return assign_flow(eligible_from_records(records), seed=seed, existing=existing)
+    if algorithm == 'greedy':
+        # Imported here so worker processes only load main.py when it's benchmarked
+        from main import visualize_circular_assignment
+        return visualize_circular_assignment(
+            simulation_mode=True, records=records, existing=existing, quiet=True, seed=seed
+        )
+    raise ValueError(f"Unknown algorithm: {algorithm}")
+
+def measure(assignments, records, existing):
+    """Quality metrics for one assignment run"""
+    eligible = eligible_from_records(records)
+    supply, demand = remaining_slots(eligible, existing)
+    owners = {r['game_id']: r['user_id'] for r in eligible}
+
+    pairs = Counter((a['player_user_id'], a['game_id']) for a in assignments)
+    duplicates = sum(count - 1 for count in pairs.values())
+    self_assigned = sum(count for (player, game), count in pairs.items() if owners.get(game) == player)
+    existing_repeats = sum(count for pair, count in pairs.items() if pair in existing)
+
+    played = Counter(a['player_user_id'] for a in assignments)
+    tested = Counter(a['game_id'] for a in assignments)
+    loads = [played.get(player, 0) for player in supply]
+    over_assigned = sum(max(0, played[p] - supply.get(p, 0)) for p in played) + \
+        sum(max(0, tested[g] - demand.get(g, 0)) for g in tested)
+
+    total = len(assignments)
+    return {
+        'assignments': total,
+        'player_slots': sum(supply.values()),
+        'game_slots': sum(demand.values()),
+        'unassigned_player_slots': sum(max(0, n - played.get(p, 0)) for p, n in supply.items()),
+        'unassigned_game_slots': sum(max(0, n - tested.get(g, 0)) for g, n in demand.items()),
+        'load_variance': statistics.pvariance(loads) if loads else 0.0,
+        'duplicate_rate': (duplicates + self_assigned + existing_repeats) / total if total else 0.0,
+        'over_assigned': over_assigned
+    }
+
+def run_case(case):
+    """Worker entry point: generate one population, solve it and measure the result"""
+    algorithm, size, seed = case
+    records = generate_records(size, seed)
+    existing = ExistingTickets()
+
+    started = time.perf_counter()
+    assignments = run_algorithm(algorithm, records, existing, seed)
+    elapsed = time.perf_counter() - started
+
+    result = measure(assignments, records, existing)
+    result.update({'algorithm': algorithm, 'size': size, 'seed': seed, 'seconds': elapsed})
+    return result
+
+def summarize(results):
+    """Aggregate per (algorithm, size) over seeds"""
+    groups = {}
+    for result in results:
+        groups.setdefault((result['algorithm'], result['size']), []).append(result)
+
+    summary = []
+    for (algorithm, size), runs in sorted(groups.items(), key=lambda x: (x[0][1], x[0][0])):
+        summary.append({
+            'algorithm': algorithm,
+            'size': size,
+            'runs': len(runs),
+            'seconds_mean': statistics.mean(r['seconds'] for r in runs),
+            'seconds_max': max(r['seconds'] for r in runs),
+            'unassigned_game_slots_mean': statistics.mean(r['unassigned_game_slots'] for r in runs),
+            'unassigned_player_slots_mean': statistics.mean(r['unassigned_player_slots'] for r in runs),
+            'load_variance_mean': statistics.mean(r['load_variance'] for r in runs),
+            'duplicate_rate_max': max(r['duplicate_rate'] for r in runs),
+            'over_assigned_max': max(r['over_assigned'] for r in runs)
+        })
+    return summary
+
+def print_summary(summary):
+    print(f"\n📊 Assignment Benchmark Results:")
+    print("-" * 96)
+    print(f"{'algorithm':<8} {'size':>7} {'runs':>4} {'mean s':>8} {'max s':>8} "
+          f"{'unfilled games':>14} {'unfilled players':>16} {'load var':>9} {'dup rate':>9}")
+    for row in summary:
+        print(f"{row['algorithm']:<8} {row['size']:>7} {row['runs']:>4} "
+              f"{row['seconds_mean']:>8.2f} {row['seconds_max']:>8.2f} "
+              f"{row['unassigned_game_slots_mean']:>14.1f} {row['unassigned_player_slots_mean']:>16.1f} "
+              f"{row['load_variance_mean']:>9.3f} {row['duplicate_rate_max']:>9.4f}")
+        if row['over_assigned_max']:
+            print(f"    ⚠️  over-assigned slots: {row['over_assigned_max']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark playtest assignment on synthetic populations")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated participant counts")
+    parser.add_argument('--seeds', type=int, default=DEFAULT_SEEDS, help="Seeds (populations) per size")
+    parser.add_argument('--algorithms', default=','.join(DEFAULT_ALGORITHMS),
+                        help="Comma-separated algorithms: flow, greedy")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--greedy-max-size', type=int, default=GREEDY_MAX_SIZE,
+                        help="Skip greedy above this many participants")
+    parser.add_argument('--output', help="Also write per-run results and the summary to this JSON file")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    algorithms = [algorithm.strip() for algorithm in args.algorithms.split(',') if algorithm.strip()]
+
+    cases = []
+    for size in sizes:
+        for algorithm in algorithms:
+            if algorithm == 'greedy' and size > args.greedy_max_size:
+                print(f"⏭️  Skipping greedy at {size} participants (--greedy-max-size {args.greedy_max_size})")
+                continue
+            cases.extend((algorithm, size, seed) for seed in range(args.seeds))
+
+    print(f"🚀 Running {len(cases)} benchmark cases...")
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for result in executor.map(run_case, cases):
+            results.append(result)
+            print(f"  ✅ {result['algorithm']} size={result['size']} seed={result['seed']}: "
+                  f"{result['seconds']:.2f}s, {result['assignments']} assignments")
+    print(f"⏱️  Total wall time: {time.perf_counter() - started:.1f}s")
+
+    summary = summarize(results)
+    print_summary(summary)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'results': results, 'summary': summary}, f, indent=2)
+        print(f"\n💾 Results saved to: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Batched challenge generation.
+
+Sends several playtests of different games in one chat completion and asks
+for a JSON array with one challenge per playtest, so the long instruction
+preamble is paid once per batch instead of once per playtest. A batch never
+holds two playtests of the same game, so every challenge is generated with
+the game's earlier challenges in its prompt. Items whose answer is missing
+or malformed fall back to the single-playtest path, one at a time.
+"""
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from challenge_pool import chat_completion, CHALLENGE_WORKERS
+from llm_cache import challenge_cache
+from feedback_triage import triage
+
+# Playtests per request; 1 disables batching
+CHALLENGE_BATCH_SIZE = int(os.getenv("CHALLENGE_BATCH_SIZE", 4))
+
+# Bump whenever the batch prompt changes so cached batch completions aren't reused
+BATCH_PROMPT_VERSION = 2
+
+NO_CHALLENGE = "No challenge found"
+
+# Completion budget per item, on top of a little JSON overhead
+TOKENS_PER_ITEM = 80
+BATCH_TOKEN_OVERHEAD = 50
+
+MAX_CHALLENGE_LENGTH = 300
+
+def normalize_challenge(challenge):
+    """The challenge text, or "No challenge found" if the answer is too generic or says there is none"""
+    if (challenge.lower().startswith("no challenge") or
+        challenge.lower().startswith("no specific") or
+        len(challenge) < 20 or
+        "no challenge found" in challenge.lower()):
+        return NO_CHALLENGE
+    return challenge
+
+def format_scores(scores):
+    return (f"Fun={scores.get('fun_score', 'N/A')}, Art={scores.get('art_score', 'N/A')}, "
+            f"Creativity={scores.get('creativity_score', 'N/A')}, Audio={scores.get('audio_score', 'N/A')}, "
+            f"Mood={scores.get('mood_score', 'N/A')}")
+
+def playtest_item(playtest, game_id, existing_challenges=None):
+    """generate_in_batches() input for one playtest from get_complete_playtests()"""
+    return {
+        'game_id': game_id,
+        'feedback': playtest['feedback'],
+        'game_name': playtest['game_name'],
+        'scores': {
+            'fun_score': playtest['fun_score'],
+            'art_score': playtest['art_score'],
+            'creativity_score': playtest['creativity_score'],
+            'audio_score': playtest['audio_score'],
+            'mood_score': playtest['mood_score']
+        },
+        'existing_challenges': existing_challenges or []
+    }
+
+def build_batch_prompt(items):
+    """One prompt covering every item; items are dicts with feedback, game_name, scores and existing_challenges"""
+    sections = []
+    for i, item in enumerate(items, 1):
+        section = f"""### Playtest {i}
+Game: {item['game_name']}
+Scores: {format_scores(item['scores'])}
+
+Feedback:
+{item['feedback']}
+"""
+        if item.get('existing_challenges'):
+            section += "\nEXISTING CHALLENGES FOR THIS GAME (make sure the challenge is different):\n"
+            for n, challenge in enumerate(item['existing_challenges'], 1):
+                section += f"{n}. {challenge}\n"
+        sections.append(section)
+
+    playtests = "\n".join(sections)
+    return f"""
+You are a game development mentor. For EACH of the {len(items)} playtests below, generate ONE specific, actionable challenge that the game developer can implement to improve their game, based on that playtest's feedback.
+
+{playtests}
+Instructions (apply to every playtest):
+- Generate ONE specific, measurable, testable challenge that is achievable within 2 hours (but don't mention the time constraint in your response)
+- Start directly with the action (e.g., "Add...", "Implement...", "Fix...", "Create...")
+- Be concise and direct - no explanations or context
+- Make it specific with clear success criteria and realistic scope (e.g., "Add 3 visual cues", "Fix 2 audio bugs", "Add 1 new enemy type", "Create 1 new level")
+- Avoid vague concepts like "improve gameplay", "enhance creativity", "make it more fun" - focus on concrete features
+- If a playtest's feedback is too vague or doesn't contain actionable suggestions, use "No challenge found" for it
+- Keep each challenge under 20 words and make it directly address that playtest's feedback
+- IMPORTANT: Each challenge must be different from its game's existing challenges
+- DO NOT include time constraints like "within 2 hours" or "in 2 hours"
+
+Respond with ONLY a JSON array of exactly {len(items)} objects, in playtest order:
+[{{"playtest": 1, "challenge": "..."}}, ...]"""
+
+def parse_batch_response(text, count):
+    """Per-item raw challenge strings from the model's JSON answer (None where an item is missing or invalid)"""
+    text = text.strip()
+    if text.startswith("```"):
+        # Strip a Markdown code fence around the JSON
+        text = text.strip("`")
+        if text.startswith("json"):
+            text = text[4:]
+    start = text.find('[')
+    end = text.rfind(']')
+    results = [None] * count
+    if start < 0 or end < start:
+        return results
+    try:
+        answers = json.loads(text[start:end + 1])
+    except ValueError:
+        return results
+    if not isinstance(answers, list):
+        return results
+
+    for position, answer in enumerate(answers):
+        if isinstance(answer, dict):
+            index = answer.get('playtest', position + 1)
+            challenge = answer.get('challenge')
+        else:
+            index = position + 1
+            challenge = answer
+        if not isinstance(index, int) or not 1 <= index <= count:
+            continue
+        if isinstance(challenge, str) and challenge.strip() and len(challenge) <= MAX_CHALLENGE_LENGTH:
+            results[index - 1] = challenge.strip()
+    return results
+
+def request_batch(items, model):
+    """Raw per-item answers for one batch (cached like single completions)"""
+    cache_key = challenge_cache.key(model, 'batch', BATCH_PROMPT_VERSION, [
+        [item['feedback'], item['game_name'], item['scores'], item.get('existing_challenges') or []]
+        for item in items
+    ])
+    raw = challenge_cache.get(cache_key)
+    if raw is None:
+        response = chat_completion(
+            model=model,
+            messages=[
+                {"role": "system", "content": "You are a helpful game development mentor who creates specific, actionable challenges from playtest feedback. You answer in JSON."},
+                {"role": "user", "content": build_batch_prompt(items)}
+            ],
+            max_tokens=BATCH_TOKEN_OVERHEAD + TOKENS_PER_ITEM * len(items),
+            temperature=0.7
+        )
+        raw = response.choices[0].message.content
+        challenge_cache.set(cache_key, raw)
+    return parse_batch_response(raw, len(items))
+
+def game_key(item):
+    return item.get('game_id') or str(item['game_name'])
+
+def generate_in_batches(items, generate_single, model, batch_size=CHALLENGE_BATCH_SIZE, workers=CHALLENGE_WORKERS,
+                        log=print):
+    """
+    Generate one challenge per item, up to CHALLENGE_BATCH_SIZE items per request
+
+    Items are dicts with feedback, game_name, scores, existing_challenges
+    (the game's challenges before these items) and optionally game_id. A
+    request never holds two items of the same game: items go out in rounds
+    (every game's first item, then every game's second one, ...), and each
+    item's existing challenges include everything earlier rounds generated
+    for its game. The requests of one round are independent and run in
+    parallel. Items without a usable answer are retried one at a time with
+    generate_single(feedback, game_name, scores, existing_challenges=...).
+
+    Returns:
+        list: A challenge or "No challenge found" per item, in item order
+    """
+    # Feedback that triage predicts won't produce a challenge never reaches the model
+    checks = [triage.check(item['feedback']) for item in items]
+    results = [NO_CHALLENGE] * len(items)
+
+    # Items still to generate per game, in order
+    queues = {}
+    for i, (send, _, _) in enumerate(checks):
+        if send:
+            queues.setdefault(game_key(items[i]), []).append(i)
+
+    # Challenges generated in this call, per game
+    generated = {}
+
+    def run_batch(indices):
+        batch = []
+        for i in indices:
+            item = items[i]
+            existing = list(item.get('existing_challenges') or [])
+            existing += [c for c in generated.get(game_key(item), []) if c not in existing]
+            batch.append(dict(item, existing_challenges=existing))
+
+        answers = [None] * len(batch)
+        if len(batch) > 1:
+            try:
+                answers = request_batch(batch, model)
+            except Exception as e:
+                log(f"   ⚠️  Batch request failed, falling back to one request per playtest: {e}")
+
+        challenges = []
+        for item, answer in zip(batch, answers):
+            if answer is not None:
+                challenges.append(normalize_challenge(answer))
+            else:
+                challenges.append(generate_single(item['feedback'], item['game_name'], item['scores'],
+                                                  existing_challenges=item['existing_challenges']))
+        return challenges
+
+    size = max(1, batch_size)
+    for round_number in range(max((len(indices) for indices in queues.values()), default=0)):
+        round_items = [indices[round_number] for indices in queues.values() if round_number < len(indices)]
+        batches = [round_items[start:start + size] for start in range(0, len(round_items), size)]
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches)))) as executor:
+            answers = list(executor.map(run_batch, batches))
+
+        for indices, challenges in zip(batches, answers):
+            for i, challenge in zip(indices, challenges):
+                if challenge != NO_CHALLENGE:
+                    generated.setdefault(game_key(items[i]), []).append(challenge)
+                _, predicted_skip, score = checks[i]
+                triage.record(score, predicted_skip, challenge != NO_CHALLENGE)
+                results[i] = challenge
+    return results
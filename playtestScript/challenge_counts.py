@@ -0,0 +1,141 @@
+"""
+Maintained per-user challenge counters.
+
+Instead of listing the whole Challenges table on every run, the columns the
+challenge pipeline needs (recipientEmail, Status, Challenge, AssignedGame,
+FromPlaytest) are kept in CHALLENGE_COUNTS_FILE together with per-user status
+counts. Each sync only lists the challenges created or modified since the
+previous sync (minus a small overlap for clock skew; re-applying a record is
+harmless) and applies them as deltas, so "Not Submitted" per recipient is an
+O(1) lookup at startup.
+
+An incremental listing can't see deleted records, so every
+CHALLENGE_COUNTS_FULL_SCAN_HOURS the store is rebuilt from a full (projected)
+scan instead, which also reconciles any drift.
+"""
+import os
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+CHALLENGES_TABLE = 'Challenges'
+
+CHALLENGE_COUNTS_FILE = os.getenv("CHALLENGE_COUNTS_FILE", "challenge_counts.json")
+CHALLENGE_COUNTS_FULL_SCAN_HOURS = float(os.getenv("CHALLENGE_COUNTS_FULL_SCAN_HOURS", 24))
+
+# Re-list a little before the last sync so clock skew between us and Airtable can't drop a change
+SYNC_OVERLAP_SECONDS = 300
+
+# Bump when the stored format changes; a store of another version triggers a full scan
+STORE_VERSION = 1
+
+COUNTED_FIELDS = ['recipientEmail', 'Status', 'Challenge', 'AssignedGame', 'FromPlaytest']
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+def format_time(moment):
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+def parse_time(value):
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.000Z").replace(tzinfo=timezone.utc)
+
+def modified_since_formula(since):
+    """filterByFormula for records created or modified after since"""
+    moment = f"DATETIME_PARSE('{format_time(since)}')"
+    return f"OR(IS_AFTER(CREATED_TIME(), {moment}), IS_AFTER(LAST_MODIFIED_TIME(), {moment}))"
+
+class ChallengeCounts:
+    """Challenge columns and per-user status counts, kept up to date by sync()
+
+    Attributes:
+        records: Stored fields (COUNTED_FIELDS) per Challenges record id
+        user_counts: Challenge counts per recipient email and status
+        changed: Records listed by the last sync ({'id', 'fields'})
+        synced_at: Start of the last successful sync, or None
+        full_scan_at: Start of the last full scan, or None
+    """
+
+    def __init__(self, path=CHALLENGE_COUNTS_FILE, full_scan_hours=CHALLENGE_COUNTS_FULL_SCAN_HOURS):
+        self.path = path
+        self.full_scan_interval = timedelta(hours=full_scan_hours)
+        self.records = {}
+        self.user_counts = defaultdict(lambda: defaultdict(int))
+        self.changed = []
+        self.synced_at = None
+        self.full_scan_at = None
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not read challenge counts, doing a full scan: {e}")
+            return
+        if data.get('version') != STORE_VERSION:
+            return
+
+        for record_id, fields in data.get('records', {}).items():
+            self.apply(record_id, fields)
+        self.synced_at = parse_time(data['synced_at']) if data.get('synced_at') else None
+        self.full_scan_at = parse_time(data['full_scan_at']) if data.get('full_scan_at') else None
+
+    def save(self):
+        data = {
+            'version': STORE_VERSION,
+            'synced_at': format_time(self.synced_at) if self.synced_at else None,
+            'full_scan_at': format_time(self.full_scan_at) if self.full_scan_at else None,
+            'records': self.records
+        }
+        # Write to a temporary file first so a crash never leaves a half-written store
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def apply(self, record_id, fields):
+        """Replace a record's stored fields, moving its count from the old (email, status) to the new one"""
+        old = self.records.get(record_id)
+        if old is not None:
+            counts = self.user_counts[old.get('recipientEmail', 'Unknown')]
+            counts[old.get('Status', 'Unknown')] -= 1
+        fields = {name: fields[name] for name in COUNTED_FIELDS if name in fields}
+        self.records[record_id] = fields
+        self.user_counts[fields.get('recipientEmail', 'Unknown')][fields.get('Status', 'Unknown')] += 1
+
+    def full_scan_due(self, now=None):
+        now = now or utc_now()
+        return (self.synced_at is None or self.full_scan_at is None or
+                now - self.full_scan_at >= self.full_scan_interval)
+
+    def sync(self, airtable):
+        """Bring the store up to date (incrementally, or with a full scan when one is due) and save it
+
+        Returns:
+            list: Every stored challenge as an Airtable-style {'id', 'fields'} record
+        """
+        started = utc_now()
+        if self.full_scan_due(started):
+            records = airtable.get_all(CHALLENGES_TABLE, fields=COUNTED_FIELDS)
+            self.records = {}
+            self.user_counts.clear()
+            self.full_scan_at = started
+        else:
+            since = self.synced_at - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+            records = airtable.get_all(CHALLENGES_TABLE, fields=COUNTED_FIELDS,
+                                       filter_by_formula=modified_since_formula(since))
+        for record in records:
+            self.apply(record['id'], record.get('fields', {}))
+        self.changed = records
+        self.synced_at = started
+        self.save()
+        return self.challenge_records()
+
+    def challenge_records(self):
+        return [{'id': record_id, 'fields': fields} for record_id, fields in self.records.items()]
+
+    def not_submitted(self, user_email):
+        return self.user_counts.get(user_email, {}).get('Not Submitted', 0)
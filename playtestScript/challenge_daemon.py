@@ -0,0 +1,253 @@
+"""
+Long-running challenge generation.
+
+Instead of a batch run every so often, the daemon polls PlaytestTickets for
+tickets that turned Complete since its last poll (only those records are
+listed) and runs their games through the same pipeline as
+generateChallengesWithLimits.py: selection, the per-user limit, 4th-test reuse,
+batched generation and near-duplicate checks. A POST to the optional local
+webhook (e.g. from an Airtable automation through a tunnel) wakes it up
+immediately instead of waiting for the next poll.
+
+Progress is checkpointed in CHALLENGE_DAEMON_STATE_FILE after every cycle:
+the start of the last poll, the playtests already handled and the playtests
+to retry. Only playtests whose game finished are marked handled; those of a
+failed game are retried in the next cycle. A restart re-lists from the
+checkpoint (with some overlap), so nothing is skipped, and handled playtests
+or playtests that already have a challenge aren't generated again. Handled
+playtests are forgotten once they're older than the overlap, since no
+listing can return them any more.
+
+    python challenge_daemon.py --port 8787
+    curl -X POST localhost:8787/playtest-complete
+"""
+import os
+import json
+import argparse
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+import openai
+from airtable_client import AirtableClient
+from challenge_counts import ChallengeCounts, utc_now, format_time, parse_time
+from challenge_pipeline import (
+    Snapshot, ChallengePipeline, ChallengeQuota, parse_playtest, first, PLAYTEST_TICKETS_TABLE, PLAYTEST_FIELDS,
+    MAX_NOT_SUBMITTED_CHALLENGES
+)
+from airtable_query import Query, all_of, equals
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Environment Variables
+AIRTABLE_API_KEY = os.getenv("AIRTABLE_API_KEY")
+AIRTABLE_BASE_ID = os.getenv("AIRTABLE_BASE_ID")
+OPENAI_API_KEY = os.getenv("OPENAI")
+
+CHALLENGE_DAEMON_STATE_FILE = os.getenv("CHALLENGE_DAEMON_STATE_FILE", "challenge_daemon_state.json")
+CHALLENGE_DAEMON_POLL_SECONDS = float(os.getenv("CHALLENGE_DAEMON_POLL_SECONDS", 30))
+
+# Re-list a little before the checkpoint so clock skew between us and Airtable can't drop a playtest
+POLL_OVERLAP_SECONDS = 120
+
+# Wait before retrying after a failed cycle
+ERROR_BACKOFF_SECONDS = 60
+
+def completed_since(since):
+    """Tickets that are Complete and were modified after since"""
+    modified = f"IS_AFTER(LAST_MODIFIED_TIME(), DATETIME_PARSE('{format_time(since)}'))"
+    return Query(PLAYTEST_TICKETS_TABLE, fields=PLAYTEST_FIELDS, where=all_of(equals('status', 'Complete'), modified))
+
+class DaemonState:
+    """Checkpoint: start of the last poll, the playtests handled (with when) and the playtests to retry"""
+
+    def __init__(self, path=CHALLENGE_DAEMON_STATE_FILE):
+        self.path = path
+        self.since = None
+        self.handled = {}
+        self.retry = set()
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            self.since = parse_time(data['since']) if data.get('since') else None
+            handled = data.get('handled', {})
+            if isinstance(handled, list):
+                # Older checkpoints only kept the ids
+                handled = {record_id: data.get('since') for record_id in handled}
+            self.handled = {record_id: parse_time(moment) if moment else self.since
+                            for record_id, moment in handled.items()}
+            self.retry = set(data.get('retry', []))
+        except FileNotFoundError:
+            pass
+
+    def mark_handled(self, record_ids, moment):
+        for record_id in record_ids:
+            self.handled[record_id] = moment
+            self.retry.discard(record_id)
+
+    def prune(self):
+        """Forget handled playtests too old to be listed again (see POLL_OVERLAP_SECONDS)"""
+        if self.since is None:
+            return
+        cutoff = self.since - timedelta(seconds=POLL_OVERLAP_SECONDS)
+        self.handled = {record_id: moment for record_id, moment in self.handled.items()
+                        if moment is None or moment >= cutoff}
+
+    def save(self):
+        data = {
+            'since': format_time(self.since) if self.since else None,
+            'handled': {record_id: format_time(moment) if moment else None
+                        for record_id, moment in sorted(self.handled.items())},
+            'retry': sorted(self.retry)
+        }
+        # Write to a temporary file first so a crash never leaves a half-written checkpoint
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+class ChallengeDaemon:
+    def __init__(self, airtable, state, counts):
+        self.airtable = airtable
+        self.state = state
+        self.counts = counts
+        self.wake = threading.Event()
+        self.snapshot = None
+        self.pipeline = None
+
+    def start(self, backlog=False):
+        """Take the one full snapshot; with backlog, also process every pending playtest now"""
+        print("📊 Loading playtests and challenges...")
+        started = utc_now()
+        self.snapshot = Snapshot.fetch(self.airtable, counts=self.counts)
+        quota = ChallengeQuota(self.snapshot.user_counts, MAX_NOT_SUBMITTED_CHALLENGES)
+        self.pipeline = ChallengePipeline(self.airtable, self.snapshot, top_n=4, quota=quota, reuse_fourth=True)
+        print(f"📊 {len(self.snapshot.playtests)} complete playtests, {len(self.snapshot.pending)} without a challenge")
+
+        if self.state.since is None:
+            # First start: older playtests are the batch script's job unless asked for
+            if backlog:
+                pending = list(self.snapshot.pending)
+                failed = self.process_games([game_id for game_id, playtests in self.snapshot.by_game.items()
+                                             if playtests])
+                self.checkpoint(pending, failed, started)
+            self.state.since = started
+            self.state.save()
+
+    def poll(self):
+        """One cycle: list newly completed playtests, generate their games' challenges, checkpoint"""
+        started = utc_now()
+        since = self.state.since - timedelta(seconds=POLL_OVERLAP_SECONDS)
+        records = completed_since(since).get_all(self.airtable)
+
+        # Challenges created or submitted elsewhere since the last cycle
+        self.counts.sync(self.airtable)
+        for record in self.counts.changed:
+            self.snapshot.add_challenge(record)
+
+        new_playtests = {}
+        for record in records:
+            if record['id'] in self.state.handled:
+                continue
+            playtest = parse_playtest(record)
+            if not self.snapshot.add_playtest(playtest):
+                # Already in the startup snapshot
+                playtest = self.snapshot.by_playtest[record['id']]
+            if not playtest['has_existing_challenges']:
+                new_playtests[record['id']] = playtest
+
+        # Playtests of games that failed in an earlier cycle
+        for record_id in sorted(self.state.retry):
+            playtest = self.snapshot.by_playtest.get(record_id)
+            if playtest is None or playtest['has_existing_challenges']:
+                self.state.retry.discard(record_id)
+            else:
+                new_playtests.setdefault(record_id, playtest)
+
+        new_playtests = list(new_playtests.values())
+        failed = set()
+        if new_playtests:
+            print(f"\n🆕 {len(new_playtests)} newly completed playtests")
+            failed = self.process_games(sorted({first(p['game_to_test'], 'unknown') for p in new_playtests}))
+
+        self.checkpoint(new_playtests, failed, started)
+        self.state.since = started
+        self.state.prune()
+        self.state.save()
+        return len(new_playtests)
+
+    def checkpoint(self, playtests, failed, moment):
+        """Mark the playtests handled, except those of failed games, which are retried next cycle"""
+        retry = [p['record_id'] for p in playtests if first(p['game_to_test'], 'unknown') in failed]
+        self.state.mark_handled([p['record_id'] for p in playtests
+                                 if first(p['game_to_test'], 'unknown') not in failed], moment)
+        self.state.retry.update(retry)
+        if failed:
+            print(f"⚠️ {len(failed)} games failed, their {len(retry)} playtests will be retried next cycle")
+
+    def process_games(self, game_ids):
+        """Run the games through the pipeline and return the ids of the games that failed"""
+        games = {game_id: self.snapshot.by_game[game_id] for game_id in game_ids if self.snapshot.by_game.get(game_id)}
+        failed = set()
+        results = self.pipeline.process_games(games, failed=failed)
+        created = sum(r['challenges_generated'] for r in results)
+        skipped = sum(r['skipped_limit'] for r in results)
+        print(f"✅ {len(results)} games processed: {created} challenges created, {skipped} skipped due to user limit")
+        return failed
+
+    def run(self, poll_seconds=CHALLENGE_DAEMON_POLL_SECONDS, once=False):
+        while True:
+            try:
+                self.poll()
+                delay = poll_seconds
+            except Exception as e:
+                print(f"❌ Poll failed, retrying in {ERROR_BACKOFF_SECONDS}s: {e}")
+                delay = ERROR_BACKOFF_SECONDS
+            if once:
+                return
+            self.wake.wait(delay)
+            self.wake.clear()
+
+def serve_webhook(daemon, port):
+    """Local webhook; any POST wakes the daemon for an immediate poll"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            daemon.wake.set()
+            self.send_response(202)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🔔 Webhook listening on http://127.0.0.1:{port}/")
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate challenges as playtests complete")
+    parser.add_argument('--poll-seconds', type=float, default=CHALLENGE_DAEMON_POLL_SECONDS,
+                        help="Seconds between polls when the webhook isn't called")
+    parser.add_argument('--port', type=int, default=0, help="Local webhook port (default: no webhook)")
+    parser.add_argument('--backlog', action='store_true',
+                        help="On the very first start, also process playtests completed before it")
+    parser.add_argument('--once', action='store_true', help="Run a single poll and exit")
+    args = parser.parse_args()
+
+    print("🚀 Challenge Generation Daemon")
+    print("=" * 60)
+    openai.api_key = OPENAI_API_KEY
+    airtable = AirtableClient(AIRTABLE_API_KEY, AIRTABLE_BASE_ID)
+    daemon = ChallengeDaemon(airtable, DaemonState(), ChallengeCounts())
+    daemon.start(backlog=args.backlog)
+    if args.port:
+        serve_webhook(daemon, args.port)
+    try:
+        daemon.run(poll_seconds=args.poll_seconds, once=args.once)
+    except KeyboardInterrupt:
+        print("\n👋 Stopped; progress is checkpointed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,550 @@
+"""
+Challenge generation pipeline shared by generateChallenges.py and
+generateChallengesWithLimits.py.
+
+A run lists PlaytestTickets and Challenges exactly once, both at the same
+time (Challenges incrementally, through a ChallengeCounts store), into a
+Snapshot indexed by game, by owner email and by playtest. Every game then
+goes through the same stages:
+
+1. select  - the 5 most recent playtests, top N by SSS still earnable
+2. limit   - reserve the owner's "Not Submitted" slots (only with a quota)
+3. generate - one pass over all games: batched across games, cached and
+             triaged completions (challenge_batch.py)
+4. create  - near-duplicate check, then one Challenges record per challenge,
+             each game on a challenge_pool worker
+
+No stage goes back to Airtable for listings, so the number of listing passes
+doesn't grow with the number of games.
+"""
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from challenge_pool import chat_completion, run_games
+from llm_cache import challenge_cache
+from challenge_batch import generate_in_batches, normalize_challenge, playtest_item, NO_CHALLENGE
+from challenge_similarity import ChallengeIndex, TermWeights
+from challenge_counts import COUNTED_FIELDS
+from airtable_query import Query, equals
+
+PLAYTEST_TICKETS_TABLE = 'PlaytestTickets'
+CHALLENGES_TABLE = 'Challenges'
+
+# Bump CHALLENGE_PROMPT_VERSION whenever the prompt changes so cached completions aren't reused
+CHALLENGE_MODEL = "gpt-3.5-turbo"
+CHALLENGE_PROMPT_VERSION = 1
+
+MAX_SSS = 25
+
+# Selection: the most recent playtests of a game, of which the top N by SSS earnable are used
+RECENT_PLAYTESTS = 5
+
+# Playtests per game that get a newly generated challenge; a 4th one reuses the 3rd challenge
+GENERATED_PER_GAME = 3
+
+# 'Not Submitted' challenges a user may hold before they get no new ones
+MAX_NOT_SUBMITTED_CHALLENGES = 3
+
+# Columns parse_playtest() reads; nothing else is fetched
+PLAYTEST_FIELDS = [
+    'PlaytestId', 'GameToTest', 'Player', 'status', 'Feedback', 'Fun Score', 'Art Score', 'Creativity Score',
+    'Audio Score', 'Mood Score', 'SSSAwarded', 'Playtime Seconds', 'Created At', 'Game Name', 'PlayerEmail',
+    'ownerEmail', 'Challenges'
+]
+
+COMPLETE_PLAYTESTS = Query(PLAYTEST_TICKETS_TABLE, fields=PLAYTEST_FIELDS, where=equals('status', 'Complete'))
+ALL_CHALLENGES = Query(CHALLENGES_TABLE, fields=COUNTED_FIELDS)
+
+def generate_challenge_from_feedback(feedback, game_name, scores, existing_challenges=None):
+    """Generate a specific challenge from playtest feedback using OpenAI"""
+    if not feedback or not feedback.strip():
+        return NO_CHALLENGE
+
+    # Identical inputs (after a crash or while tuning limits) reuse the earlier completion
+    cache_key = challenge_cache.key(
+        CHALLENGE_MODEL, CHALLENGE_PROMPT_VERSION, feedback, game_name, scores, existing_challenges or []
+    )
+    cached = challenge_cache.get(cache_key)
+
+    # Prepare existing challenges context
+    existing_context = ""
+    if existing_challenges:
+        existing_context = f"\n\nEXISTING CHALLENGES FOR THIS GAME (make sure your challenge is different):\n"
+        for i, challenge in enumerate(existing_challenges, 1):
+            existing_context += f"{i}. {challenge}\n"
+
+    # Prepare the prompt
+    prompt = f"""
+You are a game development mentor. Based on the following playtest feedback, generate ONE specific, actionable challenge that the game developer can implement to improve their game.
+
+Game: {game_name}
+Scores: Fun={scores.get('fun_score', 'N/A')}, Art={scores.get('art_score', 'N/A')}, Creativity={scores.get('creativity_score', 'N/A')}, Audio={scores.get('audio_score', 'N/A')}, Mood={scores.get('mood_score', 'N/A')}
+
+Feedback:
+{feedback}{existing_context}
+
+Instructions:
+- Generate ONE specific, measurable, testable challenge that is achievable within 2 hours (but don't mention the time constraint in your response)
+- Start directly with the action (e.g., "Add...", "Implement...", "Fix...", "Create...")
+- Be concise and direct - no explanations or context
+- The challenge must be something concrete the developer can implement AND easily verify completion
+- Make it specific with clear success criteria and realistic scope (e.g., "Add 3 visual cues", "Fix 2 audio bugs", "Add 1 new enemy type", "Create 1 new level")
+- Avoid vague concepts like "improve gameplay", "enhance creativity", "make it more fun" - focus on concrete features
+- If the feedback is too vague or doesn't contain actionable suggestions, respond with "No challenge found"
+- Keep it under 20 words
+- Make it something that directly addresses the feedback given
+- IMPORTANT: Make sure your challenge is different from any existing challenges listed above
+- CRITICAL: The challenge must be measurable/testable and achievable within 2 hours - someone should be able to clearly determine if it's completed
+- DO NOT include time constraints like "within 2 hours" or "in 2 hours" in your final challenge response
+
+Challenge:"""
+
+    try:
+        if cached is not None:
+            challenge = cached
+        else:
+            response = chat_completion(
+                model=CHALLENGE_MODEL,
+                messages=[
+                    {"role": "system", "content": "You are a helpful game development mentor who creates specific, actionable challenges from playtest feedback."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=200,
+                temperature=0.7
+            )
+
+            challenge = response.choices[0].message.content.strip()
+            challenge_cache.set(cache_key, challenge)
+
+        # If the response is too generic or indicates no challenge, return "No challenge found"
+        return normalize_challenge(challenge)
+
+    except Exception as e:
+        print(f"Error generating challenge: {e}")
+        return NO_CHALLENGE
+
+def calculate_sss_earnable(sss_awarded):
+    """Calculate how much SSS can still be earned (up to 25 - current SSS)"""
+    try:
+        current_sss = int(sss_awarded) if sss_awarded else 0
+        return max(0, MAX_SSS - current_sss)
+    except (ValueError, TypeError):
+        return 0
+
+def parse_playtest(record):
+    """Playtest dict used by the pipeline stages for one PlaytestTickets record"""
+    fields = record.get('fields', {})
+    return {
+        'record_id': record.get('id'),
+        'playtest_id': fields.get('PlaytestId', 'Unknown'),
+        'game_to_test': fields.get('GameToTest', []),
+        'player': fields.get('Player', []),
+        'status': fields.get('status', ''),
+        'feedback': fields.get('Feedback', ''),
+        'fun_score': fields.get('Fun Score', ''),
+        'art_score': fields.get('Art Score', ''),
+        'creativity_score': fields.get('Creativity Score', ''),
+        'audio_score': fields.get('Audio Score', ''),
+        'mood_score': fields.get('Mood Score', ''),
+        'sss_awarded': fields.get('SSSAwarded', ''),
+        'playtime_seconds': fields.get('Playtime Seconds', ''),
+        'created_time': fields.get('Created At', ''),
+        'game_name': fields.get('Game Name', []),
+        'player_email': fields.get('PlayerEmail', []),
+        'owner_email': fields.get('ownerEmail', []),
+        'has_existing_challenges': bool(fields.get('Challenges'))
+    }
+
+def first(values, default="Unknown"):
+    """First item of a linked-record / lookup field"""
+    return values[0] if values else default
+
+class Snapshot:
+    """One listing of PlaytestTickets and Challenges, with the indexes the stages need
+
+    The indexes are kept up to date as challenges get created (and, in the
+    daemon, as playtests complete), so a long-running process never has to
+    list the tables again.
+
+    Attributes:
+        total_playtests: Number of PlaytestTickets records listed (only Complete ones when fetched)
+        playtests: Complete playtests (parse_playtest() dicts)
+        by_game: Complete playtests that still need a challenge, per game id
+        by_owner: Complete playtests per owner email
+        by_playtest: Complete playtests per PlaytestTickets record id
+        challenges: Raw Challenges records
+        challenges_by_game: Existing challenge texts per game id
+        challenge_weights: TermWeights over every existing challenge text, for near-duplicate checks
+        challenges_by_playtest: Challenge record ids per FromPlaytest record id
+        user_counts: Challenge counts per recipient email and status
+    """
+
+    def __init__(self, playtest_records, challenge_records, counts=None):
+        self.total_playtests = len(playtest_records)
+        self.counts = counts
+        self.lock = threading.Lock()
+
+        self.playtests = []
+        self.by_game = defaultdict(list)
+        self.by_owner = defaultdict(list)
+        self.by_playtest = {}
+        self.challenges = []
+        self.challenge_ids = set()
+        self.challenges_by_game = defaultdict(list)
+        self.challenge_weights = TermWeights()
+        self.challenges_by_playtest = defaultdict(list)
+        # Counts maintained by a ChallengeCounts store are used as they are
+        self.user_counts = defaultdict(lambda: defaultdict(int)) if counts is None else counts.user_counts
+
+        # Challenges first, so playtests that already have one aren't queued
+        for record in challenge_records:
+            self.add_challenge(record)
+        for record in playtest_records:
+            if record.get('fields', {}).get('status', '') == 'Complete':
+                self.add_playtest(parse_playtest(record))
+
+    @classmethod
+    def fetch(cls, airtable, counts=None):
+        """List both tables concurrently (one listing pass each); raises if either listing fails
+
+        With a ChallengeCounts store, Challenges is synced incrementally instead of listed in full.
+        """
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            playtests = executor.submit(COMPLETE_PLAYTESTS.get_all, airtable)
+            if counts is None:
+                challenges = executor.submit(ALL_CHALLENGES.get_all, airtable)
+                return cls(playtests.result(), challenges.result())
+            challenges = executor.submit(counts.sync, airtable)
+            return cls(playtests.result(), challenges.result(), counts=counts)
+
+    def add_playtest(self, playtest):
+        """Index a complete playtest; returns False if it's already known"""
+        with self.lock:
+            if playtest['record_id'] in self.by_playtest:
+                return False
+            # The Challenges link on the ticket can lag behind records created by another run
+            if playtest['record_id'] in self.challenges_by_playtest:
+                playtest['has_existing_challenges'] = True
+            self.playtests.append(playtest)
+            self.by_playtest[playtest['record_id']] = playtest
+            self.by_owner[first(playtest['owner_email'])].append(playtest)
+            if not playtest['has_existing_challenges']:
+                self.by_game[first(playtest['game_to_test'], 'unknown')].append(playtest)
+            return True
+
+    def add_challenge(self, record):
+        """Index a Challenges record (listed, synced or just created); known records only update the counts"""
+        fields = record.get('fields', {})
+        with self.lock:
+            if self.counts is not None:
+                # The store moves the count of a changed record instead of adding it twice
+                self.counts.apply(record['id'], fields)
+            elif record.get('id') not in self.challenge_ids:
+                self.user_counts[fields.get('recipientEmail', 'Unknown')][fields.get('Status', 'Unknown')] += 1
+            if record.get('id') in self.challenge_ids:
+                return
+            self.challenge_ids.add(record.get('id'))
+            self.challenges.append(record)
+
+            text = fields.get('Challenge')
+            if text:
+                self.challenge_weights.add(text)
+                for game_id in fields.get('AssignedGame', []):
+                    self.challenges_by_game[game_id].append(text)
+            for playtest_record_id in fields.get('FromPlaytest', []):
+                self.challenges_by_playtest[playtest_record_id].append(record.get('id'))
+                # The playtest no longer needs a challenge
+                playtest = self.by_playtest.get(playtest_record_id)
+                if playtest is not None and not playtest['has_existing_challenges']:
+                    playtest['has_existing_challenges'] = True
+                    game_playtests = self.by_game.get(first(playtest['game_to_test'], 'unknown'), [])
+                    if playtest in game_playtests:
+                        game_playtests.remove(playtest)
+
+    @property
+    def pending(self):
+        """Complete playtests without a challenge yet"""
+        return [p for playtest_list in self.by_game.values() for p in playtest_list]
+
+def can_user_receive_challenge(user_email, user_counts, limit, reserved=0):
+    """Check if a user can receive a new challenge (not exceeding the limit)"""
+    not_submitted_count = user_counts.get(user_email, {}).get('Not Submitted', 0) + reserved
+    return not_submitted_count < limit
+
+class ChallengeQuota:
+    """Per-user 'Not Submitted' counts shared by the parallel game workers
+
+    A slot is reserved before the challenge is generated and released again if
+    no challenge gets created, so two games owned by the same user can't both
+    pass the limit check while their challenges are still being generated.
+    Once the record exists it's counted in user_counts (Snapshot.add_challenge)
+    and the reservation is committed.
+    """
+
+    def __init__(self, user_counts, limit):
+        self.user_counts = user_counts
+        self.limit = limit
+        self.reserved = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def can_receive(self, user_email):
+        with self.lock:
+            return can_user_receive_challenge(user_email, self.user_counts, self.limit, self.reserved[user_email])
+
+    def reserve(self, user_email):
+        with self.lock:
+            if not can_user_receive_challenge(user_email, self.user_counts, self.limit, self.reserved[user_email]):
+                return False
+            self.reserved[user_email] += 1
+            return True
+
+    def release(self, user_email):
+        with self.lock:
+            self.reserved[user_email] -= 1
+
+    def commit(self, user_email):
+        """The reserved challenge was created and is now in user_counts"""
+        self.release(user_email)
+
+class ChallengePipeline:
+    """Selection, limit, generation and record creation stages over a Snapshot
+
+    Args:
+        airtable: AirtableClient used to create Challenges records
+        snapshot: Snapshot of the run
+        top_n: Playtests per game kept by the selection stage
+        quota: ChallengeQuota enforcing the per-user limit, or None for no limit
+        reuse_fourth: Whether a 4th selected playtest reuses the 3rd challenge
+    """
+
+    def __init__(self, airtable, snapshot, top_n=GENERATED_PER_GAME, quota=None, reuse_fourth=False):
+        self.airtable = airtable
+        self.snapshot = snapshot
+        self.top_n = top_n
+        self.quota = quota
+        self.reuse_fourth = reuse_fourth
+
+    def select(self, game_playtests):
+        """The 5 most recent playtests, then the top N by SSS earnable"""
+        recent = sorted(game_playtests, key=lambda p: p.get('created_time', ''), reverse=True)[:RECENT_PLAYTESTS]
+        recent.sort(key=lambda p: calculate_sss_earnable(p['sss_awarded']), reverse=True)
+        return recent[:self.top_n]
+
+    def reserve(self, owner_email, count):
+        """One flag per playtest: whether the owner's slot is reserved (always True without a quota)"""
+        if self.quota is None:
+            return [True] * count
+        return [self.quota.reserve(owner_email) for _ in range(count)]
+
+    def release(self, owner_email):
+        if self.quota is not None:
+            self.quota.release(owner_email)
+
+    def commit(self, owner_email):
+        if self.quota is not None:
+            self.quota.commit(owner_email)
+
+    def prepare(self, game_id, game_playtests):
+        """Selection and limit stages for one game: the selected playtests and the owner's reserved slots"""
+        selected = self.select(game_playtests)
+        owner_email = first(game_playtests[0]['owner_email'])
+        regular_playtests = selected[:GENERATED_PER_GAME]
+        reserved = self.reserve(owner_email, len(regular_playtests))
+        return {
+            'game_id': game_id,
+            'game_playtests': game_playtests,
+            'selected': selected,
+            'owner_email': owner_email,
+            'reserved': reserved,
+            'to_generate': [p for p, ok in zip(regular_playtests, reserved) if ok],
+            # Slots still held; finish() commits or releases them
+            'held': sum(reserved)
+        }
+
+    def settle(self, plan, created):
+        """One of the plan's held slots: committed if its challenge was created, otherwise released"""
+        plan['held'] -= 1
+        if created:
+            self.commit(plan['owner_email'])
+        else:
+            self.release(plan['owner_email'])
+
+    def release_plan(self, plan):
+        """Give back every slot the plan still holds"""
+        while plan['held'] > 0:
+            self.settle(plan, False)
+
+    def generate(self, plans, log=print):
+        """Challenges for the reserved playtests of every planned game, per PlaytestTickets record id
+
+        Each playtest's prompt lists its game's existing challenges; generate_in_batches never
+        puts two playtests of one game in a request, so later ones also see the earlier ones.
+        """
+        items = []
+        record_ids = []
+        for plan in plans:
+            existing = list(self.snapshot.challenges_by_game.get(plan['game_id'], []))
+            for playtest in plan['to_generate']:
+                items.append(playtest_item(playtest, plan['game_id'], existing))
+                record_ids.append(playtest['record_id'])
+        challenges = generate_in_batches(items, generate_challenge_from_feedback, CHALLENGE_MODEL, log=log)
+        return dict(zip(record_ids, challenges))
+
+    def create(self, playtest, challenge, log=print):
+        """Create the Challenges record for a playtest; returns the record id or None"""
+        challenge_record_data = {
+            "recipientEmail": first(playtest['owner_email']),
+            "Challenge": challenge,
+            "Earnable SSS": calculate_sss_earnable(playtest['sss_awarded']),
+            "AssignedGame": playtest['game_to_test'],  # This is a list of game IDs
+            "Status": "Not Submitted",
+            "SSS Earned": 0,
+            "FromPlaytest": [playtest['record_id']]  # Link to the original PlaytestTicket record
+        }
+        log(f"📝 Creating challenge record in '{CHALLENGES_TABLE}' table...")
+        try:
+            response = self.airtable.create(CHALLENGES_TABLE, challenge_record_data)
+            if response and response.get('id'):
+                log(f"✅ Challenge record created: {response['id']}")
+                self.snapshot.add_challenge({'id': response['id'], 'fields': challenge_record_data})
+                return response['id']
+            else:
+                log(f"❌ Failed to create challenge record: {response}")
+                return None
+        except Exception as e:
+            log(f"🚨 Error creating challenge record: {e}")
+            return None
+
+    def _limit_message(self, owner_email):
+        return f"   ⚠️  User {owner_email} already has {self.quota.limit} 'Not Submitted' challenges - skipping"
+
+    def finish(self, plan, challenges, game_index, game_count, log=print):
+        """Near-duplicate check and record creation for one prepared game, in order"""
+        game_id = plan['game_id']
+        game_playtests = plan['game_playtests']
+        limited_playtests = plan['selected']
+        reserved = plan['reserved']
+        owner_email = plan['owner_email']
+
+        game_name = first(game_playtests[0]['game_name'])
+        log(f"\n🎮 Game #{game_index}/{game_count}: {game_name}")
+        log(f"   Playtests for this game: {len(game_playtests)}")
+        log("-" * 50)
+        log(f"   Processing {len(limited_playtests)} playtests (top {self.top_n} by SSS earnable "
+            f"from {RECENT_PLAYTESTS} most recent)")
+
+        counts = {'challenges_generated': 0, 'reused_4th_test': 0, 'skipped_limit': 0, 'no_challenge': 0,
+                  'duplicates': 0, 'create_errors': 0}
+
+        # Challenges generated so far for this game; those already in Airtable count for near-duplicate checks
+        game_challenges = []
+        similar_challenges = ChallengeIndex(self.snapshot.challenges_by_game.get(game_id, []),
+                                            weights=self.snapshot.challenge_weights)
+
+        try:
+            for playtest_index, playtest in enumerate(limited_playtests, 1):
+                log(f"\n   📝 Playtest #{playtest_index}/{len(limited_playtests)}")
+                log(f"   Player: {first(playtest['player_email'])}")
+                log(f"   Created: {playtest.get('created_time', 'Unknown')}")
+                log(f"   SSS Earnable: {calculate_sss_earnable(playtest['sss_awarded'])} "
+                    f"(from {playtest['sss_awarded']} awarded)")
+
+                # Special handling for 4th test - reuse 3rd test without creating new record
+                if playtest_index > GENERATED_PER_GAME:
+                    if not self.reuse_fourth:
+                        continue
+                    if self.quota is not None and not self.quota.can_receive(owner_email):
+                        log(self._limit_message(owner_email))
+                        counts['skipped_limit'] += 1
+                        continue
+                    log(f"   🔄 4th test detected - reusing 3rd test challenge without creating new record")
+                    if len(game_challenges) >= 3:
+                        log(f"   📋 Reusing 3rd challenge: {game_challenges[2]}")
+                        counts['reused_4th_test'] += 1
+                    else:
+                        log(f"   ⚠️  No 3rd challenge available to reuse")
+                    continue
+
+                if not reserved[playtest_index - 1]:
+                    log(self._limit_message(owner_email))
+                    counts['skipped_limit'] += 1
+                    continue
+
+                challenge = challenges[playtest['record_id']]
+                log(f"   Challenge: {challenge}")
+
+                if challenge == NO_CHALLENGE:
+                    self.settle(plan, False)
+                    counts['no_challenge'] += 1
+                    continue
+
+                # Reject near-duplicates of the game's challenges before creating a record
+                duplicate = similar_challenges.find_duplicate(challenge)
+                if duplicate:
+                    log(f"   ♻️  Near-duplicate of \"{duplicate[0]}\" ({duplicate[1]:.0%} similar) - skipping")
+                    self.settle(plan, False)
+                    counts['duplicates'] += 1
+                    continue
+
+                # Give the slot back if the record couldn't be created
+                created = self.create(playtest, challenge, log=log) is not None
+                self.settle(plan, created)
+                if created:
+                    game_challenges.append(challenge)
+                    similar_challenges.add(challenge)
+                    counts['challenges_generated'] += 1
+                else:
+                    counts['create_errors'] += 1
+        finally:
+            self.release_plan(plan)
+
+        log(f"   ✅ Completed game: {game_name} ({len(game_challenges)} challenges generated)")
+        return counts
+
+    def process_game(self, game_index, game_count, game_id, game_playtests, log=print):
+        """Run one game through every stage on its own"""
+        plan = self.prepare(game_id, game_playtests)
+        try:
+            challenges = self.generate([plan], log=log)
+        except Exception:
+            self.release_plan(plan)
+            raise
+        return self.finish(plan, challenges, game_index, game_count, log=log)
+
+    def process_games(self, games, failed=None):
+        """Selection and limits for every game, one generation pass batched across them, then each
+        game's records on the challenge_pool workers
+
+        Args:
+            games: Playtests per game id
+            failed: Optional set that receives the ids of games that raised or had a record that
+                couldn't be created
+
+        Returns:
+            list: process_game()-style counts per finished game
+        """
+        plans = {game_id: self.prepare(game_id, playtests) for game_id, playtests in games.items() if playtests}
+        try:
+            challenges = self.generate(plans.values())
+        except Exception:
+            for plan in plans.values():
+                self.release_plan(plan)
+            raise
+
+        def finish_game(game_index, game_count, game_id, game_playtests, log):
+            counts = self.finish(plans[game_id], challenges, game_index, game_count, log=log)
+            if counts['create_errors'] and failed is not None:
+                failed.add(game_id)
+            return counts
+
+        return run_games({game_id: plan['game_playtests'] for game_id, plan in plans.items()}, finish_game,
+                         failed=failed)
+
+    def run(self):
+        """Process every game with pending playtests and return the summed counts"""
+        results = self.process_games(self.snapshot.by_game)
+        totals = defaultdict(int)
+        for result in results:
+            for key, value in result.items():
+                totals[key] += value
+        return totals
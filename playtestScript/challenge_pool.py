@@ -0,0 +1,140 @@
+"""
+Concurrent challenge generation helpers.
+
+Games are processed in parallel on a bounded thread pool, but every game's
+playtests stay on one worker and run in order, so each challenge still sees
+the challenges generated before it for the same game. All OpenAI calls go
+through one process-wide limiter that keeps both requests per minute and
+tokens per minute under the account's limits.
+"""
+import io
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import openai
+
+# Parallel games; each game is handled by a single worker
+CHALLENGE_WORKERS = int(os.getenv("CHALLENGE_WORKERS", 8))
+
+# OpenAI rate limits for the account (see the limits page of the dashboard)
+OPENAI_REQUESTS_PER_MINUTE = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", 500))
+OPENAI_TOKENS_PER_MINUTE = int(os.getenv("OPENAI_TOKENS_PER_MINUTE", 60000))
+
+# Rough prompt size estimate used until the response reports real usage
+CHARS_PER_TOKEN = 4
+
+OPENAI_MAX_RETRIES = 3
+OPENAI_BACKOFF_BASE = 2.0
+
+class RateLimiter:
+    """Thread-safe token buckets for requests and tokens per minute"""
+
+    def __init__(self, requests_per_minute=OPENAI_REQUESTS_PER_MINUTE, tokens_per_minute=OPENAI_TOKENS_PER_MINUTE):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.available_requests = float(requests_per_minute)
+        self.available_tokens = float(tokens_per_minute)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.updated
+        self.updated = now
+        self.available_requests = min(self.requests_per_minute,
+                                      self.available_requests + elapsed * self.requests_per_minute / 60)
+        self.available_tokens = min(self.tokens_per_minute,
+                                    self.available_tokens + elapsed * self.tokens_per_minute / 60)
+
+    def acquire(self, tokens):
+        """Block until one request using `tokens` tokens fits in both budgets"""
+        tokens = min(tokens, self.tokens_per_minute)
+        while True:
+            with self.lock:
+                self._refill()
+                if self.available_requests >= 1 and self.available_tokens >= tokens:
+                    self.available_requests -= 1
+                    self.available_tokens -= tokens
+                    return
+                missing_requests = max(0.0, 1 - self.available_requests)
+                missing_tokens = max(0.0, tokens - self.available_tokens)
+                wait = max(missing_requests * 60 / self.requests_per_minute,
+                           missing_tokens * 60 / self.tokens_per_minute)
+            time.sleep(wait)
+
+    def settle(self, estimated, actual):
+        """Correct the token budget once a response reports the tokens it really used"""
+        with self.lock:
+            self.available_tokens = min(self.tokens_per_minute, self.available_tokens + estimated - actual)
+
+limiter = RateLimiter()
+
+def estimate_tokens(messages, max_tokens):
+    prompt_chars = sum(len(message.get('content', '')) for message in messages)
+    return prompt_chars // CHARS_PER_TOKEN + max_tokens
+
+def chat_completion(**kwargs):
+    """openai.ChatCompletion.create behind the shared rate limiter, retrying rate limits and outages"""
+    estimated = estimate_tokens(kwargs.get('messages', []), kwargs.get('max_tokens', 0))
+    attempt = 0
+    while True:
+        limiter.acquire(estimated)
+        try:
+            response = openai.ChatCompletion.create(**kwargs)
+        except (openai.error.RateLimitError, openai.error.ServiceUnavailableError,
+                openai.error.APIConnectionError, openai.error.Timeout) as e:
+            if attempt >= OPENAI_MAX_RETRIES:
+                raise
+            delay = OPENAI_BACKOFF_BASE * (2 ** attempt) * (0.5 + random.random() / 2)
+            print(f"⏳ OpenAI request failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+            attempt += 1
+            time.sleep(delay)
+            continue
+
+        usage = response.get('usage') or {}
+        if usage.get('total_tokens'):
+            limiter.settle(estimated, usage['total_tokens'])
+        return response
+
+class GameLog:
+    """Collects one game's output so parallel games don't interleave their lines"""
+
+    def __init__(self):
+        self.buffer = io.StringIO()
+
+    def __call__(self, *args, **kwargs):
+        print(*args, file=self.buffer, **kwargs)
+
+    def getvalue(self):
+        return self.buffer.getvalue()
+
+def run_games(games_dict, process_game, workers=CHALLENGE_WORKERS, failed=None):
+    """
+    Run process_game(game_index, game_count, game_id, game_playtests, log) for every game on a thread pool
+
+    Each game's output is printed as one block when it finishes. A game whose process_game raised is
+    logged and, if failed is given, its id is added to it.
+
+    Returns:
+        list: The value process_game returned for each game that finished, in completion order
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {}
+        for game_index, (game_id, game_playtests) in enumerate(games_dict.items(), 1):
+            log = GameLog()
+            future = executor.submit(process_game, game_index, len(games_dict), game_id, game_playtests, log)
+            futures[future] = (game_id, log)
+
+        for future in as_completed(futures):
+            game_id, log = futures[future]
+            try:
+                results.append(future.result())
+            except Exception as e:
+                log(f"   ❌ Error processing game: {e}")
+                if failed is not None:
+                    failed.add(game_id)
+            print(log.getvalue(), end='')
+    return results
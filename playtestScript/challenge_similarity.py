@@ -0,0 +1,125 @@
+"""
+Local near-duplicate detection for generated challenges.
+
+Each challenge is reduced to normalized content words (lowercased, stop words
+dropped, number words turned into digits, plural/-ing/-ed endings stripped)
+weighted by TF-IDF, with document frequencies from every challenge in the
+Challenges table, so words every challenge uses ("add", "fix", "level") carry
+little weight and the terms that make a challenge different carry most of it.
+Candidates are compared to a game's existing challenges by cosine similarity,
+discounted when each of the two has terms of its own.
+
+"Add 3 sound effects to the jump action" and "Add three sound effects for
+jumping" still score high and are rejected before a Challenges record (or
+another completion) is spent on them, while "Fix 2 collision bugs in the first
+level" and "Fix 2 audio bugs in the first level" score low.
+"""
+import os
+import re
+import math
+from collections import Counter
+
+CHALLENGE_SIMILARITY_THRESHOLD = float(os.getenv("CHALLENGE_SIMILARITY_THRESHOLD", 0.65))
+
+# How strongly terms only one side has count against a match when both sides have some
+CONFLICT_PENALTY = 2
+
+STOP_WORDS = {
+    'a', 'an', 'the', 'to', 'for', 'of', 'in', 'on', 'at', 'by', 'from', 'into', 'onto', 'with',
+    'and', 'or', 'that', 'this', 'these', 'those', 'it', 'its', 'is', 'are', 'be', 'each', 'every',
+    'your', 'their', 'when', 'so', 'as', 'least', 'more', 'new'
+}
+
+NUMBER_WORDS = {
+    'one': '1', 'two': '2', 'three': '3', 'four': '4', 'five': '5',
+    'six': '6', 'seven': '7', 'eight': '8', 'nine': '9', 'ten': '10'
+}
+
+SUFFIXES = ('ing', 'ed', 's')
+
+def stem(word):
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+def terms(text):
+    """Normalized content words of a challenge, with counts"""
+    result = Counter()
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        word = NUMBER_WORDS.get(word, word)
+        if word in STOP_WORDS or (len(word) < 2 and not word.isdigit()):
+            continue
+        result[stem(word)] += 1
+    return result
+
+class TermWeights:
+    """Inverse document frequencies of terms over a corpus of challenges"""
+
+    def __init__(self, challenges=()):
+        self.documents = 0
+        self.frequencies = Counter()
+        for challenge in challenges:
+            self.add(challenge)
+
+    def add(self, challenge):
+        self.documents += 1
+        self.frequencies.update(terms(challenge).keys())
+
+    def weight(self, term):
+        # Smoothed IDF: terms the corpus hasn't seen weigh the most
+        return math.log((self.documents + 1) / (self.frequencies[term] + 1)) + 1
+
+    def vector(self, counts):
+        """Unit-length TF-IDF vector of a term Counter"""
+        vector = {term: count * self.weight(term) for term, count in counts.items()}
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        return {term: value / norm for term, value in vector.items()} if norm else {}
+
+def similarity(first, second):
+    """Cosine similarity of two unit-length vectors, discounted when both have terms of their own
+
+    A challenge that only adds words to another ("Add a health bar to the boss" / "... for the boss
+    fight") asks for the same thing; two that each have a term the other lacks ("collision bugs" /
+    "audio bugs", "level 1" / "level 3") ask for different things however much else they share.
+    """
+    shared = sum(value * second.get(term, 0.0) for term, value in first.items())
+    own = min(sum(value * value for term, value in vector.items() if term not in other)
+              for vector, other in ((first, second), (second, first)))
+    return max(0.0, shared * (1 - CONFLICT_PENALTY * own))
+
+class ChallengeIndex:
+    """Term vectors of one game's challenges
+
+    Args:
+        challenges: The game's existing challenges
+        threshold: Similarity at or above which a challenge is a near-duplicate
+        weights: TermWeights over all challenges, kept up to date by their owner; by default the index
+                 weighs terms by its own challenges
+    """
+
+    def __init__(self, challenges=(), threshold=CHALLENGE_SIMILARITY_THRESHOLD, weights=None):
+        self.threshold = threshold
+        self.own_weights = weights is None
+        self.weights = TermWeights() if weights is None else weights
+        self.entries = []
+        for challenge in challenges:
+            self.add(challenge)
+
+    def add(self, challenge):
+        self.entries.append((challenge, terms(challenge)))
+        if self.own_weights:
+            self.weights.add(challenge)
+
+    def find_duplicate(self, challenge):
+        """The most similar existing challenge and its score if it's a near-duplicate, else None"""
+        candidate = self.weights.vector(terms(challenge))
+        best = None
+        for existing, counts in self.entries:
+            score = similarity(candidate, self.weights.vector(counts))
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (existing, score)
+        return best
+
+    def __len__(self):
+        return len(self.entries)
@@ -1,7 +1,9 @@
 import os
 from dotenv import load_dotenv
-import requests
-import time
+from airtable_client import AirtableClient
+from airtable_mirror import mirror_or_live
+from airtable_query import Query, is_after, fetch_by_ids
+from record_store import Table
 from datetime import datetime, timedelta
 from collections import defaultdict
 
@@ -12,40 +14,24 @@ load_dotenv()
 AIRTABLE_API_KEY = os.getenv("AIRTABLE_API_KEY")
 AIRTABLE_BASE_ID = os.getenv("AIRTABLE_BASE_ID")
 
-# Airtable configuration
-AIRTABLE_API_BASE = 'https://api.airtable.com/v0'
+# Airtable configuration; --from-mirror reads from the local SQLite mirror (airtable_mirror.py)
+airtable = mirror_or_live(AirtableClient(AIRTABLE_API_KEY, AIRTABLE_BASE_ID))
 USERS_TABLE = 'Users'
 POSTS_TABLE = 'Posts'
 GAMES_TABLE = 'Games'
 
-def airtable_request(path, options=None):
-    """Make a request to the Airtable API"""
-    if options is None:
-        options = {}
-    
-    url = f"{AIRTABLE_API_BASE}/{AIRTABLE_BASE_ID}/{path}"
-    
-    headers = {
-        'Authorization': f'Bearer {AIRTABLE_API_KEY}',
-        'Content-Type': 'application/json'
-    }
-    
-    # Add any additional headers from options
-    if 'headers' in options:
-        headers.update(options['headers'])
-    
-    response = requests.request(
-        method=options.get('method', 'GET'),
-        url=url,
-        headers=headers,
-        json=options.get('json'),
-        params=options.get('params')
-    )
-    
-    if not response.ok:
-        raise Exception(f"Airtable error {response.status_code}: {response.text}")
-    
-    return response.json()
+# Post columns the hour totals read
+POST_FIELDS = ['Game', 'HoursSpent', 'TimeSpentOnAsset', 'Created At']
+
+# Game columns the owner details are read from
+GAME_FIELDS = ['ownerEmail', 'Owner', 'ownerName', 'slack id']
+
+# Approximate table sizes; when set, a lookup touching most of a table uses one scan instead of id queries
+GAMES_TABLE_SIZE = int(os.getenv("GAMES_TABLE_SIZE", 0)) or None
+USERS_TABLE_SIZE = int(os.getenv("USERS_TABLE_SIZE", 0)) or None
+
+# Posting requirement: one post every 48 hours, after a grace period of this many days
+POSTING_GRACE_DAYS = 3
 
 def fetch_all_posts(start_date_str):
     """
@@ -61,85 +47,144 @@ def fetch_all_posts(start_date_str):
     print("=" * 60)
     
     all_posts = []
-    offset = None
     batch_count = 0
     
     # Convert start date to ISO format for Airtable filter
     start_datetime = datetime.strptime(start_date_str, '%Y-%m-%d')
     start_iso = start_datetime.isoformat()
     
-    # Build filter formula to get posts after start date
-    filter_formula = f"IS_AFTER({{Created At}}, '{start_iso}')"
+    # Only posts after the start date, and only the columns that are used
+    query = Query(POSTS_TABLE, fields=POST_FIELDS, where=is_after('Created At', start_iso))
     
-    while True:
-        batch_count += 1
-        params = {
-            'pageSize': 100,
-            'filterByFormula': filter_formula
-        }
-        if offset:
-            params['offset'] = offset
-        
-        try:
-            print(f"📦 Fetching batch {batch_count}...")
-            page = airtable_request(f"{POSTS_TABLE}?{requests.compat.urlencode(params)}", {
-                'method': 'GET'
-            })
-            
-            page_records = page.get('records', [])
+    try:
+        for page_records in query.pages(airtable):
+            batch_count += 1
             all_posts.extend(page_records)
-            offset = page.get('offset')
-            
-            print(f"   ✅ Fetched {len(page_records)} posts")
-            
-            if not offset:
-                break
-                
-            # Small delay to avoid rate limiting
-            time.sleep(0.1)
-                
-        except Exception as e:
-            print(f"❌ Error fetching batch {batch_count}: {e}")
-            break
+            print(f"📦 Batch {batch_count}: fetched {len(page_records)} posts")
+    except Exception as e:
+        print(f"❌ Error fetching batch {batch_count + 1}: {e}")
     
     print(f"\n📊 Total posts fetched: {len(all_posts)}")
     return all_posts
 
-def fetch_game_by_id(game_id):
+def first_link(value):
+    """First id of a linked-record field (or the value itself if it isn't a list)"""
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+def fetch_games_by_id(game_ids):
     """
-    Fetch a game record by its ID
+    Fetch game records in bulk
     
     Args:
-        game_id: Airtable record ID of the game
+        game_ids: Airtable record IDs of the games
     
     Returns:
-        dict: Game record, or None if not found
+        Table: Games records (record_store.py); missing games are left out
     """
+    game_ids = set(game_ids)
+    print(f"\n🎮 Resolving {len(game_ids)} games...")
     try:
-        game_record = airtable_request(f"{GAMES_TABLE}/{requests.utils.quote(game_id)}", {
-            'method': 'GET'
-        })
-        return game_record
-    except Exception:
-        return None
+        games = fetch_by_ids(airtable, GAMES_TABLE, game_ids, fields=GAME_FIELDS, table_size=GAMES_TABLE_SIZE)
+    except Exception as e:
+        print(f"❌ Error fetching games: {e}")
+        games = {}
+    print(f"   Found {len(games)} of {len(game_ids)} games")
+    return Table(GAMES_TABLE, games.values(), fields=GAME_FIELDS)
 
-def fetch_user_by_id(user_id):
+def fetch_users_by_id(user_ids, fields=None):
     """
-    Fetch a user record by its ID
+    Fetch user records in bulk
     
     Args:
-        user_id: Airtable record ID of the user
+        user_ids: Airtable record IDs of the users
+        fields: Columns to fetch (None for all)
     
     Returns:
-        dict: User record, or None if not found
+        Table: Users records (record_store.py); missing users are left out
     """
     try:
-        user_record = airtable_request(f"{USERS_TABLE}/{requests.utils.quote(user_id)}", {
-            'method': 'GET'
-        })
-        return user_record
-    except Exception:
+        users = fetch_by_ids(airtable, USERS_TABLE, user_ids, fields=fields, table_size=USERS_TABLE_SIZE)
+    except Exception as e:
+        print(f"❌ Error fetching users: {e}")
+        users = {}
+    return Table(USERS_TABLE, users.values(), fields=fields)
+
+def owner_from_game(game_record):
+    """
+    Owner details from a game record
+    
+    Args:
+        game_record: Games record (ownerEmail, Owner, ownerName, slack id)
+    
+    Returns:
+        dict: record_id, email, first_name, last_name and slack_id, or None without an owner email
+    """
+    game_fields = game_record.get('fields', {})
+    owner_email_raw = game_fields.get('ownerEmail', '')
+    
+    # Handle if ownerEmail is a list (extract first element) or string
+    if isinstance(owner_email_raw, list):
+        owner_email = owner_email_raw[0] if owner_email_raw else ''
+    else:
+        owner_email = owner_email_raw
+    
+    # Ensure owner_email is a string and not empty
+    if not owner_email or not isinstance(owner_email, str):
         return None
+    
+    owner_email = owner_email.strip()  # Clean up any whitespace
+    if not owner_email:
+        return None
+    
+    # Get owner info from game record
+    owner_ids = game_fields.get('Owner', [])
+    user_id = owner_ids[0] if isinstance(owner_ids, list) and owner_ids else 'unknown'
+    
+    # Get owner name from game record if available
+    owner_name_raw = game_fields.get('ownerName', '')
+    owner_name = owner_name_raw[0] if isinstance(owner_name_raw, list) and owner_name_raw else owner_name_raw
+    
+    # Try to parse first/last name from ownerName
+    first_name = ''
+    last_name = ''
+    if owner_name:
+        name_parts = owner_name.split(' ', 1)
+        first_name = name_parts[0] if len(name_parts) > 0 else ''
+        last_name = name_parts[1] if len(name_parts) > 1 else ''
+    
+    # Get slack id
+    slack_id_raw = game_fields.get('slack id', '')
+    slack_id = slack_id_raw[0] if isinstance(slack_id_raw, list) and slack_id_raw else slack_id_raw
+    
+    return {
+        'record_id': user_id,
+        'email': owner_email,
+        'first_name': first_name,
+        'last_name': last_name,
+        'slack_id': slack_id
+    }
+
+def post_hours(fields):
+    """Hours logged by one post: HoursSpent plus TimeSpentOnAsset"""
+    # HoursSpent is already in hours
+    hours_spent = fields.get('HoursSpent', 0) or 0
+    
+    # TimeSpentOnAsset is in minutes (based on the field name patterns in the code)
+    time_spent_on_asset = fields.get('TimeSpentOnAsset', 0) or 0
+    time_spent_hours = time_spent_on_asset / 60  # Convert minutes to hours
+    
+    return hours_spent + time_spent_hours
+
+def min_posts_required(days):
+    """
+    Minimum posts for a window of N days (one post every 48 hours with a 3-day grace period)
+    
+    Formula: (days - 3) / 2
+    Example: 14 days = (14-3)/2 = 5.5 posts minimum
+    """
+    return max(1, (days - POSTING_GRACE_DAYS) / 2)
 
 def check_users_with_20plus_hours(days=14, hours_threshold=20):
     """
@@ -172,9 +217,9 @@ def check_users_with_20plus_hours(days=14, hours_threshold=20):
         print("❌ No posts found in this date range")
         return None
     
-    # Cache for games and users to avoid repeated API calls
-    game_cache = {}
-    user_cache = {}
+    # Resolve every linked game up front, then join posts to them in memory
+    games = fetch_games_by_id(first_link(post.get('fields', {}).get('Game')) for post in all_posts
+                              if post.get('fields', {}).get('Game'))
     
     # Dictionary to accumulate hours per user
     # Key: user_id, Value: {hours, email, first_name, last_name, slack_id, post_count}
@@ -199,79 +244,23 @@ def check_users_with_20plus_hours(days=14, hours_threshold=20):
         if not game_ids:
             continue
         
-        # Take the first game ID
-        game_id = game_ids[0] if isinstance(game_ids, list) else game_ids
-        
-        # Fetch game from cache or API
-        if game_id not in game_cache:
-            game_record = fetch_game_by_id(game_id)
-            game_cache[game_id] = game_record
-            time.sleep(0.05)  # Small delay to avoid rate limiting
-        else:
-            game_record = game_cache[game_id]
-        
+        # Join the post to its game
+        game_record = games.first_linked(post, 'Game')
         if not game_record:
             continue
         
-        # Get the owner email directly from the game record
-        game_fields = game_record.get('fields', {})
-        owner_email_raw = game_fields.get('ownerEmail', '')
-        
-        # Handle if ownerEmail is a list (extract first element) or string
-        if isinstance(owner_email_raw, list):
-            owner_email = owner_email_raw[0] if owner_email_raw else ''
-        else:
-            owner_email = owner_email_raw
-        
-        # Ensure owner_email is a string and not empty
-        if not owner_email or not isinstance(owner_email, str):
-            continue
-        
-        owner_email = owner_email.strip()  # Clean up any whitespace
-        if not owner_email:
+        owner = owner_from_game(game_record)
+        if not owner:
             continue
+        owner_email = owner['email']
         
         # Use email as the key instead of user_id
         # Get user info (only once per user)
         if not user_hours[owner_email]['record_id']:
-            # Get owner info from game record
-            owner_ids = game_fields.get('Owner', [])
-            user_id = owner_ids[0] if isinstance(owner_ids, list) and owner_ids else 'unknown'
-            
-            # Get owner name from game record if available
-            owner_name_raw = game_fields.get('ownerName', '')
-            owner_name = owner_name_raw[0] if isinstance(owner_name_raw, list) and owner_name_raw else owner_name_raw
-            
-            # Try to parse first/last name from ownerName
-            first_name = ''
-            last_name = ''
-            if owner_name:
-                name_parts = owner_name.split(' ', 1)
-                first_name = name_parts[0] if len(name_parts) > 0 else ''
-                last_name = name_parts[1] if len(name_parts) > 1 else ''
-            
-            # Get slack id
-            slack_id_raw = game_fields.get('slack id', '')
-            slack_id = slack_id_raw[0] if isinstance(slack_id_raw, list) and slack_id_raw else slack_id_raw
-            
-            user_hours[owner_email]['record_id'] = user_id
-            user_hours[owner_email]['email'] = owner_email
-            user_hours[owner_email]['first_name'] = first_name
-            user_hours[owner_email]['last_name'] = last_name
-            user_hours[owner_email]['slack_id'] = slack_id
-        
-        # Calculate hours from this post
-        # HoursSpent is already in hours
-        hours_spent = fields.get('HoursSpent', 0) or 0
-        
-        # TimeSpentOnAsset is in minutes (based on the field name patterns in the code)
-        time_spent_on_asset = fields.get('TimeSpentOnAsset', 0) or 0
-        time_spent_hours = time_spent_on_asset / 60  # Convert minutes to hours
-        
-        total_post_hours = hours_spent + time_spent_hours
+            user_hours[owner_email].update(owner)
         
         # Add to user's total (keyed by email)
-        user_hours[owner_email]['hours'] += total_post_hours
+        user_hours[owner_email]['hours'] += post_hours(fields)
         user_hours[owner_email]['post_count'] += 1
         
         # Show progress every 100 posts
@@ -294,22 +283,19 @@ def check_users_with_20plus_hours(days=14, hours_threshold=20):
             'post_count': data['post_count']
         })
     
-    # Calculate minimum posts required (one post every 48 hours with 3-day grace period)
-    # Formula: (days - 3) / 2
-    # Example: 14 days = (14-3)/2 = 5.5 posts minimum
-    grace_days = 3
-    min_posts_required = max(1, (days - grace_days) / 2)
+    # Minimum posts required (one post every 48 hours with 3-day grace period)
+    min_posts = min_posts_required(days)
     
     # Filter users with threshold+ hours AND minimum posts requirement
     active_users = [
         u for u in users_with_hours 
-        if u['hours'] >= hours_threshold and u['post_count'] >= min_posts_required
+        if u['hours'] >= hours_threshold and u['post_count'] >= min_posts
     ]
     
     # Track users who met hours but not posts requirement
     hours_only_users = [
         u for u in users_with_hours 
-        if u['hours'] >= hours_threshold and u['post_count'] < min_posts_required
+        if u['hours'] >= hours_threshold and u['post_count'] < min_posts
     ]
     
     # Sort by hours (descending)
@@ -319,7 +305,7 @@ def check_users_with_20plus_hours(days=14, hours_threshold=20):
     
     # Print active users
     print(f"\n🌟 Users meeting all requirements:")
-    print(f"   ({hours_threshold}+ hours AND {min_posts_required:.1f}+ posts - posting every 48h with 3-day grace)")
+    print(f"   ({hours_threshold}+ hours AND {min_posts:.1f}+ posts - posting every 48h with 3-day grace)")
     print("-" * 60)
     for user in active_users:
         name = f"{user['first_name']} {user['last_name']}".strip() or user['email']
@@ -327,7 +313,7 @@ def check_users_with_20plus_hours(days=14, hours_threshold=20):
     
     # Print users who had hours but not enough posts
     if hours_only_users:
-        print(f"\n⚠️  Users with {hours_threshold}+ hours but fewer than {min_posts_required:.1f} posts:")
+        print(f"\n⚠️  Users with {hours_threshold}+ hours but fewer than {min_posts:.1f} posts:")
         print("-" * 60)
         for user in hours_only_users:
             name = f"{user['first_name']} {user['last_name']}".strip() or user['email']
@@ -348,7 +334,7 @@ def check_users_with_20plus_hours(days=14, hours_threshold=20):
         'hours_only_users': hours_only_users,
         'all_users_with_hours': users_with_hours,
         'hours_threshold': hours_threshold,
-        'min_posts_required': min_posts_required,
+        'min_posts_required': min_posts,
         'days': days,
         'start_date': start_date_str,
         'end_date': end_date_str
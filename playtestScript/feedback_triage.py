@@ -0,0 +1,174 @@
+"""
+Cheap local triage of playtest feedback before it goes to the LLM.
+
+Scores each piece of feedback on length, whether it looks like real words,
+and how many actionable keywords it contains ("jump", "confusing", "should",
+"bug", ...). Feedback scoring below the threshold ("fun game", "gg", "asdf")
+is predicted to produce "No challenge found" and skips the completion.
+
+Every completion that does run records (score, challenge found) in
+TRIAGE_OUTCOMES_FILE. At startup the threshold is calibrated on those past
+outcomes: it is the highest one that keeps the share of skipped feedback
+that would have produced a challenge under TRIAGE_MAX_FALSE_SKIP_RATE. A
+small random share of predicted skips (TRIAGE_AUDIT_RATE) is still sent to
+the LLM, which measures the live false-skip rate and keeps the calibration
+data honest.
+"""
+import os
+import re
+import json
+import random
+import threading
+
+TRIAGE_OUTCOMES_FILE = os.getenv("TRIAGE_OUTCOMES_FILE", "feedback_triage_outcomes.jsonl")
+TRIAGE_MAX_FALSE_SKIP_RATE = float(os.getenv("TRIAGE_MAX_FALSE_SKIP_RATE", 0.05))
+TRIAGE_AUDIT_RATE = float(os.getenv("TRIAGE_AUDIT_RATE", 0.1))
+
+# Used until there are enough past outcomes; only skips near-empty or purely generic feedback
+DEFAULT_THRESHOLD = 0.15
+MIN_CALIBRATION_SAMPLES = 50
+
+# Bump when score_feedback changes; outcomes scored by another version are ignored
+TRIAGE_VERSION = 1
+
+# Word count at which the length part of the score saturates
+FULL_LENGTH_WORDS = 20
+
+ACTIONABLE_PREFIXES = (
+    'add', 'fix', 'bug', 'glitch', 'crash', 'broke', 'stuck', 'lag', 'freez', 'should', 'could', 'would',
+    'wish', 'need', 'maybe', 'more', 'less', 'too', 'hard', 'difficult', 'easy', 'confus', 'unclear',
+    'slow', 'fast', 'control', 'sound', 'music', 'audio', 'sfx', 'art', 'sprite', 'animat', 'level',
+    'enemy', 'enemies', 'boss', 'menu', 'tutorial', 'jump', 'camera', 'feature', 'improv', 'missing',
+    'balanc', 'instead', 'suggest', 'better', 'ui', 'hud', 'text', 'font', 'color', 'colour', 'light',
+    'collision', 'physics', 'speed', 'health', 'score', 'button', 'key', 'input', 'mechanic', 'player'
+)
+
+GENERIC_WORDS = {
+    'good', 'great', 'fun', 'nice', 'cool', 'awesome', 'amazing', 'love', 'loved', 'like', 'liked',
+    'ok', 'okay', 'fine', 'lol', 'gg', 'wow', 'game', 'very', 'really', 'so', 'it', 'was', 'is',
+    'the', 'a', 'this', 'i', 'me', 'my', 'and', 'fire', 'peak', 'goated', 'yes', 'no', 'idk', 'na'
+}
+
+def score_feedback(feedback):
+    """Heuristic 0..1 likelihood that feedback contains something a challenge can be built on"""
+    if not feedback or not feedback.strip():
+        return 0.0
+    words = re.findall(r"[a-z']+", feedback.lower())
+    if not words:
+        return 0.0
+
+    # Keyboard mashing and other non-words: mostly vowel-less tokens
+    wordlike = sum(1 for w in words if re.search(r"[aeiouy]", w)) / len(words)
+    content = [w for w in words if w not in GENERIC_WORDS]
+    actionable = sum(1 for w in content if w.startswith(ACTIONABLE_PREFIXES))
+
+    length_score = min(1.0, len(words) / FULL_LENGTH_WORDS)
+    keyword_score = min(1.0, actionable / 3)
+    score = 0.4 * length_score + 0.6 * keyword_score
+    if not content:
+        score *= 0.3
+    return round(score * wordlike, 4)
+
+def calibrate(outcomes, max_false_skip_rate=TRIAGE_MAX_FALSE_SKIP_RATE):
+    """Highest threshold whose skipped outcomes contain at most max_false_skip_rate challenges"""
+    if len(outcomes) < MIN_CALIBRATION_SAMPLES:
+        return DEFAULT_THRESHOLD
+
+    outcomes = sorted(outcomes)
+    threshold = 0.0
+    skipped = 0
+    found = 0
+    for i, (score, challenge_found) in enumerate(outcomes):
+        skipped += 1
+        found += 1 if challenge_found else 0
+        # A threshold can only sit between two different scores
+        next_score = outcomes[i + 1][0] if i + 1 < len(outcomes) else None
+        if next_score == score:
+            continue
+        if found / skipped <= max_false_skip_rate:
+            threshold = next_score if next_score is not None else score + 1e-9
+    return threshold
+
+class FeedbackTriage:
+    """Thread-safe triage with outcome logging and live skip / false-skip counters"""
+
+    def __init__(self, outcomes_file=TRIAGE_OUTCOMES_FILE, audit_rate=TRIAGE_AUDIT_RATE):
+        self.outcomes_file = outcomes_file
+        self.audit_rate = audit_rate
+        self.lock = threading.Lock()
+        self.threshold = calibrate(self._load_outcomes())
+        self.evaluated = 0
+        self.skipped = 0
+        self.audited = 0
+        self.false_skips = 0
+
+    def _load_outcomes(self):
+        outcomes = []
+        try:
+            with open(self.outcomes_file, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if entry.get('version') == TRIAGE_VERSION:
+                        outcomes.append((entry['score'], entry['challenge']))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Warning: Could not read triage outcomes: {e}")
+        return outcomes
+
+    def check(self, feedback):
+        """
+        Decide whether feedback goes to the LLM
+
+        Returns:
+            tuple: (send, predicted_skip, score); predicted skips are still
+            sent when picked for an audit
+        """
+        score = score_feedback(feedback)
+        predicted_skip = score < self.threshold
+        empty = not feedback or not feedback.strip()
+        audit = predicted_skip and not empty and random.random() < self.audit_rate
+        with self.lock:
+            self.evaluated += 1
+            if predicted_skip and not audit:
+                self.skipped += 1
+            if audit:
+                self.audited += 1
+        return (not predicted_skip or audit), predicted_skip, score
+
+    def record(self, score, predicted_skip, challenge_found):
+        """Log the outcome of a completion that ran"""
+        with self.lock:
+            if predicted_skip and challenge_found:
+                self.false_skips += 1
+            try:
+                with open(self.outcomes_file, 'a') as f:
+                    f.write(json.dumps({'version': TRIAGE_VERSION, 'score': score, 'challenge': challenge_found}) + "\n")
+            except OSError as e:
+                print(f"Warning: Could not record triage outcome: {e}")
+
+    def stats(self):
+        with self.lock:
+            return {
+                'threshold': self.threshold,
+                'evaluated': self.evaluated,
+                'skipped': self.skipped,
+                'skip_rate': self.skipped / self.evaluated if self.evaluated else 0.0,
+                'audited': self.audited,
+                'false_skip_rate': self.false_skips / self.audited if self.audited else None
+            }
+
+triage = FeedbackTriage()
+
+def print_triage_stats():
+    stats = triage.stats()
+    print(f"  Feedback triage: skipped {stats['skipped']}/{stats['evaluated']} "
+          f"({stats['skip_rate']:.1%}) below score {stats['threshold']:.2f}")
+    if stats['false_skip_rate'] is not None:
+        print(f"  Triage false-skip rate: {stats['false_skip_rate']:.1%} "
+              f"({stats['audited']} predicted skips audited with the LLM)")
+    else:
+        print(f"  Triage false-skip rate: n/a (no predicted skips audited yet)")
@@ -1,7 +1,9 @@
 import os
 from dotenv import load_dotenv
-import requests
-import time
+from airtable_client import AirtableClient
+from airtable_mirror import mirror_or_live
+from airtable_query import Query
+from record_store import Table
 from collections import defaultdict
 
 # Load environment variables from .env file
@@ -11,38 +13,13 @@ load_dotenv()
 AIRTABLE_API_KEY = os.getenv("AIRTABLE_API_KEY")
 AIRTABLE_BASE_ID = os.getenv("AIRTABLE_BASE_ID")
 
-# Airtable configuration
-AIRTABLE_API_BASE = 'https://api.airtable.com/v0'
+# Airtable configuration; --from-mirror reads from the local SQLite mirror (airtable_mirror.py)
+airtable = mirror_or_live(AirtableClient(AIRTABLE_API_KEY, AIRTABLE_BASE_ID))
 CHALLENGES_TABLE = 'Challenges'
 
-def airtable_request(path, options=None):
-    """Make a request to the Airtable API"""
-    if options is None:
-        options = {}
-    
-    url = f"{AIRTABLE_API_BASE}/{AIRTABLE_BASE_ID}/{path}"
-    
-    headers = {
-        'Authorization': f'Bearer {AIRTABLE_API_KEY}',
-        'Content-Type': 'application/json'
-    }
-    
-    # Add any additional headers from options
-    if 'headers' in options:
-        headers.update(options['headers'])
-    
-    response = requests.request(
-        method=options.get('method', 'GET'),
-        url=url,
-        headers=headers,
-        json=options.get('json'),
-        params=options.get('params')
-    )
-    
-    if not response.ok:
-        raise Exception(f"Airtable error {response.status_code}: {response.text}")
-    
-    return response.json()
+CHALLENGES_QUERY = Query(CHALLENGES_TABLE, fields=[
+    'Status', 'recipientEmail', 'Challenge', 'Earnable SSS', 'SSS Earned', 'AssignedGame', 'FromPlaytest', 'Created At'
+])
 
 def fetch_all_challenges():
     """Fetch all challenges in batches of 100"""
@@ -50,37 +27,17 @@ def fetch_all_challenges():
     print("=" * 60)
     
     all_challenges = []
-    offset = None
     batch_count = 0
     
-    while True:
-        batch_count += 1
-        params = {'pageSize': 100}
-        if offset:
-            params['offset'] = offset
-        
-        try:
-            print(f"📦 Fetching batch {batch_count} (100 records per batch)...")
-            page = airtable_request(f"{CHALLENGES_TABLE}?{requests.compat.urlencode(params)}", {
-                'method': 'GET'
-            })
-            
-            page_records = page.get('records', [])
+    try:
+        for page_records in CHALLENGES_QUERY.pages(airtable):
+            batch_count += 1
             all_challenges.extend(page_records)
-            offset = page.get('offset')
             
-            print(f"   ✅ Fetched {len(page_records)} challenges in batch {batch_count}")
+            print(f"📦 Batch {batch_count}: fetched {len(page_records)} challenges")
             print(f"   📊 Total challenges so far: {len(all_challenges)}")
-            
-            if not offset:
-                break
-                
-            # Small delay to avoid rate limiting
-            time.sleep(0.1)
-                
-        except Exception as e:
-            print(f"❌ Error fetching batch {batch_count}: {e}")
-            break
+    except Exception as e:
+        print(f"❌ Error fetching batch {batch_count + 1}: {e}")
     
     print(f"\n🎯 Fetch Complete:")
     print(f"   Total batches: {batch_count}")
@@ -154,8 +111,13 @@ def check_user_challenge_limits(user_status_counts, max_not_submitted=3):
     
     return violations, compliant_users
 
-def get_challenge_details_for_violations(violations, all_challenges):
-    """Get detailed information about challenges for users with violations"""
+def get_challenge_details_for_violations(violations, challenges):
+    """Get detailed information about challenges for users with violations
+    
+    Args:
+        violations: Violations from check_user_challenge_limits()
+        challenges: Challenges Table (record_store.py), looked up by recipientEmail
+    """
     if not violations:
         return
     
@@ -169,19 +131,18 @@ def get_challenge_details_for_violations(violations, all_challenges):
         print("-" * 40)
         
         user_challenges = []
-        for challenge in all_challenges:
+        for challenge in challenges.find('recipientEmail', email):
             fields = challenge.get('fields', {})
-            if fields.get('recipientEmail') == email:
-                user_challenges.append({
-                    'id': challenge.get('id'),
-                    'challenge': fields.get('Challenge', 'No challenge text'),
-                    'status': fields.get('Status', 'Unknown'),
-                    'earnable_sss': fields.get('Earnable SSS', 0),
-                    'sss_earned': fields.get('SSS Earned', 0),
-                    'assigned_game': fields.get('AssignedGame', []),
-                    'from_playtest': fields.get('FromPlaytest', []),
-                    'created_time': fields.get('Created At', 'Unknown')
-                })
+            user_challenges.append({
+                'id': challenge.get('id'),
+                'challenge': fields.get('Challenge', 'No challenge text'),
+                'status': fields.get('Status', 'Unknown'),
+                'earnable_sss': fields.get('Earnable SSS', 0),
+                'sss_earned': fields.get('SSS Earned', 0),
+                'assigned_game': fields.get('AssignedGame', []),
+                'from_playtest': fields.get('FromPlaytest', []),
+                'created_time': fields.get('Created At', 'Unknown')
+            })
         
         # Sort by status (Not Submitted first) then by created time
         user_challenges.sort(key=lambda x: (x['status'] != 'Not Submitted', x['created_time']))
@@ -214,8 +175,9 @@ def main():
         # Check for violations (more than 3 'Not Submitted' per user)
         violations, compliant_users = check_user_challenge_limits(user_status_counts, max_not_submitted=3)
         
-        # Show detailed information for violations
-        get_challenge_details_for_violations(violations, all_challenges)
+        # Show detailed information for violations (one index lookup per violating user)
+        challenges = Table(CHALLENGES_TABLE, all_challenges, fields=CHALLENGES_QUERY.fields, index=['recipientEmail'])
+        get_challenge_details_for_violations(violations, challenges)
         
         # Summary
         print(f"\n🎯 Final Summary:")
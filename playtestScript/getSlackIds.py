@@ -1,7 +1,8 @@
 import os
 from dotenv import load_dotenv
-import requests
-import time
+from airtable_client import AirtableClient
+from airtable_mirror import mirror_or_live
+from airtable_query import Query
 from collections import defaultdict
 
 # Load environment variables from .env file
@@ -11,38 +12,13 @@ load_dotenv()
 AIRTABLE_API_KEY = os.getenv("AIRTABLE_API_KEY")
 AIRTABLE_BASE_ID = os.getenv("AIRTABLE_BASE_ID")
 
-# Airtable configuration
-AIRTABLE_API_BASE = 'https://api.airtable.com/v0'
+# Airtable configuration; --from-mirror reads from the local SQLite mirror (airtable_mirror.py)
+airtable = mirror_or_live(AirtableClient(AIRTABLE_API_KEY, AIRTABLE_BASE_ID))
 USERS_TABLE = 'Users'
 
-def airtable_request(path, options=None):
-    """Make a request to the Airtable API"""
-    if options is None:
-        options = {}
-    
-    url = f"{AIRTABLE_API_BASE}/{AIRTABLE_BASE_ID}/{path}"
-    
-    headers = {
-        'Authorization': f'Bearer {AIRTABLE_API_KEY}',
-        'Content-Type': 'application/json'
-    }
-    
-    # Add any additional headers from options
-    if 'headers' in options:
-        headers.update(options['headers'])
-    
-    response = requests.request(
-        method=options.get('method', 'GET'),
-        url=url,
-        headers=headers,
-        json=options.get('json'),
-        params=options.get('params')
-    )
-    
-    if not response.ok:
-        raise Exception(f"Airtable error {response.status_code}: {response.text}")
-    
-    return response.json()
+# The Slack ID column has been spelled several ways; missing spellings are dropped from the projection
+SLACK_ID_FIELDS = ['slack id', 'slack_id', 'Slack ID', 'SlackId', 'slackId']
+USERS_QUERY = Query(USERS_TABLE, fields=SLACK_ID_FIELDS + ['email', 'First Name', 'Last Name', 'github username'])
 
 def fetch_all_users():
     """Fetch all users from the Users table in batches of 100"""
@@ -50,37 +26,17 @@ def fetch_all_users():
     print("=" * 60)
     
     all_users = []
-    offset = None
     batch_count = 0
     
-    while True:
-        batch_count += 1
-        params = {'pageSize': 100}
-        if offset:
-            params['offset'] = offset
-        
-        try:
-            print(f"📦 Fetching batch {batch_count} (100 records per batch)...")
-            page = airtable_request(f"{USERS_TABLE}?{requests.compat.urlencode(params)}", {
-                'method': 'GET'
-            })
-            
-            page_records = page.get('records', [])
+    try:
+        for page_records in USERS_QUERY.pages(airtable):
+            batch_count += 1
             all_users.extend(page_records)
-            offset = page.get('offset')
             
-            print(f"   ✅ Fetched {len(page_records)} users in batch {batch_count}")
+            print(f"📦 Batch {batch_count}: fetched {len(page_records)} users")
             print(f"   📊 Total users so far: {len(all_users)}")
-            
-            if not offset:
-                break
-                
-            # Small delay to avoid rate limiting
-            time.sleep(0.1)
-                
-        except Exception as e:
-            print(f"❌ Error fetching batch {batch_count}: {e}")
-            break
+    except Exception as e:
+        print(f"❌ Error fetching batch {batch_count + 1}: {e}")
     
     print(f"\n🎯 Fetch Complete:")
     print(f"   Total batches: {batch_count}")
@@ -0,0 +1,140 @@
+"""
+On-disk cache of LLM responses.
+
+Entries are stored content-addressed: the file name is the SHA-256 of
+everything that determines the response (model, prompt template version and
+the prompt inputs), so re-running challenge generation after a crash, or while
+tuning limits, reuses the completions it already paid for. Entries expire
+LLM_CACHE_TTL_DAYS after they were written, however often they're read, and
+the least recently used ones are evicted once the cache grows past
+LLM_CACHE_MAX_MB. A file's modification time is when it was written and its
+access time when it was last read.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".llm_cache")
+LLM_CACHE_TTL_DAYS = float(os.getenv("LLM_CACHE_TTL_DAYS", 30))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", 100))
+
+# After an eviction the cache is trimmed to this fraction of its maximum size,
+# so the directory isn't rescanned on every write
+EVICT_TO_FRACTION = 0.8
+
+class ResponseCache:
+    """Thread-safe, size-bounded, content-addressed JSON cache in a directory"""
+
+    def __init__(self, directory=LLM_CACHE_DIR, ttl_days=LLM_CACHE_TTL_DAYS, max_mb=LLM_CACHE_MAX_MB):
+        self.directory = directory
+        self.ttl = ttl_days * 86400
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.lock = threading.Lock()
+        self.size = None  # Computed on the first write
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(*parts):
+        """Stable hash of JSON-serializable parts (dict key order doesn't matter)"""
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """Cached value for key, or None if missing or expired"""
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                written_at = os.fstat(f.fileno()).st_mtime
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self.lock:
+                self.misses += 1
+            return None
+
+        if self.ttl and time.time() - entry.get('created_at', 0) > self.ttl:
+            self._remove(path)
+            with self.lock:
+                self.misses += 1
+            return None
+
+        # Bump the access time for LRU eviction, keeping the write time the TTL counts from
+        try:
+            os.utime(path, (time.time(), written_at))
+        except OSError:
+            pass
+        with self.lock:
+            self.hits += 1
+        return entry.get('value')
+
+    def set(self, key, value):
+        path = self._path(key)
+        data = json.dumps({'created_at': time.time(), 'value': value})
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not write LLM cache entry: {e}")
+            return
+
+        with self.lock:
+            if self.size is None:
+                self.size = self._scan_size()
+            else:
+                self.size += len(data)
+            if self.max_bytes and self.size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.json'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat
+
+    def _scan_size(self):
+        return sum(stat.st_size for _, stat in self._entries())
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Drop expired entries, then the least recently used ones, until under the size target"""
+        now = time.time()
+        entries = []
+        size = 0
+        for path, stat in self._entries():
+            if self.ttl and now - stat.st_mtime > self.ttl:
+                self._remove(path)
+                continue
+            entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, path))
+            size += stat.st_size
+
+        target = self.max_bytes * EVICT_TO_FRACTION
+        entries.sort()
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            self._remove(path)
+            size -= entry_size
+        self.size = size
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+challenge_cache = ResponseCache()
@@ -1,9 +1,11 @@
 import os
 from dotenv import load_dotenv
-import requests
+from airtable_client import AirtableClient
+from assignment import eligible_from_records, assign_flow, remaining_slots, ExistingTickets
+from playtest_plan import build_plan, save_plan, apply_plan
+from airtable_query import Query, greater_than
 import random
 import time
-import uuid
 from collections import defaultdict
 
 # Load environment variables from .env file
@@ -14,142 +16,73 @@ AIRTABLE_API_KEY = os.getenv("AIRTABLE_API_KEY")
 AIRTABLE_BASE_ID = os.getenv("AIRTABLE_BASE_ID")
 
 # Airtable configuration
-AIRTABLE_API_BASE = 'https://api.airtable.com/v0'
+airtable = AirtableClient(AIRTABLE_API_KEY, AIRTABLE_BASE_ID)
 PLAYTEST_TICKETS_TABLE = 'PlaytestTickets'
 
-def airtable_request(path, options=None):
-    """Make a request to the Airtable API"""
-    if options is None:
-        options = {}
-    
-    url = f"{AIRTABLE_API_BASE}/{AIRTABLE_BASE_ID}/{path}"
-    
-    headers = {
-        'Authorization': f'Bearer {AIRTABLE_API_KEY}',
-        'Content-Type': 'application/json'
-    }
-    
-    # Add any additional headers from options
-    if 'headers' in options:
-        headers.update(options['headers'])
-    
-    response = requests.request(
-        method=options.get('method', 'GET'),
-        url=url,
-        headers=headers,
-        json=options.get('json'),
-        params=options.get('params')
-    )
-    
-    if not response.ok:
-        raise Exception(f"Airtable error {response.status_code}: {response.text}")
-    
-    return response.json()
+# Only participants who still need tickets, with the columns eligible_from_records() reads
+YSWS_QUERY = Query("Active YSWS Record", fields=['TicketsNeeded', 'User', 'Game', 'Game Name', 'Email'],
+                   where=greater_than('TicketsNeeded', 0))
 
-def createPlaytest(gameToTest, userToPlayGame):
-    """
-    Create a new playtest ticket record
-    
-    Args:
-        gameToTest (str): The record ID of the game to test
-        userToPlayGame (str): The record ID of the user who will play the game
-    
-    Returns:
-        dict: The created record
-    """
-    # Generate a unique PlaytestId
-    playtest_id = str(uuid.uuid4())
-    
-    # Prepare the record data
-    record_data = {
-        "fields": {
-            "PlaytestId": playtest_id,
-            "GameToTest": [gameToTest],  # Linked record to Game
-            "Player": [userToPlayGame]   # Linked record to User
-        }
-    }
-    
-    print(f"  🎫 Creating playtest ticket...")
-    print(f"    PlaytestId: {playtest_id}")
-    print(f"    GameToTest: {gameToTest}")
-    print(f"    Player: {userToPlayGame}")
-    
+def fetch_all_ysws_records():
+    """Fetch all records from the Active YSWS Record table"""
     try:
-        # Create the record
-        response = airtable_request(PLAYTEST_TICKETS_TABLE, {
-            'method': 'POST',
-            'json': record_data
-        })
-        
-        created_record = response.get('records', [{}])[0]
-        print(f"    ✅ Playtest ticket created successfully!")
-        print(f"    Record ID: {created_record.get('id')}")
-        
-        return created_record
-        
+        return YSWS_QUERY.get_all(airtable)
     except Exception as e:
-        print(f"    ❌ Error creating playtest ticket: {e}")
+        print(f"Error fetching records: {e}")
+        return []
+
+def fetch_existing_tickets():
+    """Index the (player, game) pairs that already have a PlaytestTickets record"""
+    try:
+        tickets = airtable.get_all(PLAYTEST_TICKETS_TABLE, fields=['Player', 'GameToTest'])
+    except Exception as e:
+        # Planning without the index could recreate existing pairs
+        print(f"Error fetching existing playtest tickets: {e}")
         raise
+    return ExistingTickets.from_records(tickets)
 
-def fetch_all_ysws_records():
-    """Fetch all records from the Active YSWS Record table"""
-    all_records = []
-    offset = None
+def visualize_circular_assignment(simulation_mode=False, records=None, existing=None, quiet=False, seed=None):
+    """Visualize the circular assignment algorithm step by step
     
-    while True:
-        params = {'pageSize': 100}
-        if offset:
-            params['offset'] = offset
-        
-        try:
-            page = airtable_request(f"Active YSWS Record?{requests.compat.urlencode(params)}", {
-                'method': 'GET'
-            })
-            
-            page_records = page.get('records', [])
-            all_records.extend(page_records)
-            offset = page.get('offset')
-            
-            if not offset:
-                break
-                
-        except Exception as e:
-            print(f"Error fetching records: {e}")
-            break
-    
-    return all_records
-
-def visualize_circular_assignment(simulation_mode=False):
-    """Visualize the circular assignment algorithm step by step"""
+    records/existing default to a live Airtable fetch; quiet skips all output
+    and seed makes the shuffles reproducible (both used by the benchmark).
+    """
+    log = (lambda *args, **kwargs: None) if quiet else print
+    rng = random.Random(seed)
     mode_text = "SIMULATION" if simulation_mode else "LIVE"
-    print(f"🎯 Circular Assignment Algorithm Visualization ({mode_text})")
-    print("=" * 60)
+    log(f"🎯 Circular Assignment Algorithm Visualization ({mode_text})")
+    log("=" * 60)
     
     # Fetch data
-    records = fetch_all_ysws_records()
+    if records is None:
+        records = fetch_all_ysws_records()
+    if existing is None:
+        existing = fetch_existing_tickets()
     
     # Filter records with TicketsNeeded > 0
-    eligible_records = []
-    for record in records:
-        fields = record.get('fields', {})
-        tickets_needed = fields.get('TicketsNeeded', 0)
-        if tickets_needed > 0:
-            eligible_records.append({
-                'record_id': record.get('id'),
-                'user_id': fields.get('User', [None])[0] if fields.get('User') else None,
-                'game_id': fields.get('Game', [None])[0] if fields.get('Game') else None,
-                'game_name': fields.get('Game Name', ['Unknown'])[0] if fields.get('Game Name') else 'Unknown',
-                'email': fields.get('Email', 'Unknown'),
-                'tickets_needed': tickets_needed
-            })
+    eligible_records = eligible_from_records(records)
     
     # Create circular lists
     games_needing_playtests = []
     players_available = []
     
+    # Tickets that already exist count towards each record's TicketsNeeded
+    tested = dict(existing.tested)
+    played = dict(existing.played)
+    
     for record in eligible_records:
+        game_tickets = record['tickets_needed']
+        covered = min(game_tickets, tested.get(record['game_id'], 0))
+        tested[record['game_id']] = tested.get(record['game_id'], 0) - covered
+        game_tickets -= covered
+        
+        player_tickets = record['tickets_needed']
+        covered = min(player_tickets, played.get(record['user_id'], 0))
+        played[record['user_id']] = played.get(record['user_id'], 0) - covered
+        player_tickets -= covered
+        
         # Add games to the pool
-        for _ in range(record['tickets_needed']):
+        for _ in range(game_tickets):
             games_needing_playtests.append({
                 'game_id': record['game_id'],
                 'game_name': record['game_name'],
@@ -158,22 +91,23 @@ def visualize_circular_assignment(simulation_mode=False):
             })
         
         # Add players to the pool (each person should play tickets_needed games)
-        for _ in range(record['tickets_needed']):
+        for _ in range(player_tickets):
             players_available.append({
                 'user_id': record['user_id'],
                 'email': record['email']
             })
     
-    print(f"📊 Setup:")
-    print(f"  Games needing playtests: {len(games_needing_playtests)}")
-    print(f"  Players available: {len(players_available)}")
+    log(f"📊 Setup:")
+    log(f"  Existing playtest tickets: {len(existing)}")
+    log(f"  Games needing playtests: {len(games_needing_playtests)}")
+    log(f"  Players available: {len(players_available)}")
     if simulation_mode:
-        print(f"  🎭 Running in SIMULATION mode - no tickets will be created")
-    print()
+        log(f"  🎭 Running in SIMULATION mode - the plan won't be applied")
+    log()
     
     # Shuffle both lists
-    random.shuffle(games_needing_playtests)
-    random.shuffle(players_available)
+    rng.shuffle(games_needing_playtests)
+    rng.shuffle(players_available)
     
     # Create circular assignment visualization
     assignments = []
@@ -182,8 +116,8 @@ def visualize_circular_assignment(simulation_mode=False):
     attempts = 0
     max_attempts = len(players_available) * 2  # Prevent infinite loops
     
-    print("🔄 Circular Assignment Process:")
-    print("=" * 60)
+    log("🔄 Circular Assignment Process:")
+    log("=" * 60)
     
     while game_index < len(games_needing_playtests) and attempts < max_attempts:
         current_game = games_needing_playtests[game_index]
@@ -193,8 +127,8 @@ def visualize_circular_assignment(simulation_mode=False):
         original_player_index = player_index
         found_player = False
         
-        print(f"\n🎮 Game {game_index + 1}: {current_game['game_name']} (by {current_game['owner_email']})")
-        print(f"   Looking for player...")
+        log(f"\n🎮 Game {game_index + 1}: {current_game['game_name']} (by {current_game['owner_email']})")
+        log(f"   Looking for player...")
         
         # Try to find a suitable player by moving through the circle
         while player_index < len(players_available) and not found_player:
@@ -205,7 +139,7 @@ def visualize_circular_assignment(simulation_mode=False):
                 current_player['user_id'] is not None):
                 
                 # Check if this player already has this game assigned
-                already_assigned = any(
+                already_assigned = (current_player['user_id'], current_game['game_id']) in existing or any(
                     a['player_user_id'] == current_player['user_id'] and 
                     a['game_id'] == current_game['game_id'] 
                     for a in assignments
@@ -221,36 +155,28 @@ def visualize_circular_assignment(simulation_mode=False):
                         'player_user_id': current_player['user_id']
                     })
                     
-                    print(f"   ✅ Found: {current_player['email']}")
-                    print(f"   📍 Player index: {player_index}")
+                    log(f"   ✅ Found: {current_player['email']}")
+                    log(f"   📍 Player index: {player_index}")
                     
-                    # Actually create the playtest ticket (only if not in simulation mode)
-                    if not simulation_mode:
-                        try:
-                            created_ticket = createPlaytest(current_game['game_id'], current_player['user_id'])
-                            print(f"   🎫 Created ticket: {created_ticket.get('id')}")
-                        except Exception as e:
-                            print(f"   ❌ Failed to create ticket: {e}")
-                    else:
-                        print(f"   🎫 [SIMULATION] Would create ticket for {current_player['email']} → {current_game['game_name']}")
+                    log(f"   🎫 Planned ticket for {current_player['email']} → {current_game['game_name']}")
                     
                     found_player = True
                     game_index += 1
                     player_index += 1  # Move to next player for next game
                 else:
-                    print(f"   ⚠️  {current_player['email']} already has this game")
+                    log(f"   ⚠️  {current_player['email']} already has this game")
                     player_index += 1
             else:
                 if current_player['user_id'] == current_game['owner_user_id']:
-                    print(f"   ❌ {current_player['email']} is the owner (skip)")
+                    log(f"   ❌ {current_player['email']} is the owner (skip)")
                 else:
-                    print(f"   ❌ {current_player['email']} has no user_id (skip)")
+                    log(f"   ❌ {current_player['email']} has no user_id (skip)")
                 player_index += 1
         
         # If we went through all players and didn't find one, wrap around
         if not found_player:
             if player_index >= len(players_available):
-                print(f"   🔄 Wrapping around to start of player list")
+                log(f"   🔄 Wrapping around to start of player list")
                 player_index = 0
                 
                 # Try one more time through the list
@@ -260,7 +186,7 @@ def visualize_circular_assignment(simulation_mode=False):
                     if (current_player['user_id'] != current_game['owner_user_id'] and 
                         current_player['user_id'] is not None):
                         
-                        already_assigned = any(
+                        already_assigned = (current_player['user_id'], current_game['game_id']) in existing or any(
                             a['player_user_id'] == current_player['user_id'] and 
                             a['game_id'] == current_game['game_id'] 
                             for a in assignments
@@ -275,18 +201,10 @@ def visualize_circular_assignment(simulation_mode=False):
                                 'player_user_id': current_player['user_id']
                             })
                             
-                            print(f"   ✅ Found on wrap-around: {current_player['email']}")
-                            print(f"   📍 Player index: {player_index}")
+                            log(f"   ✅ Found on wrap-around: {current_player['email']}")
+                            log(f"   📍 Player index: {player_index}")
                             
-                            # Actually create the playtest ticket (only if not in simulation mode)
-                            if not simulation_mode:
-                                try:
-                                    created_ticket = createPlaytest(current_game['game_id'], current_player['user_id'])
-                                    print(f"   🎫 Created ticket: {created_ticket.get('id')}")
-                                except Exception as e:
-                                    print(f"   ❌ Failed to create ticket: {e}")
-                            else:
-                                print(f"   🎫 [SIMULATION] Would create ticket for {current_player['email']} → {current_game['game_name']}")
+                            log(f"   🎫 Planned ticket for {current_player['email']} → {current_game['game_name']}")
                             
                             found_player = True
                             game_index += 1
@@ -297,18 +215,22 @@ def visualize_circular_assignment(simulation_mode=False):
                         player_index += 1
                 
                 if not found_player:
-                    print(f"   ❌ Could not find suitable player after full circle")
+                    log(f"   ❌ Could not find suitable player after full circle")
                     game_index += 1  # Skip this game
                     player_index = original_player_index + 1  # Try next player for next game
     
-    print(f"\n🎯 Assignment Results:")
-    print(f"  Successful assignments: {len(assignments)}")
-    print(f"  Games processed: {game_index}")
-    print(f"  Total attempts: {attempts}")
-    if simulation_mode:
-        print(f"  🎭 SIMULATION MODE - No actual tickets were created")
+    log(f"\n🎯 Assignment Results:")
+    log(f"  Successful assignments: {len(assignments)}")
+    log(f"  Games processed: {game_index}")
+    log(f"  Total attempts: {attempts}")
     
-    # Show assignments in a nice format
+    if not quiet:
+        print_assignments(assignments)
+    
+    return assignments
+
+def print_assignments(assignments):
+    """Show the first assignments and how playtests are distributed over players and games"""
     print(f"\n📋 Assignments Made:")
     print("-" * 60)
     for i, assignment in enumerate(assignments[:20]):  # Show first 20
@@ -333,6 +255,39 @@ def visualize_circular_assignment(simulation_mode=False):
     print(f"\n  Games and their playtest counts:")
     for game_name, count in sorted(game_counts.items(), key=lambda x: x[1], reverse=True):
         print(f"    {game_name[:30]:<30}: {count} playtests")
+
+def flow_assignment(simulation_mode=False):
+    """Assign playtests with the max-flow engine and create the tickets"""
+    mode_text = "SIMULATION" if simulation_mode else "LIVE"
+    print(f"🎯 Flow-Based Assignment ({mode_text})")
+    print("=" * 60)
+    
+    records = fetch_all_ysws_records()
+    existing = fetch_existing_tickets()
+    eligible_records = eligible_from_records(records)
+    
+    # Only the tickets that don't exist yet are planned
+    supply, demand = remaining_slots(eligible_records, existing)
+    player_slots = sum(supply.values())
+    game_slots = sum(demand.values())
+    print(f"📊 Setup:")
+    print(f"  Existing playtest tickets: {len(existing)}")
+    print(f"  Games needing playtests: {game_slots}")
+    print(f"  Players available: {player_slots}")
+    if simulation_mode:
+        print(f"  🎭 Running in SIMULATION mode - the plan won't be applied")
+    print()
+    
+    started = time.time()
+    assignments = assign_flow(eligible_records, existing=existing)
+    print(f"🔄 Solved assignment in {time.time() - started:.2f}s")
+    
+    print(f"\n🎯 Assignment Results:")
+    print(f"  Successful assignments: {len(assignments)}")
+    print(f"  Unassigned game slots: {game_slots - len(assignments)}")
+    print(f"  Unassigned player slots: {player_slots - len(assignments)}")
+    
+    print_assignments(assignments)
     
     return assignments
 
@@ -350,21 +305,39 @@ def main():
     else:
         print("✅ Running in LIVE mode - tickets will be created")
     
-    assignments = visualize_circular_assignment(simulation_mode=simulation_mode)
+    # The circular walk is kept as a fallback for comparison
+    algorithm = input("Assignment algorithm - flow or greedy? (default: flow): ").strip().lower()
+    if algorithm == 'greedy':
+        assignments = visualize_circular_assignment(simulation_mode=simulation_mode)
+    else:
+        algorithm = 'flow'
+        assignments = flow_assignment(simulation_mode=simulation_mode)
+    
+    # Tickets are only created from the saved plan, so a failed run can be
+    # retried with `python playtest_plan.py` without planning again
+    plan = build_plan(assignments, algorithm=algorithm)
+    plan_file = save_plan(plan)
+    
+    if not simulation_mode:
+        results = apply_plan(airtable, plan)
     
     print(f"\n🎯 Summary:")
-    print(f"  Total assignments processed: {len(assignments)}")
+    print(f"  Total assignments planned: {len(assignments)}")
+    print(f"  Plan file: {plan_file}")
     if simulation_mode:
         print(f"  🎭 SIMULATION MODE - No tickets were created")
+        print(f"  Apply the plan later with: python playtest_plan.py")
     else:
-        print(f"  ✅ LIVE MODE - Playtest tickets created in Airtable")
+        print(f"  ✅ LIVE MODE - {results['created']} playtest tickets created in Airtable")
+        if results['failed'] or results['unknown']:
+            print(f"  ⚠️  {results['failed']} tickets failed and {results['unknown']} unknown; "
+                  f"re-apply {plan_file} with python playtest_plan.py")
     print(f"  Algorithm is scalable to any number of participants")
     
     # Show final count of tickets (only in live mode)
     if not simulation_mode:
         try:
-            response = airtable_request(PLAYTEST_TICKETS_TABLE, {'method': 'GET'})
-            total_tickets = len(response.get('records', []))
+            total_tickets = len(airtable.get_all(PLAYTEST_TICKETS_TABLE, fields=['PlaytestId']))
             print(f"  Total tickets in PlaytestTickets table: {total_tickets}")
         except Exception as e:
             print(f"  Could not fetch final ticket count: {e}")
@@ -0,0 +1,167 @@
+"""
+Plan/apply for playtest tickets.
+
+The assigner writes its assignments to a plan file first; applying the plan
+creates the tickets in 10-record batches through the shared, rate-limited
+Airtable client. Every planned ticket carries its PlaytestId from the start,
+so applying a plan again (after a crash, a timeout or Ctrl-C) only creates
+the tickets whose PlaytestId isn't in PlaytestTickets yet.
+"""
+import os
+import json
+import uuid
+from datetime import datetime
+from dotenv import load_dotenv
+from airtable_client import AirtableClient, AirtableError, BATCH_SIZE, chunks
+import requests
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Environment Variables
+AIRTABLE_API_KEY = os.getenv("AIRTABLE_API_KEY")
+AIRTABLE_BASE_ID = os.getenv("AIRTABLE_BASE_ID")
+
+PLAYTEST_TICKETS_TABLE = 'PlaytestTickets'
+
+# Attempts per batch; between attempts the batch is checked against Airtable
+# so nothing that was already written is sent again. If that check fails too,
+# the batch isn't sent again: its tickets are reported as unknown
+MAX_BATCH_ATTEMPTS = 3
+
+def build_plan(assignments, algorithm=None):
+    """Give every assignment a PlaytestId and wrap them in a plan"""
+    return {
+        'metadata': {
+            'generated_at': datetime.now().isoformat(),
+            'algorithm': algorithm,
+            'table': PLAYTEST_TICKETS_TABLE,
+            'ticket_count': len(assignments)
+        },
+        'tickets': [
+            dict(assignment, playtest_id=str(uuid.uuid4()))
+            for assignment in assignments
+        ]
+    }
+
+def save_plan(plan, filename=None):
+    """Write a plan to disk and return its filename"""
+    if filename is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"playtest_plan_{timestamp}.json"
+
+    # Write to a temporary file first so a crash never leaves half a plan
+    tmp_filename = f"{filename}.tmp"
+    with open(tmp_filename, 'w') as f:
+        json.dump(plan, f, indent=2)
+    os.replace(tmp_filename, filename)
+
+    print(f"\n💾 Plan saved to: {filename}")
+    return filename
+
+def load_plan(filename):
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+def ticket_fields(ticket):
+    return {
+        "PlaytestId": ticket['playtest_id'],
+        "GameToTest": [ticket['game_id']],     # Linked record to Game
+        "Player": [ticket['player_user_id']]   # Linked record to User
+    }
+
+def fetch_existing_playtest_ids(airtable, table=PLAYTEST_TICKETS_TABLE):
+    """All PlaytestIds already in the table"""
+    return {
+        record.get('fields', {}).get('PlaytestId')
+        for record in airtable.iterate(table, fields=['PlaytestId'])
+    }
+
+def playtest_ids_present(airtable, playtest_ids, table=PLAYTEST_TICKETS_TABLE):
+    """Which of a batch's PlaytestIds exist (used after a write failed midway)"""
+    formula = "OR(" + ",".join(f"{{PlaytestId}}='{playtest_id}'" for playtest_id in playtest_ids) + ")"
+    return {
+        record.get('fields', {}).get('PlaytestId')
+        for record in airtable.iterate(table, fields=['PlaytestId'], filter_by_formula=formula)
+    }
+
+def apply_plan(airtable, plan):
+    """
+    Create the plan's tickets that don't exist yet
+
+    Returns:
+        dict: Counts of created, skipped (already present), failed and unknown tickets (a write
+              failed and Airtable couldn't be checked; re-applying the plan resolves them)
+    """
+    table = plan.get('metadata', {}).get('table', PLAYTEST_TICKETS_TABLE)
+    tickets = plan.get('tickets', [])
+
+    print(f"\n🎫 Applying plan with {len(tickets)} tickets...")
+    existing_ids = fetch_existing_playtest_ids(airtable, table)
+    pending = [t for t in tickets if t['playtest_id'] not in existing_ids]
+    skipped = len(tickets) - len(pending)
+    if skipped:
+        print(f"  ⏭️  {skipped} tickets already exist, skipping them")
+
+    created = 0
+    failed = 0
+    unknown = 0
+    batches = list(chunks(pending, BATCH_SIZE))
+    for i, batch in enumerate(batches, 1):
+        for attempt in range(1, MAX_BATCH_ATTEMPTS + 1):
+            try:
+                # Writes aren't retried blindly: a timed out batch may have been created
+                airtable.create_records(table, [ticket_fields(t) for t in batch], retry_writes=False)
+                created += len(batch)
+                break
+            except (AirtableError, requests.RequestException) as e:
+                print(f"  ⚠️  Batch {i} attempt {attempt} failed: {e}")
+                try:
+                    present = playtest_ids_present(airtable, [t['playtest_id'] for t in batch], table)
+                except (AirtableError, requests.RequestException) as e:
+                    # The batch may have been written; sending it again could duplicate it
+                    unknown += len(batch)
+                    print(f"  ❓ Batch {i}: couldn't check which tickets were created ({e}), not retrying")
+                    break
+                created += sum(1 for t in batch if t['playtest_id'] in present)
+                batch = [t for t in batch if t['playtest_id'] not in present]
+                if not batch:
+                    break
+        else:
+            failed += len(batch)
+            print(f"  ❌ Batch {i}: {len(batch)} tickets not created")
+
+        if i % 10 == 0 or i == len(batches):
+            print(f"  📝 Batch {i}/{len(batches)}: {created} created so far")
+
+    print(f"\n🎯 Apply Results:")
+    print(f"  Created: {created}")
+    print(f"  Already present: {skipped}")
+    print(f"  Failed: {failed}")
+    print(f"  Unknown: {unknown}")
+    if failed or unknown:
+        print(f"  🔁 Re-apply the same plan file to retry the failed and unknown tickets")
+
+    return {'created': created, 'skipped': skipped, 'failed': failed, 'unknown': unknown}
+
+def main():
+    """Apply a saved plan file"""
+    print("🚀 Apply Playtest Plan")
+    print("=" * 60)
+
+    filename = input("Plan file to apply: ").strip()
+    plan = load_plan(filename)
+    metadata = plan.get('metadata', {})
+    print(f"  Generated at: {metadata.get('generated_at')}")
+    print(f"  Tickets: {len(plan.get('tickets', []))}")
+
+    response = input("Create these playtest tickets? (yes/no): ")
+    if response.lower() != 'yes':
+        print("❌ Apply cancelled")
+        return
+
+    with AirtableClient(AIRTABLE_API_KEY, AIRTABLE_BASE_ID) as airtable:
+        apply_plan(airtable, plan)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+In-memory table snapshots with hash indexes and linked-record joins.
+
+Scripts used to join records by hand: a loop over every challenge for every
+violating email, or a dict keyed by "player_game" strings rebuilt in each
+script. A Table keeps a listing as compact rows (one tuple per record, in
+column order) and builds secondary indexes on demand, so lookups by email,
+status or linked record id are hash lookups:
+
+    challenges = Table('Challenges', records, index=['recipientEmail'])
+    challenges.find('recipientEmail', 'ann@example.com')
+
+    games = Table('Games', game_records)
+    games.linked(post, 'Game')              # the post's Games records, joined across tables
+
+An index key is a field name or a tuple of field names. List values (linked
+records, lookups) are indexed under each of their elements, and a tuple key
+under each combination, so ('Player', 'GameToTest') groups tickets by pair.
+Records missing a key field aren't indexed under that key.
+"""
+from bisect import insort
+from itertools import product
+
+# Stands in for a field a record doesn't have, so rows stay plain tuples
+MISSING = object()
+
+def key_values(value):
+    """The values a field value is indexed under"""
+    if value is MISSING or value is None or value == '':
+        return []
+    if isinstance(value, list):
+        return [v for v in value if v is not None]
+    return [value]
+
+class Table:
+    """A loaded table: compact rows plus secondary hash indexes
+
+    Args:
+        name: Table name
+        records: Airtable-style records ({'id', 'createdTime', 'fields'})
+        fields: Columns to keep (default: every field that appears)
+        index: Keys to index up front (more are built on first use)
+    """
+
+    def __init__(self, name, records, fields=None, index=()):
+        records = list(records)
+        self.name = name
+        if fields is None:
+            seen = {}
+            for record in records:
+                for field in record.get('fields', {}):
+                    seen.setdefault(field, None)
+            fields = list(seen)
+        self.columns = list(fields)
+        self.column_positions = {field: i for i, field in enumerate(self.columns)}
+        self.ids = []
+        self.created = []
+        self.rows = []
+        self.positions = {}
+        self.indexes = {}
+        for record in records:
+            self.add(record)
+        for key in index:
+            self.index(key)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, record_id):
+        return record_id in self.positions
+
+    def __iter__(self):
+        return (self.record(position) for position in range(len(self.rows)))
+
+    def add(self, record):
+        """Insert or replace a record, keeping the built indexes up to date
+
+        Index entries stay in row order and values no row has any more are
+        dropped, so the indexes match a table built from the same records.
+        """
+        fields = record.get('fields', {})
+        row = tuple(fields.get(field, MISSING) for field in self.columns)
+        position = self.positions.get(record['id'])
+        if position is None:
+            position = len(self.rows)
+            self.positions[record['id']] = position
+            self.ids.append(record['id'])
+            self.created.append(record.get('createdTime'))
+            self.rows.append(row)
+        else:
+            for key, index in self.indexes.items():
+                for value in self.row_keys(self.rows[position], key):
+                    index[value].remove(position)
+                    if not index[value]:
+                        del index[value]
+            self.created[position] = record.get('createdTime', self.created[position])
+            self.rows[position] = row
+        for key, index in self.indexes.items():
+            for value in self.row_keys(row, key):
+                insort(index.setdefault(value, []), position)
+
+    def record(self, position):
+        row = self.rows[position]
+        fields = {field: value for field, value in zip(self.columns, row) if value is not MISSING}
+        return {'id': self.ids[position], 'createdTime': self.created[position], 'fields': fields}
+
+    def get(self, record_id, default=None):
+        position = self.positions.get(record_id)
+        return default if position is None else self.record(position)
+
+    def value(self, record_id, field, default=None):
+        position = self.positions.get(record_id)
+        column = self.column_positions.get(field)
+        if position is None or column is None:
+            return default
+        value = self.rows[position][column]
+        return default if value is MISSING else value
+
+    def row_keys(self, row, key):
+        fields = key if isinstance(key, tuple) else (key,)
+        values = []
+        for field in fields:
+            column = self.column_positions.get(field)
+            values.append(key_values(row[column]) if column is not None else [])
+        if not isinstance(key, tuple):
+            return values[0]
+        return list(product(*values))
+
+    def index(self, key):
+        """The index for key (a field or tuple of fields): value -> row positions, built on first use"""
+        if key not in self.indexes:
+            index = {}
+            for position, row in enumerate(self.rows):
+                for value in self.row_keys(row, key):
+                    index.setdefault(value, []).append(position)
+            self.indexes[key] = index
+        return self.indexes[key]
+
+    def find(self, key, value):
+        """Records whose key field(s) contain value (a tuple for a tuple key)"""
+        return [self.record(position) for position in self.index(key).get(value, [])]
+
+    def first(self, key, value, default=None):
+        positions = self.index(key).get(value)
+        return self.record(positions[0]) if positions else default
+
+    def groups(self, key):
+        """Records per key value"""
+        return {value: [self.record(position) for position in positions]
+                for value, positions in self.index(key).items()}
+
+    def linked(self, record, field):
+        """Records of this table that another record's linked-record field points to"""
+        linked_ids = key_values(record.get('fields', {}).get(field, MISSING))
+        return [self.record(self.positions[record_id]) for record_id in linked_ids if record_id in self.positions]
+
+    def first_linked(self, record, field, default=None):
+        linked = self.linked(record, field)
+        return linked[0] if linked else default
+
+    @classmethod
+    def load(cls, airtable, query, index=()):
+        """List a Query (airtable_query.py) into a Table, projected to the query's fields"""
+        records = query.get_all(airtable)
+        # Read the fields after listing: the query drops columns the table turned out not to have
+        return cls(query.table, records, fields=query.fields, index=index)
@@ -1,7 +1,9 @@
 import os
 from dotenv import load_dotenv
-import requests
-from collections import defaultdict
+from airtable_client import AirtableClient, BATCH_SIZE
+from airtable_mirror import mirror_or_live
+from airtable_query import Query
+from record_store import Table
 
 # Load environment variables from .env file
 load_dotenv()
@@ -10,72 +12,29 @@ load_dotenv()
 AIRTABLE_API_KEY = os.getenv("AIRTABLE_API_KEY")
 AIRTABLE_BASE_ID = os.getenv("AIRTABLE_BASE_ID")
 
-# Airtable configuration
-AIRTABLE_API_BASE = 'https://api.airtable.com/v0'
+# Airtable configuration; --from-mirror reads from the local SQLite mirror (airtable_mirror.py)
+airtable = mirror_or_live(AirtableClient(AIRTABLE_API_KEY, AIRTABLE_BASE_ID))
 PLAYTEST_TICKETS_TABLE = 'PlaytestTickets'
 
-def airtable_request(path, options=None):
-    """Make a request to the Airtable API"""
-    if options is None:
-        options = {}
-    
-    url = f"{AIRTABLE_API_BASE}/{AIRTABLE_BASE_ID}/{path}"
-    
-    headers = {
-        'Authorization': f'Bearer {AIRTABLE_API_KEY}',
-        'Content-Type': 'application/json'
-    }
-    
-    # Add any additional headers from options
-    if 'headers' in options:
-        headers.update(options['headers'])
-    
-    response = requests.request(
-        method=options.get('method', 'GET'),
-        url=url,
-        headers=headers,
-        json=options.get('json'),
-        params=options.get('params')
-    )
-    
-    if not response.ok:
-        raise Exception(f"Airtable error {response.status_code}: {response.text}")
-    
-    return response.json()
+# Duplicates are (Player, GameToTest) pairs; createdTime comes with every record
+TICKETS_QUERY = Query(PLAYTEST_TICKETS_TABLE, fields=['Player', 'GameToTest', 'PlaytestId'])
+PAIR_KEY = ('Player', 'GameToTest')
 
 def fetch_all_playtest_tickets():
     """Fetch all records from the PlaytestTickets table with pagination"""
     all_records = []
-    offset = None
     page_count = 0
     
     print("📄 Fetching all playtest tickets...")
     
-    while True:
-        page_count += 1
-        params = {'pageSize': 100}
-        if offset:
-            params['offset'] = offset
-        
-        try:
-            print(f"  Fetching page {page_count}...")
-            page = airtable_request(f"{PLAYTEST_TICKETS_TABLE}?{requests.compat.urlencode(params)}", {
-                'method': 'GET'
-            })
-            
-            page_records = page.get('records', [])
+    try:
+        for page_records in TICKETS_QUERY.pages(airtable):
+            page_count += 1
             all_records.extend(page_records)
-            offset = page.get('offset')
-            
-            print(f"    Got {len(page_records)} records (total so far: {len(all_records)})")
-            
-            if not offset:
-                print(f"  ✅ Reached end of data after {page_count} pages")
-                break
-                
-        except Exception as e:
-            print(f"❌ Error fetching page {page_count}: {e}")
-            break
+            print(f"  Page {page_count}: got {len(page_records)} records (total so far: {len(all_records)})")
+        print(f"  ✅ Reached end of data after {page_count} pages")
+    except Exception as e:
+        print(f"❌ Error fetching page {page_count + 1}: {e}")
     
     print(f"📊 Total records fetched: {len(all_records)}")
     return all_records
@@ -89,31 +48,22 @@ def analyze_duplicates():
     records = fetch_all_playtest_tickets()
     print(f"Found {len(records)} playtest tickets")
     
-    # Group by player and game to find duplicates
-    assignments = defaultdict(list)
+    # Group by player and game to find duplicates (tickets without both aren't indexed)
+    tickets = Table(PLAYTEST_TICKETS_TABLE, records, fields=TICKETS_QUERY.fields)
+    assignments = tickets.index(PAIR_KEY)
     duplicates = []
     
-    for record in records:
-        fields = record.get('fields', {})
-        player = fields.get('Player', [None])[0] if fields.get('Player') else None
-        game = fields.get('GameToTest', [None])[0] if fields.get('GameToTest') else None
-        playtest_id = fields.get('PlaytestId', 'Unknown')
-        
-        if player and game:
-            key = f"{player}_{game}"
-            assignments[key].append({
-                'record_id': record.get('id'),
-                'playtest_id': playtest_id,
+    for (player, game), positions in assignments.items():
+        if len(positions) > 1:
+            ticket_list = [{
+                'record_id': record['id'],
+                'playtest_id': record['fields'].get('PlaytestId', 'Unknown'),
                 'player': player,
                 'game': game,
-                'created_time': record.get('createdTime', 'Unknown')
-            })
-    
-    # Find duplicates
-    for key, ticket_list in assignments.items():
-        if len(ticket_list) > 1:
+                'created_time': record.get('createdTime') or 'Unknown'
+            } for record in map(tickets.record, positions)]
             duplicates.append({
-                'key': key,
+                'key': f"{player}_{game}",
                 'tickets': ticket_list,
                 'count': len(ticket_list)
             })
@@ -194,17 +144,18 @@ def remove_duplicates(simulation_mode=True):
         deleted_count = 0
         failed_count = 0
         
-        for ticket in tickets_to_delete:
+        # Delete in batches of 10 (the most Airtable accepts per request)
+        for start in range(0, len(tickets_to_delete), BATCH_SIZE):
+            batch = tickets_to_delete[start:start + BATCH_SIZE]
             try:
-                print(f"  🗑️  Deleting {ticket['playtest_id']}...")
-                response = airtable_request(f"{PLAYTEST_TICKETS_TABLE}/{ticket['record_id']}", {
-                    'method': 'DELETE'
-                })
-                print(f"    ✅ Deleted successfully")
-                deleted_count += 1
+                print(f"  🗑️  Deleting {', '.join(t['playtest_id'] for t in batch)}...")
+                deleted = airtable.delete_records(PLAYTEST_TICKETS_TABLE, [t['record_id'] for t in batch])
+                print(f"    ✅ Deleted {len(deleted)} tickets")
+                deleted_count += len(deleted)
+                failed_count += len(batch) - len(deleted)
             except Exception as e:
                 print(f"    ❌ Failed to delete: {e}")
-                failed_count += 1
+                failed_count += len(batch)
         
         print(f"\n🎯 Deletion Results:")
         print(f"  Successfully deleted: {deleted_count}")
@@ -239,8 +190,7 @@ def main():
     
     # Show final count
     try:
-        response = airtable_request(PLAYTEST_TICKETS_TABLE, {'method': 'GET'})
-        total_tickets = len(response.get('records', []))
+        total_tickets = len(airtable.get_all(PLAYTEST_TICKETS_TABLE, fields=['PlaytestId']))
         print(f"  Total tickets remaining: {total_tickets}")
     except Exception as e:
         print(f"  Could not fetch final ticket count: {e}")
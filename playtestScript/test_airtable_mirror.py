@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for the mirror's local formula evaluation (airtable_mirror.py).
+
+Checks formula_predicate() on the formulas airtable_query.py builds: string,
+checkbox, numeric and timestamp comparisons, record ids and non-empty fields,
+with linked-record lists, missing fields and values that need escaping. Random
+AND/OR/NOT trees over leaves whose values contain commas, parentheses and
+quotes must evaluate like the same tree evaluated leaf by leaf in Python.
+
+    python test_airtable_mirror.py
+"""
+import random
+from datetime import datetime
+from airtable_mirror import formula_predicate
+from airtable_query import (
+    equals, not_equals, greater_than, less_than, is_after, is_before, not_empty, all_of, any_of, negate,
+    record_id_is
+)
+
+RECORD = {'id': 'recA1', 'createdTime': '2025-01-01T00:00:00.000Z', 'fields': {
+    'status': 'Complete',
+    'Title': "It's (really), a \\ test",
+    'GameToTest': ['recGame1', 'recGame2'],
+    'SSSAwarded': 7,
+    'Hours': ['2.5'],
+    'Approved': True,
+    'Created At': '2025-10-16T12:00:00.000Z',
+    'Empty': ''
+}}
+
+CASES = [
+    (equals('status', 'Complete'), True),
+    (equals('status', 'Pending'), False),
+    (not_equals('status', 'Pending'), True),
+    (equals('Title', "It's (really), a \\ test"), True),
+    (equals('GameToTest', 'recGame2'), True),
+    (equals('GameToTest', 'recGame3'), False),
+    (not_equals('GameToTest', 'recGame1'), False),
+    (equals('Missing', ''), True),
+    (equals('Approved', True), True),
+    (equals('Approved', False), False),
+    (equals('Missing', False), True),
+    (not_equals('Approved', True), False),
+    (greater_than('SSSAwarded', 5), True),
+    (less_than('SSSAwarded', 5), False),
+    (greater_than('Hours', 2), True),
+    (greater_than('Missing', -1), True),
+    (less_than('Title', 100), False),
+    (is_after('Created At', datetime(2025, 10, 16, 11, 59)), True),
+    (is_after('Created At', '2025-10-16T14:00:00+02:00'), False),
+    (is_before('Created At', '2025-10-16T13:00:00+01:00'), False),
+    (is_before('Created At', '2025-10-17'), True),
+    (is_after('Missing', '2025-01-01'), False),
+    (record_id_is('recA1'), True),
+    (record_id_is('recA2'), False),
+    (not_empty('status'), True),
+    (not_empty('Empty'), False),
+    (not_empty('Missing'), False),
+    (all_of(equals('status', 'Complete'), greater_than('SSSAwarded', 5)), True),
+    (any_of(equals('status', 'Pending'), equals('GameToTest', 'recGame1')), True),
+    (negate(all_of(not_empty('status'), not_empty('Empty'))), True),
+]
+
+def test_leaf_and_nested_formulas():
+    for formula, expected in CASES:
+        assert formula_predicate(formula)(RECORD) is expected, formula
+
+def random_tree(rng, leaves, depth=0):
+    """(formula, expected value) for a random AND/OR/NOT tree over the leaves"""
+    if depth >= 3 or rng.random() < 0.3:
+        return rng.choice(leaves)
+    kind = rng.choice(['and', 'or', 'not'])
+    if kind == 'not':
+        formula, value = random_tree(rng, leaves, depth + 1)
+        return negate(formula), not value
+    children = [random_tree(rng, leaves, depth + 1) for _ in range(rng.randint(2, 4))]
+    combine, join = (all_of, all) if kind == 'and' else (any_of, any)
+    return combine(*[formula for formula, _ in children]), join(value for _, value in children)
+
+def test_random_trees_match_leaf_evaluation(trials=2000):
+    rng = random.Random(7)
+    leaves = [(formula, expected) for formula, expected in CASES
+              if not formula.startswith(('AND(', 'OR(', 'NOT('))]
+    for trial in range(trials):
+        formula, expected = random_tree(rng, leaves)
+        assert formula_predicate(formula)(RECORD) is expected, f"trial {trial}: {formula}"
+
+def test_unsupported_formulas_raise():
+    for formula in ("IS_AFTER(LAST_MODIFIED_TIME(), DATETIME_PARSE('2025-01-01'))", "LEN({Title})>3",
+                    "{status}=LOWER('x')"):
+        try:
+            formula_predicate(formula)
+        except ValueError:
+            continue
+        raise AssertionError(f"{formula} should not be evaluated locally")
+
+if __name__ == "__main__":
+    for test in (test_leaf_and_nested_formulas, test_random_trees_match_leaf_evaluation,
+                 test_unsupported_formulas_raise):
+        test()
+        print(f"✓ {test.__name__}")
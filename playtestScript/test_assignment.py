@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test script for the playtest assignment engine (assignment.py).
+
+Checks assign_flow() against an exact max flow (plain Edmonds-Karp over the
+complete player x game graph) on thousands of small random instances, and
+that every assignment respects the rules: no own games, no existing or
+duplicate pairs, no player or game over its remaining slots.
+
+    python test_assignment.py
+"""
+import random
+from collections import defaultdict, deque
+from assignment import assign_flow, remaining_slots, ExistingTickets
+
+def random_instance(rng):
+    """Active YSWS style records: each owner has one game and needs 1-4 tickets; some pairs already exist"""
+    owner_count = rng.randint(2, 12)
+    eligible = []
+    for i in range(owner_count):
+        eligible.append({
+            'record_id': f'rec{i}',
+            'user_id': f'user{i}',
+            'game_id': f'game{i}' if rng.random() < 0.9 else None,
+            'game_name': f'Game {i}',
+            'email': f'user{i}@example.com',
+            'tickets_needed': rng.randint(1, 4)
+        })
+    # Some owners have a second game
+    for i in range(rng.randint(0, 3)):
+        owner = rng.randrange(owner_count)
+        eligible.append(dict(eligible[owner], record_id=f'rec{owner_count + i}', game_id=f'game{owner_count + i}',
+                             tickets_needed=rng.randint(1, 4)))
+    existing = ExistingTickets()
+    for _ in range(rng.randint(0, owner_count)):
+        existing.add(f'user{rng.randrange(owner_count)}', f'game{rng.randrange(owner_count)}')
+    return eligible, existing
+
+def exact_max_flow(eligible, existing):
+    """Reference: Edmonds-Karp on the complete allowed graph"""
+    supply, demand = remaining_slots(eligible, existing)
+    owners = defaultdict(set)
+    for record in eligible:
+        owners[record['game_id']].add(record['user_id'])
+
+    capacity = defaultdict(int)
+    neighbours = defaultdict(set)
+
+    def edge(u, v, c):
+        capacity[(u, v)] += c
+        neighbours[u].add(v)
+        neighbours[v].add(u)
+
+    for player, n in supply.items():
+        edge('source', ('p', player), n)
+    for game, n in demand.items():
+        edge(('g', game), 'sink', n)
+    for player in supply:
+        for game in demand:
+            if player not in owners[game] and (player, game) not in existing.pairs:
+                edge(('p', player), ('g', game), 1)
+
+    flow = 0
+    while True:
+        parent = {'source': None}
+        queue = deque(['source'])
+        while queue and 'sink' not in parent:
+            u = queue.popleft()
+            for v in neighbours[u]:
+                if v not in parent and capacity[(u, v)] > 0:
+                    parent[v] = u
+                    queue.append(v)
+        if 'sink' not in parent:
+            return flow
+        path = []
+        v = 'sink'
+        while parent[v] is not None:
+            path.append((parent[v], v))
+            v = parent[v]
+        pushed = min(capacity[e] for e in path)
+        for u, v in path:
+            capacity[(u, v)] -= pushed
+            capacity[(v, u)] += pushed
+        flow += pushed
+
+def check_rules(eligible, existing, assignments):
+    supply, demand = remaining_slots(eligible, existing)
+    owners = defaultdict(set)
+    for record in eligible:
+        owners[record['game_id']].add(record['user_id'])
+    pairs = [(a['player_user_id'], a['game_id']) for a in assignments]
+    assert len(pairs) == len(set(pairs)), "duplicate pair"
+    played = defaultdict(int)
+    tested = defaultdict(int)
+    for player, game in pairs:
+        assert player not in owners[game], "player assigned to own game"
+        assert (player, game) not in existing.pairs, "existing pair planned again"
+        played[player] += 1
+        tested[game] += 1
+    assert all(n <= supply[player] for player, n in played.items()), "player over supply"
+    assert all(n <= demand[game] for game, n in tested.items()), "game over demand"
+
+def test_assign_flow_is_maximum(trials=3000):
+    rng = random.Random(1234)
+    for trial in range(trials):
+        eligible, existing = random_instance(rng)
+        assignments = assign_flow(eligible, seed=trial, existing=existing)
+        check_rules(eligible, existing, assignments)
+        expected = exact_max_flow(eligible, existing)
+        assert len(assignments) == expected, f"trial {trial}: {len(assignments)} vs exact {expected}"
+
+def test_existing_tickets_reduce_slots():
+    eligible = [
+        {'record_id': 'r1', 'user_id': 'u1', 'game_id': 'g1', 'game_name': 'G1', 'email': 'a', 'tickets_needed': 2},
+        {'record_id': 'r2', 'user_id': 'u2', 'game_id': 'g2', 'game_name': 'G2', 'email': 'b', 'tickets_needed': 2},
+    ]
+    existing = ExistingTickets()
+    existing.add('u1', 'g2')
+    supply, demand = remaining_slots(eligible, existing)
+    assert supply == {'u1': 1, 'u2': 2} and demand == {'g1': 2, 'g2': 1}
+    assignments = assign_flow(eligible, seed=0, existing=existing)
+    assert [(a['player_user_id'], a['game_id']) for a in assignments] == [('u2', 'g1')]
+
+if __name__ == "__main__":
+    for test in (test_existing_tickets_reduce_slots, test_assign_flow_is_maximum):
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test script for batched challenge generation (challenge_batch.py).
+
+Replaces the model request with a recorder and checks that a request never
+holds two playtests of the same game, and that every playtest's prompt
+lists its game's existing challenges plus the ones generated for the game
+in earlier requests.
+
+    python test_challenge_batch.py
+"""
+import os
+import tempfile
+
+# Keep the completion cache and triage outcomes of the test out of the working directory
+scratch = tempfile.mkdtemp(prefix='challenge_batch_test_')
+os.environ['LLM_CACHE_DIR'] = os.path.join(scratch, 'llm_cache')
+os.environ['TRIAGE_OUTCOMES_FILE'] = os.path.join(scratch, 'triage.jsonl')
+
+import threading
+import challenge_batch
+from challenge_batch import generate_in_batches
+
+FEEDBACK = 'The jump feels floaty and the second level needs checkpoints before the boss fight'
+
+def item(game, existing=()):
+    return {'game_id': game, 'game_name': f'Game {game}', 'feedback': FEEDBACK, 'scores': {},
+            'existing_challenges': list(existing)}
+
+class Recorder:
+    """Stands in for request_batch() and the single-playtest path"""
+
+    def __init__(self):
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def batch(self, items, model):
+        with self.lock:
+            self.requests.append(items)
+            number = len(self.requests)
+        return [f"Add feature {number}-{i} for {entry['game_id']} with clear success criteria"
+                for i, entry in enumerate(items)]
+
+    def single(self, feedback, game_name, scores, existing_challenges=None):
+        with self.lock:
+            self.requests.append([{'game_name': game_name, 'existing_challenges': existing_challenges}])
+            number = len(self.requests)
+        return f"Add single feature {number} for {game_name} with clear success criteria"
+
+def test_one_playtest_per_game_per_request():
+    recorder = Recorder()
+    original = challenge_batch.request_batch
+    challenge_batch.request_batch = recorder.batch
+    try:
+        items = [item('A', ['Old A challenge'])] * 3 + [item('B')] * 3 + [item('C')] * 2 + [item('D')]
+        results = generate_in_batches(items, recorder.single, 'test-model', batch_size=4, workers=2)
+    finally:
+        challenge_batch.request_batch = original
+
+    assert all(result.startswith('Add') for result in results)
+    for request in recorder.requests:
+        games = [entry['game_name'] for entry in request]
+        assert len(games) == len(set(games)), f"two playtests of one game in a request: {games}"
+
+    # Every playtest saw its game's existing challenges and everything generated for the game before it
+    for game, positions in (('A', [0, 1, 2]), ('B', [3, 4, 5]), ('C', [6, 7])):
+        for n, position in enumerate(positions):
+            seen = [entry for request in recorder.requests for entry in request
+                    if entry['game_name'] == f'Game {game}']
+            existing = seen[n]['existing_challenges']
+            earlier = [results[p] for p in positions[:n]]
+            assert all(challenge in existing for challenge in earlier), (game, n, existing)
+            if game == 'A':
+                assert 'Old A challenge' in existing
+
+if __name__ == "__main__":
+    test_one_playtest_per_game_per_request()
+    print("✓ test_one_playtest_per_game_per_request")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test script for the challenge daemon's checkpointing (challenge_daemon.py).
+
+Runs the daemon against an in-memory Airtable stand-in with the model calls
+replaced and some games made to fail, and checks that a failed game never
+breaks the checkpoint, that its playtests are retried in the next cycle (also
+after a restart) while finished ones aren't generated again, and that handled
+playtests are forgotten once no listing can return them.
+
+    python test_challenge_daemon.py
+"""
+import os
+import tempfile
+from datetime import timedelta
+
+# Keep the state, counts, completion cache and triage outcomes of the test out of the working directory
+scratch = tempfile.mkdtemp(prefix='challenge_daemon_test_')
+os.environ['LLM_CACHE_DIR'] = os.path.join(scratch, 'llm_cache')
+os.environ['TRIAGE_OUTCOMES_FILE'] = os.path.join(scratch, 'triage.jsonl')
+
+import challenge_daemon
+from challenge_daemon import ChallengeDaemon, DaemonState, POLL_OVERLAP_SECONDS
+from challenge_counts import ChallengeCounts
+from challenge_pipeline import ChallengePipeline
+
+def ticket(game, number):
+    return {'id': f'rec{game}{number}', 'fields': {
+        'status': 'Complete', 'GameToTest': [game], 'Game Name': [f'Game {game}'], 'ownerEmail': [f'{game}@example.com'],
+        'PlayerEmail': [f'player{number}@example.com'], 'SSSAwarded': number, 'Created At': f'2025-01-0{number}',
+        'Feedback': 'The jump feels floaty and the second level needs checkpoints before the boss fight'
+    }}
+
+class FakeAirtable:
+    """PlaytestTickets and Challenges in memory; `modified` is what the next poll lists"""
+
+    def __init__(self, tickets):
+        self.tickets = {record['id']: record for record in tickets}
+        self.modified = []
+        self.challenges = {}
+
+    def get_all(self, table, fields=None, filter_by_formula=None):
+        if table == 'PlaytestTickets':
+            if filter_by_formula and 'LAST_MODIFIED_TIME' in filter_by_formula:
+                return [self.tickets[record_id] for record_id in self.modified]
+            return list(self.tickets.values())
+        if filter_by_formula:
+            return []
+        return [{'id': record_id, 'fields': fields} for record_id, fields in self.challenges.items()]
+
+    def pages(self, table, **kwargs):
+        yield self.get_all(table, **kwargs)
+
+    def create(self, table, fields):
+        record_id = f'recChallenge{len(self.challenges) + 1}'
+        self.challenges[record_id] = fields
+        return {'id': record_id}
+
+# Games whose next finish() raises
+failing = set()
+
+class StubPipeline(ChallengePipeline):
+    def generate(self, plans, log=print):
+        return {playtest['record_id']: f"Add a checkpoint before the boss fight in {plan['game_id']} level {n}"
+                for plan in plans for n, playtest in enumerate(plan['to_generate'])}
+
+    def finish(self, plan, *args, **kwargs):
+        if plan['game_id'] in failing:
+            failing.discard(plan['game_id'])
+            raise RuntimeError("Airtable unavailable")
+        return super().finish(plan, *args, **kwargs)
+
+challenge_daemon.ChallengePipeline = StubPipeline
+
+def new_daemon(airtable, name):
+    state_file = os.path.join(scratch, f'{name}_state.json')
+    counts_file = os.path.join(scratch, f'{name}_counts.json')
+    return ChallengeDaemon(airtable, DaemonState(state_file), ChallengeCounts(counts_file))
+
+def test_failed_backlog_game_is_retried():
+    airtable = FakeAirtable([ticket(game, 1) for game in 'GHK'])
+    failing.add('K')
+    daemon = new_daemon(airtable, 'backlog')
+    daemon.start(backlog=True)
+    assert daemon.state.since is not None
+    assert set(daemon.state.handled) == {'recG1', 'recH1'} and daemon.state.retry == {'recK1'}
+    assert len(airtable.challenges) == 2
+
+    # A restart keeps the retry; the next poll generates K without touching G and H again
+    daemon = new_daemon(airtable, 'backlog')
+    daemon.start()
+    assert daemon.poll() == 1
+    assert len(airtable.challenges) == 3 and not daemon.state.retry
+    assert daemon.poll() == 0 and len(airtable.challenges) == 3
+
+def test_failed_poll_game_is_retried():
+    airtable = FakeAirtable([])
+    daemon = new_daemon(airtable, 'poll')
+    daemon.start()
+    airtable.tickets.update({record['id']: record for record in (ticket('G', 1), ticket('K', 1))})
+    airtable.modified = ['recG1', 'recK1']
+    failing.add('K')
+    assert daemon.poll() == 2
+    assert 'recG1' in daemon.state.handled and daemon.state.retry == {'recK1'}
+
+    # Listed again through the overlap: only the failed game runs
+    assert daemon.poll() == 1
+    assert len(airtable.challenges) == 2 and not daemon.state.retry
+
+def test_old_handled_playtests_are_pruned():
+    airtable = FakeAirtable([])
+    daemon = new_daemon(airtable, 'prune')
+    daemon.start()
+    airtable.tickets['recG1'] = ticket('G', 1)
+    airtable.modified = ['recG1']
+    daemon.poll()
+    assert 'recG1' in daemon.state.handled
+
+    # Pretend the handling happened long before the last poll
+    daemon.state.handled['recG1'] -= timedelta(seconds=POLL_OVERLAP_SECONDS * 2)
+    airtable.modified = []
+    daemon.poll()
+    assert 'recG1' not in daemon.state.handled
+    assert 'recG1' not in DaemonState(daemon.state.path).handled
+
+if __name__ == "__main__":
+    for test in (test_failed_backlog_game_is_retried, test_failed_poll_game_is_retried,
+                 test_old_handled_playtests_are_pruned):
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script for the challenge pipeline's limit handling (challenge_pipeline.py).
+
+Runs process_game() against an in-memory Airtable stand-in with the model
+calls replaced, and checks that the owner's reserved 'Not Submitted' slots
+are always given back or committed - also when generation raises or a
+record can't be created - that only created records are counted, and that
+process_games() reports the games that didn't finish.
+
+    python test_challenge_pipeline.py
+"""
+import os
+import tempfile
+
+# Keep the completion cache and triage outcomes of the test out of the working directory
+scratch = tempfile.mkdtemp(prefix='challenge_pipeline_test_')
+os.environ['LLM_CACHE_DIR'] = os.path.join(scratch, 'llm_cache')
+os.environ['TRIAGE_OUTCOMES_FILE'] = os.path.join(scratch, 'triage.jsonl')
+
+from challenge_pipeline import Snapshot, ChallengePipeline, ChallengeQuota
+
+LIMIT = 3
+
+def ticket(game, number, owner='owner@example.com'):
+    return {'id': f'rec{game}{number}', 'fields': {
+        'status': 'Complete', 'GameToTest': [game], 'Game Name': [f'Game {game}'], 'ownerEmail': [owner],
+        'PlayerEmail': [f'player{number}@example.com'], 'SSSAwarded': number, 'Created At': f'2025-01-0{number}',
+        'Feedback': 'The jump feels floaty and the second level needs checkpoints before the boss fight'
+    }}
+
+class FakeAirtable:
+    def __init__(self, fail_creates=()):
+        self.created = []
+        self.fail_creates = set(fail_creates)
+
+    def create(self, table, fields):
+        number = len(self.created) + 1
+        self.created.append(fields)
+        if number in self.fail_creates:
+            return None
+        return {'id': f'recChallenge{number}'}
+
+def pipeline_for(airtable, challenges, tickets):
+    snapshot = Snapshot(tickets, challenges)
+    quota = ChallengeQuota(snapshot.user_counts, LIMIT)
+    pipeline = ChallengePipeline(airtable, snapshot, top_n=4, quota=quota, reuse_fourth=True)
+    return snapshot, quota, pipeline
+
+def run_game(pipeline, snapshot, game):
+    return pipeline.process_game(1, 1, game, snapshot.by_game[game], log=lambda *args, **kwargs: None)
+
+def test_reservations_released_when_generation_raises():
+    snapshot, quota, pipeline = pipeline_for(FakeAirtable(), [], [ticket('G', n) for n in range(1, 5)])
+
+    def broken(plans, log=print):
+        raise RuntimeError("model unavailable")
+    pipeline.generate = broken
+
+    try:
+        run_game(pipeline, snapshot, 'G')
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("the generation error should propagate")
+    assert quota.reserved['owner@example.com'] == 0, quota.reserved
+    assert quota.can_receive('owner@example.com')
+
+def test_only_created_records_are_counted():
+    airtable = FakeAirtable(fail_creates={2})
+    snapshot, quota, pipeline = pipeline_for(airtable, [], [ticket('G', n) for n in range(1, 5)])
+    texts = ['Add a checkpoint before the boss fight in level two',
+             'Reduce the floaty jump by increasing gravity while falling',
+             'Add three coins that guide players to the hidden exit']
+    pipeline.generate = lambda plans, log=print: {
+        playtest['record_id']: text for plan in plans for playtest, text in zip(plan['to_generate'], texts)}
+
+    counts = run_game(pipeline, snapshot, 'G')
+    assert len(airtable.created) == 3
+    assert counts['challenges_generated'] == 2, counts
+    assert quota.reserved['owner@example.com'] == 0
+    assert snapshot.user_counts['owner@example.com']['Not Submitted'] == 2
+
+def test_limit_counts_existing_challenges():
+    existing = [{'id': f'recOld{n}', 'fields': {'recipientEmail': 'owner@example.com', 'Status': 'Not Submitted',
+                                                'Challenge': f'Old challenge {n}', 'AssignedGame': ['H']}}
+                for n in range(2)]
+    airtable = FakeAirtable()
+    snapshot, quota, pipeline = pipeline_for(airtable, existing, [ticket('G', n) for n in range(1, 5)])
+    pipeline.generate = lambda plans, log=print: {
+        playtest['record_id']: 'Add a checkpoint before the boss fight in level two'
+        for plan in plans for playtest in plan['to_generate']}
+
+    counts = run_game(pipeline, snapshot, 'G')
+    # One slot was left: it's taken by the first playtest, the others are skipped
+    assert counts['challenges_generated'] == 1 and counts['skipped_limit'] >= 2, counts
+    assert quota.reserved['owner@example.com'] == 0
+
+def test_failed_games_are_reported():
+    airtable = FakeAirtable(fail_creates={1})
+    tickets = [ticket(game, n, owner=f'{game}@example.com') for game in 'GHK' for n in range(1, 3)]
+    snapshot, quota, pipeline = pipeline_for(airtable, [], tickets)
+    pipeline.generate = lambda plans, log=print: {
+        playtest['record_id']: f"Add a checkpoint before the boss fight in {plan['game_id']} level {n}"
+        for plan in plans for n, playtest in enumerate(plan['to_generate'])}
+    finish = pipeline.finish
+
+    def finish_or_raise(plan, *args, **kwargs):
+        if plan['game_id'] == 'K':
+            raise RuntimeError("Airtable unavailable")
+        return finish(plan, *args, **kwargs)
+    pipeline.finish = finish_or_raise
+
+    failed = set()
+    results = pipeline.process_games({game: snapshot.by_game[game] for game in 'GHK'}, failed=failed)
+    # One game raised; the game that got the first (failing) create didn't finish either
+    assert len(results) == 2 and 'K' in failed and len(failed) == 2, (results, failed)
+    assert sum(r['create_errors'] for r in results) == 1
+
+if __name__ == "__main__":
+    for test in (test_reservations_released_when_generation_raises, test_only_created_records_are_counted,
+                 test_limit_counts_existing_challenges, test_failed_games_are_reported):
+        test()
+        print(f"✓ {test.__name__}")
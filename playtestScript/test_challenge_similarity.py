@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test script for near-duplicate challenge detection (challenge_similarity.py).
+
+Weighs terms over a sample of challenges like those in the Challenges table,
+and checks that rewordings of a challenge (number words, plurals, reordered
+or added words) are caught, while challenges that differ in one content term
+("collision" / "audio" bugs, "sound" / "visual" effects, level 1 / level 3)
+stay below the threshold however many words they share.
+
+    python test_challenge_similarity.py
+"""
+from challenge_similarity import ChallengeIndex, TermWeights, CHALLENGE_SIMILARITY_THRESHOLD
+
+CHALLENGES = [
+    "Add 3 sound effects to the jump action",
+    "Fix 2 collision bugs in the first level",
+    "Add a checkpoint before the boss fight",
+    "Add a pause menu with a resume button",
+    "Make the player's jump height adjustable",
+    "Add visual effects when an enemy is defeated",
+    "Add background music to the main menu",
+    "Add a tutorial level explaining the controls",
+    "Fix the camera clipping through walls in level 2",
+    "Add a high score screen that saves between runs",
+    "Add 2 new enemy types to level 3",
+    "Add a settings menu with a volume slider",
+    "Make the game restart when the player falls off the map",
+    "Add a timer that shows how long the level took",
+    "Add particle effects to the player's dash",
+    "Fix the player getting stuck on corners in level 1",
+    "Add a health bar to the boss",
+    "Add keyboard controls alongside mouse controls",
+    "Add coyote time to the jump",
+    "Add a death animation for the player",
+    "Fix the bug where the score resets after pausing",
+    "Fix 3 bugs reported in the second level",
+    "Add 5 new levels with increasing difficulty",
+    "Add sound effects for collecting coins",
+    "Fix the player falling through the floor in level 4",
+    "Add a level select screen",
+    "Fix the enemy pathfinding bug in the last level",
+    "Add a jump buffer so early presses still register",
+    "Add screen shake when the player takes damage",
+    "Add 2 power-ups the player can collect",
+    "Fix the audio cutting out after the first level",
+    "Add a credits screen to the main menu",
+    "Fix the collision on moving platforms",
+    "Add an options menu to change the controls",
+    "Add a double jump ability",
+    "Add a boss fight at the end of level 5",
+    "Fix the game crashing when the window is resized",
+    "Add a restart button to the game over screen",
+    "Add music that changes during the boss fight",
+    "Fix the player sprite flickering while running",
+]
+
+DUPLICATES = [
+    ("Add 3 sound effects to the jump action", "Add three sound effects for jumping"),
+    ("Add a checkpoint before the boss fight", "Add checkpoints before the boss fight"),
+    ("Add a pause menu with a resume button", "Add a pause menu that has a resume button"),
+    ("Fix the camera clipping through walls in level 2", "Fix camera clipping through the walls on level 2"),
+    ("Add a settings menu with a volume slider", "Add a volume slider to the settings menu"),
+    ("Add a health bar to the boss", "Add a health bar for the boss fight"),
+]
+
+DIFFERENT = [
+    ("Fix 2 collision bugs in the first level", "Fix 2 audio bugs in the first level"),
+    ("Add 3 sound effects to the jump action", "Add 3 visual effects to the jump action"),
+    ("Add 2 new enemy types to level 1", "Add 2 new enemy types to level 3"),
+    ("Add particle effects to the player's dash", "Add particle effects to the player's jump"),
+    ("Add background music to the main menu", "Add a credits screen to the main menu"),
+    ("Add a pause menu with a resume button", "Add a settings menu with a volume slider"),
+]
+
+def score(existing, candidate, weights):
+    match = ChallengeIndex([existing], threshold=0.0, weights=weights).find_duplicate(candidate)
+    return match[1] if match else 0.0
+
+def test_rewordings_are_duplicates():
+    weights = TermWeights(CHALLENGES)
+    for existing, candidate in DUPLICATES:
+        for first, second in ((existing, candidate), (candidate, existing)):
+            assert score(first, second, weights) >= CHALLENGE_SIMILARITY_THRESHOLD, (first, second)
+
+def test_different_content_terms_are_not_duplicates():
+    weights = TermWeights(CHALLENGES)
+    for existing, candidate in DIFFERENT:
+        for first, second in ((existing, candidate), (candidate, existing)):
+            assert score(first, second, weights) < CHALLENGE_SIMILARITY_THRESHOLD, (first, second)
+
+def test_index_returns_closest_duplicate():
+    index = ChallengeIndex(CHALLENGES, weights=TermWeights(CHALLENGES))
+    assert index.find_duplicate("Add three sound effects for jumping")[0] == "Add 3 sound effects to the jump action"
+    assert index.find_duplicate("Fix 2 audio bugs in the first level") is None
+    assert index.find_duplicate("Add a grappling hook") is None
+    assert index.find_duplicate("") is None
+
+    # The shared weights belong to the caller; the index only adds to its own
+    weights = TermWeights(CHALLENGES)
+    index = ChallengeIndex(weights=weights)
+    index.add("Add a grappling hook")
+    assert len(index) == 1 and weights.documents == len(CHALLENGES)
+    assert index.find_duplicate("Add grappling hooks")[0] == "Add a grappling hook"
+
+def test_index_without_corpus_uses_its_own_challenges():
+    index = ChallengeIndex(CHALLENGES)
+    assert index.weights.documents == len(CHALLENGES)
+    assert index.find_duplicate("Add checkpoints before the boss fight")[0] == "Add a checkpoint before the boss fight"
+    assert index.find_duplicate("Fix 2 audio bugs in the first level") is None
+    index.add("Fix 2 audio bugs in the first level")
+    assert index.weights.documents == len(CHALLENGES) + 1
+
+if __name__ == "__main__":
+    for test in (test_rewordings_are_duplicates, test_different_content_terms_are_not_duplicates,
+                 test_index_returns_closest_duplicate, test_index_without_corpus_uses_its_own_challenges):
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test script for the feedback triage threshold calibration (feedback_triage.py).
+
+Checks calibrate() against a brute force over every possible threshold on
+random outcome logs (with tied scores), the fallback to the default threshold
+while there are too few outcomes, and that FeedbackTriage calibrates on its
+outcomes file, ignoring outcomes scored by another triage version.
+
+    python test_feedback_triage.py
+"""
+import os
+import json
+import random
+import tempfile
+
+# Keep the triage outcomes of the test out of the working directory
+scratch = tempfile.mkdtemp(prefix='feedback_triage_test_')
+os.environ['TRIAGE_OUTCOMES_FILE'] = os.path.join(scratch, 'triage.jsonl')
+
+from feedback_triage import (
+    calibrate, FeedbackTriage, DEFAULT_THRESHOLD, MIN_CALIBRATION_SAMPLES, TRIAGE_VERSION
+)
+
+def false_skip_rate(outcomes, threshold):
+    skipped = [found for score, found in outcomes if score < threshold]
+    return sum(skipped) / len(skipped) if skipped else 0.0
+
+def brute_force(outcomes, max_false_skip_rate):
+    """Reference: the highest threshold (skipping scores below it) within the false-skip rate"""
+    scores = sorted({score for score, _ in outcomes})
+    candidates = scores[1:] + [scores[-1] + 1e-9]
+    best = 0.0
+    for threshold in candidates:
+        if false_skip_rate(outcomes, threshold) <= max_false_skip_rate:
+            best = max(best, threshold)
+    return best
+
+def random_outcomes(rng, count):
+    outcomes = []
+    for _ in range(count):
+        # Two decimals so scores tie; low scores rarely produce a challenge
+        score = round(rng.random(), 2)
+        outcomes.append((score, rng.random() < score ** 2))
+    return outcomes
+
+def test_calibrate_matches_brute_force(trials=500):
+    rng = random.Random(42)
+    for trial in range(trials):
+        outcomes = random_outcomes(rng, rng.randint(MIN_CALIBRATION_SAMPLES, 300))
+        rate = rng.choice([0.0, 0.02, 0.05, 0.2])
+        threshold = calibrate(outcomes, rate)
+        assert threshold == brute_force(outcomes, rate), f"trial {trial}: {threshold}"
+        assert false_skip_rate(outcomes, threshold) <= rate
+
+def test_calibrate_never_splits_tied_scores():
+    # Every 0.3 produced a challenge but one: no threshold may separate the 0.3s
+    outcomes = [(0.1, False)] * 40 + [(0.3, True)] * 19 + [(0.3, False)] + [(0.9, True)] * 10
+    assert calibrate(outcomes, 0.05) == 0.3
+    assert calibrate(outcomes, 0.35) == 0.9
+
+def test_too_few_outcomes_use_default():
+    outcomes = [(0.5, False)] * (MIN_CALIBRATION_SAMPLES - 1)
+    assert calibrate(outcomes) == DEFAULT_THRESHOLD
+    assert calibrate(outcomes + [(0.5, False)]) > 0.5
+
+def test_triage_calibrates_on_current_version():
+    path = os.path.join(scratch, 'outcomes.jsonl')
+    with open(path, 'w') as f:
+        for n in range(MIN_CALIBRATION_SAMPLES):
+            f.write(json.dumps({'version': TRIAGE_VERSION, 'score': 0.2, 'challenge': False}) + "\n")
+            # Scored by an older version: ignored even though they'd veto 0.2
+            f.write(json.dumps({'version': TRIAGE_VERSION - 1, 'score': 0.2, 'challenge': True}) + "\n")
+        f.write("not json\n")
+        for n in range(5):
+            f.write(json.dumps({'version': TRIAGE_VERSION, 'score': 0.8, 'challenge': True}) + "\n")
+
+    triage = FeedbackTriage(outcomes_file=path, audit_rate=0.0)
+    assert triage.threshold == 0.8, triage.threshold
+    send, predicted_skip, score = triage.check("fun game")
+    assert predicted_skip and not send and score < 0.8
+
+    # Recorded outcomes count at the next start
+    for n in range(3):
+        triage.record(0.5, False, True)
+    assert FeedbackTriage(outcomes_file=path).threshold == 0.5
+
+if __name__ == "__main__":
+    for test in (test_calibrate_matches_brute_force, test_calibrate_never_splits_tied_scores,
+                 test_too_few_outcomes_use_default, test_triage_calibrates_on_current_version):
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test script for the LLM response cache (llm_cache.py).
+
+Checks that an entry read over and over still expires once the TTL has passed
+since it was written - both on read and when eviction scans the directory -
+and that reads still protect an entry from least-recently-used eviction.
+
+    python test_llm_cache.py
+"""
+import os
+import time
+import tempfile
+from llm_cache import ResponseCache
+
+TTL_SECONDS = 0.5
+
+def new_cache(ttl_seconds=TTL_SECONDS):
+    return ResponseCache(tempfile.mkdtemp(prefix='llm_cache_test_'), ttl_days=ttl_seconds / 86400, max_mb=0)
+
+def entry_size(cache, key):
+    return os.path.getsize(cache._path(key))
+
+def test_often_read_entry_still_expires():
+    cache = new_cache()
+    cache.set('often', 'answer')
+    cache.set('never', 'answer')
+    started = time.time()
+    while time.time() - started < TTL_SECONDS * 0.8:
+        assert cache.get('often') == 'answer'
+        time.sleep(0.05)
+    time.sleep(TTL_SECONDS * 0.4)
+
+    # The third entry triggers an eviction that would keep two, but both expired ones go,
+    # however recently one was read
+    cache.max_bytes = entry_size(cache, 'often') * 3 - 1
+    cache.set('fresh', 'answer')
+    assert not os.path.exists(cache._path('often')) and not os.path.exists(cache._path('never'))
+    assert cache.get('fresh') == 'answer'
+
+    # A read past the TTL misses too
+    cache.set('late', 'answer')
+    time.sleep(TTL_SECONDS * 1.2)
+    assert cache.get('late') is None and not os.path.exists(cache._path('late'))
+
+def test_reads_protect_from_lru_eviction():
+    cache = new_cache(ttl_seconds=0)
+    cache.set('read', 'answer')
+    time.sleep(0.02)
+    cache.set('unread', 'answer')
+    time.sleep(0.02)
+    assert cache.get('read') == 'answer'
+
+    cache.max_bytes = entry_size(cache, 'read') * 3 - 1
+    cache.set('newest', 'answer')
+    assert cache.get('read') == 'answer' and cache.get('newest') == 'answer'
+    assert cache.get('unread') is None
+
+if __name__ == "__main__":
+    for test in (test_often_read_entry_still_expires, test_reads_protect_from_lru_eviction):
+        test()
+        print(f"✓ {test.__name__}")
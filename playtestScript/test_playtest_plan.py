@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test script for plan application (playtest_plan.py).
+
+Applies plans against an in-memory PlaytestTickets stand-in that can fail
+writes after (or before) storing them, and checks that re-applying a plan
+never duplicates a ticket, that a failed write is verified before the batch
+is sent again, and that a batch whose verification fails is reported as
+unknown instead of being resent.
+
+    python test_playtest_plan.py
+"""
+import requests
+from airtable_client import AirtableError
+from playtest_plan import build_plan, apply_plan, BATCH_SIZE
+
+def assignments(count):
+    return [{'player_user_id': f'recUser{n}', 'game_id': f'recGame{n % 7}'} for n in range(count)]
+
+class FakeAirtable:
+    """PlaytestTickets in memory; fail_writes/fail_reads are consumed one entry per call"""
+
+    def __init__(self, fail_writes=(), fail_reads=()):
+        self.records = []
+        self.writes = 0
+        self.fail_writes = list(fail_writes)
+        self.fail_reads = list(fail_reads)
+
+    def iterate(self, table, fields=None, filter_by_formula=None):
+        if filter_by_formula and self.fail_reads and self.fail_reads.pop(0):
+            raise requests.ConnectionError("read timed out")
+        return iter([{'id': f'rec{n}', 'fields': ticket} for n, ticket in enumerate(self.records)
+                     if not filter_by_formula or f"'{ticket['PlaytestId']}'" in filter_by_formula])
+
+    def create_records(self, table, records, retry_writes=True):
+        assert retry_writes is False, "ticket writes must not be retried blindly"
+        self.writes += 1
+        failure = self.fail_writes.pop(0) if self.fail_writes else None
+        if failure == 'before':
+            raise AirtableError(503, "unavailable")
+        self.records.extend(records)
+        if failure == 'after':
+            # Airtable stored the batch but the response never arrived
+            raise requests.Timeout("response timed out")
+        return records
+
+def playtest_ids(airtable):
+    return [fields['PlaytestId'] for fields in airtable.records]
+
+def test_reapply_creates_nothing_twice():
+    plan = build_plan(assignments(BATCH_SIZE * 2 + 3))
+    airtable = FakeAirtable()
+    assert apply_plan(airtable, plan) == {'created': 23, 'skipped': 0, 'failed': 0, 'unknown': 0}
+    assert apply_plan(airtable, plan) == {'created': 0, 'skipped': 23, 'failed': 0, 'unknown': 0}
+    assert len(playtest_ids(airtable)) == len(set(playtest_ids(airtable))) == 23
+
+def test_failed_write_is_verified_before_retrying():
+    plan = build_plan(assignments(BATCH_SIZE * 2))
+    # First batch stored but reported as failed, second batch rejected once then stored
+    airtable = FakeAirtable(fail_writes=['after', 'before'])
+    results = apply_plan(airtable, plan)
+    assert results == {'created': 20, 'skipped': 0, 'failed': 0, 'unknown': 0}, results
+    assert len(playtest_ids(airtable)) == len(set(playtest_ids(airtable))) == 20
+    assert airtable.writes == 3
+
+def test_failed_verification_is_not_retried():
+    plan = build_plan(assignments(BATCH_SIZE + 4))
+    airtable = FakeAirtable(fail_writes=['after'], fail_reads=[True])
+    results = apply_plan(airtable, plan)
+    assert results == {'created': 4, 'skipped': 0, 'failed': 0, 'unknown': 10}, results
+    assert len(playtest_ids(airtable)) == len(set(playtest_ids(airtable))) == 14
+
+    # Re-applying the plan resolves the unknown batch without sending it again
+    assert apply_plan(airtable, plan) == {'created': 0, 'skipped': 14, 'failed': 0, 'unknown': 0}
+
+def test_batch_failing_every_attempt_is_reported():
+    plan = build_plan(assignments(3))
+    airtable = FakeAirtable(fail_writes=['before'] * 3)
+    assert apply_plan(airtable, plan) == {'created': 0, 'skipped': 0, 'failed': 3, 'unknown': 0}
+    assert apply_plan(airtable, plan) == {'created': 3, 'skipped': 0, 'failed': 0, 'unknown': 0}
+
+if __name__ == "__main__":
+    for test in (test_reapply_creates_nothing_twice, test_failed_write_is_verified_before_retrying,
+                 test_failed_verification_is_not_retried, test_batch_failing_every_attempt_is_reported):
+        test()
+        print(f"✓ {test.__name__}")
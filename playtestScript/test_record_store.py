@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-memory record store (record_store.py).
+
+Inserts and replaces random records in Tables whose indexes were built up
+front, and checks that every index, lookup and join matches a Table built
+from scratch from the final records - including list (linked record) values
+and tuple keys, values that no record has any more, and indexes built only
+after the changes.
+
+    python test_record_store.py
+"""
+import random
+from record_store import Table
+
+FIELDS = ['Status', 'Game', 'Email']
+KEYS = ['Status', 'Game', ('Status', 'Game'), ('Email', 'Status')]
+
+def random_record(rng, record_id):
+    fields = {
+        'Status': rng.choice(['Complete', 'Pending', 'Not Submitted']),
+        'Game': rng.sample(['recGame1', 'recGame2', 'recGame3', 'recGame4'], rng.randint(0, 3))
+    }
+    if rng.random() < 0.8:
+        fields['Email'] = rng.choice(['ann@example.com', 'bob@example.com', ''])
+    return {'id': record_id, 'createdTime': f'2025-01-{rng.randint(1, 28):02d}', 'fields': fields}
+
+def check_matches_fresh(table, records):
+    fresh = Table(table.name, [records[record_id] for record_id in table.ids], fields=FIELDS)
+    assert len(table) == len(fresh) == len(records)
+    assert list(table) == list(fresh)
+    for key in KEYS:
+        assert table.index(key) == fresh.index(key), key
+        for value in fresh.index(key):
+            assert table.find(key, value) == fresh.find(key, value), (key, value)
+    assert table.groups('Game') == fresh.groups('Game')
+
+def test_add_keeps_indexes_current(trials=200):
+    rng = random.Random(11)
+    for trial in range(trials):
+        records = {}
+        table = Table('Challenges', [], fields=FIELDS, index=KEYS[:2])
+        for _ in range(rng.randint(1, 60)):
+            record = random_record(rng, f'rec{rng.randrange(15)}')
+            records[record['id']] = record
+            table.add(record)
+            if rng.random() < 0.2:
+                # Indexes built midway must be maintained from then on too
+                table.index(rng.choice(KEYS))
+        check_matches_fresh(table, records)
+
+def test_replaced_values_disappear():
+    table = Table('PlaytestTickets', [
+        {'id': 'rec1', 'fields': {'Status': 'Pending', 'Game': ['recGame1', 'recGame2']}},
+        {'id': 'rec2', 'fields': {'Status': 'Pending', 'Game': ['recGame2']}},
+    ], fields=FIELDS, index=KEYS)
+    table.add({'id': 'rec1', 'fields': {'Status': 'Complete', 'Game': ['recGame2']}})
+
+    assert 'recGame1' not in table.index('Game')
+    assert ('Pending', 'recGame1') not in table.index(('Status', 'Game'))
+    assert [r['id'] for r in table.find('Game', 'recGame2')] == ['rec1', 'rec2']
+    assert table.first('Status', 'Pending')['id'] == 'rec2'
+    assert table.value('rec1', 'Status') == 'Complete'
+    assert table.value('rec1', 'Email', 'none') == 'none'
+
+def test_replace_keeps_created_time_and_position():
+    table = Table('Posts', [{'id': 'rec1', 'createdTime': '2025-01-01', 'fields': {'Status': 'Pending'}},
+                            {'id': 'rec2', 'createdTime': '2025-01-02', 'fields': {'Status': 'Pending'}}],
+                  fields=FIELDS, index=['Status'])
+    table.add({'id': 'rec1', 'fields': {'Status': 'Pending', 'Email': 'ann@example.com'}})
+    assert table.get('rec1')['createdTime'] == '2025-01-01'
+    assert [r['id'] for r in table] == ['rec1', 'rec2']
+    assert [r['id'] for r in table.find('Status', 'Pending')] == ['rec1', 'rec2']
+    post = {'id': 'recPost', 'fields': {'Email': ['rec2', 'recMissing', 'rec1']}}
+    assert [r['id'] for r in table.linked(post, 'Email')] == ['rec2', 'rec1']
+
+if __name__ == "__main__":
+    for test in (test_add_keeps_indexes_current, test_replaced_values_disappear,
+                 test_replace_keeps_created_time_and_position):
+        test()
+        print(f"✓ {test.__name__}")